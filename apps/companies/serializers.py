@@ -15,3 +15,30 @@ class CompanySerializer(serializers.ModelSerializer):
         if value <= 0:
             raise serializers.ValidationError("O faturamento mensal deve ser maior que zero.")
         return value
+
+
+class PortfolioSimulationInputSerializer(serializers.Serializer):
+    """
+    Parâmetros da simulação de todas as empresas do usuário. Os dados de cada empresa
+    vêm do cadastro; apenas os custos precisam ser informados.
+    """
+    default_cost_ratio = serializers.DecimalField(
+        max_digits=5, decimal_places=4, min_value=0, max_value=1, default=0,
+        label="Proporção Padrão de Custos",
+        help_text="Custos como fração do faturamento (ex.: 0.3000) para empresas sem custo informado."
+    )
+    cost_overrides = serializers.DictField(
+        child=serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0),
+        required=False, default=dict,
+        label="Custos por Empresa",
+        help_text="Mapa {id da empresa: custos mensais} que substitui a proporção padrão."
+    )
+
+    def validate_cost_overrides(self, value):
+        overrides = {}
+        for company_id, costs in value.items():
+            try:
+                overrides[int(company_id)] = costs
+            except (TypeError, ValueError):
+                raise serializers.ValidationError(f"ID de empresa inválido: {company_id}")
+        return overrides
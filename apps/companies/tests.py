@@ -1,7 +1,11 @@
-from django.test import TestCase
+from decimal import Decimal
+from django.test import TestCase, override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
+from simulation.models import SimulationLog
+from simulation.services.generations import CacheGenerations
+from simulation.services.rate_table import RateTable
 from .models import Company
 
 class CompanyModelTest(TestCase):
@@ -63,4 +67,66 @@ class CompanyAPITest(APITestCase):
             "tax_regime": "SIMPLES_NACIONAL"
         }
         response = self.client.post(url, data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class PortfolioSimulationAPITest(APITestCase):
+    def setUp(self):
+        RateTable.invalidate()
+        self.user = User.objects.create_user(username="portfolio", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.companies = [
+            Company.objects.create(
+                user=self.user, name=f"Cliente {index}", cnpj=cnpj, monthly_revenue=Decimal('10000.00'),
+                sector=Company.Sector.SERVICES, state=Company.UF.SP, tax_regime=Company.TaxRegime.SIMPLES_NACIONAL
+            )
+            for index, cnpj in enumerate(["11.222.333/0001-81", "11.444.777/0001-61", "45.723.174/0001-10"])
+        ]
+        other = User.objects.create_user(username="other", password="password123")
+        self.foreign = Company.objects.create(
+            user=other, name="Outra", cnpj="33.000.167/0001-01", monthly_revenue=Decimal('5000.00'),
+            sector=Company.Sector.COMMERCE, state=Company.UF.RJ, tax_regime=Company.TaxRegime.LUCRO_PRESUMIDO
+        )
+
+    @override_settings(SIMULATION_GENERATION_CHECK_INTERVAL=60)
+    def test_simulate_all_companies(self):
+        first, second, third = self.companies
+        CacheGenerations.check()
+        RateTable.current()
+        with self.assertNumQueries(4):
+            response = self.client.post(reverse('company-simulate-all'), {
+                "default_cost_ratio": 0.2,
+                "cost_overrides": {str(second.id): 10000.00, str(third.id): 10000.01}
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['total'], response.data['sucesso'], response.data['erros']), (3, 2, 1))
+        items = {item['empresa_id']: item for item in response.data['empresas']}
+        self.assertEqual(items[first.id]['custos'], Decimal('2000.00'))
+        self.assertEqual(items[first.id]['resultados']['carga_tributaria_reforma'], Decimal('2120.00'))
+        self.assertEqual(items[second.id]['classificacao_impacto'], 'POSITIVO')
+        self.assertEqual(items[third.id]['status'], 'erro')
+        self.assertEqual(response.data['resumo']['carga_tributaria_atual'], Decimal('2000.00'))
+        self.assertEqual(response.data['resumo']['por_classificacao'], {'POSITIVO': 1, 'NEUTRO': 0, 'NEGATIVO': 1})
+
+        logs = SimulationLog.objects.filter(user=self.user)
+        self.assertEqual(set(logs.values_list('company_id', flat=True)), {first.id, second.id})
+        self.assertEqual(logs.get(company=first).pk, items[first.id]['id'])
+
+    def test_overrides_must_belong_to_user(self):
+        response = self.client.post(reverse('company-simulate-all'), {
+            "cost_overrides": {str(self.foreign.id): 100.00}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(SimulationLog.objects.count(), 0)
+
+    @override_settings(SIMULATION_PORTFOLIO_MAX_COMPANIES=2)
+    def test_company_limit(self):
+        response = self.client.post(reverse('company-simulate-all'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("2 empresas", response.data['detail'])
+        self.assertEqual(SimulationLog.objects.count(), 0)
+
+        with override_settings(SIMULATION_PORTFOLIO_MAX_COMPANIES=3):
+            response = self.client.post(reverse('company-simulate-all'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 3)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CompanyViewSet
+from .views import CompanyViewSet, PortfolioSimulationView
 
 router = DefaultRouter()
 router.register(r'companies', CompanyViewSet, basename='company')
 
 urlpatterns = [
+    path('simulate-all/', PortfolioSimulationView.as_view(), name='company-simulate-all'),
     path('', include(router.urls)),
 ]
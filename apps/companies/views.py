@@ -1,8 +1,19 @@
-from rest_framework import viewsets
+from collections import Counter
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from drf_spectacular.utils import extend_schema_view, extend_schema
+from simulation.models import SimulationLog
+from simulation.services.batch import BatchSimulator, percentage_exact, to_centavos, to_decimal
 from .models import Company
-from .serializers import CompanySerializer
+from .serializers import CompanySerializer, PortfolioSimulationInputSerializer
+
+QUANTUM = Decimal('0.01')
 
 @extend_schema_view(
     list=extend_schema(summary="Listar Empresas", tags=['Empresas']),
@@ -29,4 +40,123 @@ class CompanyViewSet(viewsets.ModelViewSet):
         """
         Define o usuário autenticado como dono da empresa ao cadastrar.
         """
-        serializer.save(user=self.request.user)
\ No newline at end of file
+        serializer.save(user=self.request.user)
+
+@extend_schema(summary="Simular Todas as Empresas", tags=['Empresas'])
+class PortfolioSimulationView(APIView):
+    """
+    Simula de uma vez todas as empresas do usuário a partir do cadastro (faturamento,
+    regime, setor e UF), com custos por proporção padrão ou informados por empresa.
+    As empresas são carregadas em uma consulta, calculadas em lote (BatchSimulator)
+    e os logs gravados com bulk_create em uma transação. Carteiras com mais de
+    SIMULATION_PORTFOLIO_MAX_COMPANIES empresas são recusadas (400), como no lote.
+    """
+    serializer_class = PortfolioSimulationInputSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = PortfolioSimulationInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        overrides = serializer.validated_data['cost_overrides']
+        ratio = serializer.validated_data['default_cost_ratio']
+        # Lê no máximo uma empresa além do limite, só para detectar o excesso
+        limit = settings.SIMULATION_PORTFOLIO_MAX_COMPANIES
+        companies = list(
+            Company.objects.filter(user=request.user).order_by('id').values_list(
+                'id', 'name', 'monthly_revenue', 'tax_regime', 'sector', 'state'
+            )[:limit + 1]
+        )
+        if len(companies) > limit:
+            return Response(
+                {"detail": f"A carteira pode conter no máximo {limit} empresas para a simulação conjunta."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        unknown = sorted(set(overrides) - {company[0] for company in companies})
+        if unknown:
+            return Response(
+                {"cost_overrides": [f"Empresas não encontradas: {', '.join(map(str, unknown))}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        items = []
+        valid = []
+        for company_id, name, revenue, tax_regime, sector, state in companies:
+            costs = overrides[company_id] if company_id in overrides else (revenue * ratio).quantize(QUANTUM)
+            item = {'empresa_id': company_id, 'empresa': name}
+            if costs > revenue:
+                item.update(status='erro', erros={'costs': ["Os custos não podem ser maiores que o faturamento."]})
+            else:
+                valid.append((item, revenue, costs, tax_regime, sector, state))
+            items.append(item)
+
+        summary = {
+            'carga_tributaria_atual': to_decimal(0),
+            'carga_tributaria_reforma': to_decimal(0),
+            'diferenca_absoluta': to_decimal(0),
+            'diferenca_percentual': to_decimal(0),
+            'por_classificacao': {'POSITIVO': 0, 'NEUTRO': 0, 'NEGATIVO': 0},
+        }
+        if valid:
+            _, revenues, costs, regimes, sectors, states = zip(*valid)
+            result = BatchSimulator.run(
+                to_centavos(revenues),
+                to_centavos(costs),
+                np.array(regimes, dtype=object),
+                np.array(sectors, dtype=object),
+                np.array(states, dtype=object),
+            )
+
+            logs = []
+            for position, (item, revenue, cost, tax_regime, sector, state) in enumerate(valid):
+                row = result.row(position)
+                logs.append(SimulationLog(
+                    user=request.user,
+                    company_id=item['empresa_id'],
+                    monthly_revenue=revenue,
+                    costs=cost,
+                    tax_regime=tax_regime,
+                    sector=sector,
+                    state=state,
+                    current_tax_load=row['current_tax_load'],
+                    reform_tax_load=row['reform_tax_load'],
+                    delta_value=row['delta_value'],
+                    impact_classification=row['impact_classification']
+                ))
+                item.update(
+                    status='ok',
+                    faturamento=revenue,
+                    custos=cost,
+                    resultados={
+                        'carga_tributaria_atual': row['current_tax_load'],
+                        'carga_tributaria_reforma': row['reform_tax_load'],
+                        'diferenca_absoluta': row['delta_value'],
+                        'diferenca_percentual': row['delta_percentage']
+                    },
+                    classificacao_impacto=row['impact_classification']
+                )
+
+            with transaction.atomic():
+                SimulationLog.objects.bulk_create(logs, batch_size=settings.SIMULATION_BATCH_CHUNK_SIZE)
+            for (item, *_), log in zip(valid, logs):
+                item['id'] = log.pk
+
+            current_total = int(result.current_tax.sum(dtype=object))
+            reform_total = int(result.reform_tax.sum(dtype=object))
+            summary.update(
+                carga_tributaria_atual=to_decimal(current_total),
+                carga_tributaria_reforma=to_decimal(reform_total),
+                diferenca_absoluta=to_decimal(reform_total - current_total),
+                diferenca_percentual=to_decimal(percentage_exact(reform_total - current_total, current_total)),
+            )
+            summary['por_classificacao'].update(Counter(result.impact_classification.tolist()))
+
+        return Response({
+            'total': len(items),
+            'sucesso': len(valid),
+            'erros': len(items) - len(valid),
+            'resumo': summary,
+            'empresas': items
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,110 @@
+import inspect
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    Base para views nativamente assíncronas (ASGI) com handlers `async def`.
+
+    Autenticação, permissões e throttling são os do DRF (DEFAULT_AUTHENTICATION_CLASSES,
+    `permission_classes` e DEFAULT_THROTTLE_CLASSES, com a mesma cota das views
+    síncronas), executados por `APIView.initial` em uma única chamada sync_to_async;
+    o handler roda no event loop. Erros passam por `APIView.handle_exception`, isto é,
+    pelo EXCEPTION_HANDLER do projeto. Respostas de sucesso usam o mesmo encoder do
+    DRF (Decimal como número).
+    """
+
+    permission_classes = [IsAuthenticated]
+    # Variantes de rotas síncronas já documentadas: fora do schema OpenAPI
+    schema = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # `options` e `http_method_not_allowed` herdados do APIView são síncronos
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    @staticmethod
+    def parse(request):
+        """
+        Lê o corpo JSON da requisição.
+        """
+        if not request.body:
+            return {}
+        try:
+            return json.loads(request.body)
+        except ValueError as e:
+            raise ParseError(f"JSON inválido - {e}")
+
+    @staticmethod
+    def respond(data, status_code=status.HTTP_200_OK):
+        return JsonResponse(
+            data, status=status_code, encoder=JSONEncoder, safe=False,
+            json_dumps_params={'ensure_ascii': False}
+        )
+
+    async def paginate(self, request, queryset, serializer_class, pagination_class):
+        """
+        Paginação por número de página com a configuração de `pagination_class` (uma
+        PageNumberPagination) e o mesmo formato de resposta (count, next, previous,
+        results), com contagem e leitura assíncronas.
+        """
+        paginator = pagination_class()
+        page_size = paginator.page_size
+        try:
+            requested = int(request.GET[paginator.page_size_query_param])
+            if requested > 0:
+                page_size = min(requested, paginator.max_page_size or requested)
+        except (KeyError, ValueError, TypeError):
+            pass
+
+        count = await queryset.acount()
+        last_page = max(1, -(-count // page_size))
+        try:
+            page = int(request.GET.get(paginator.page_query_param, 1))
+            if not 1 <= page <= last_page:
+                raise ValueError
+        except ValueError:
+            raise NotFound(paginator.invalid_page_message.format(page_number=request.GET.get(paginator.page_query_param)))
+
+        offset = (page - 1) * page_size
+        results = [serializer_class(item).data async for item in queryset[offset:offset + page_size]]
+
+        url = request.build_absolute_uri()
+        if page < last_page:
+            next_url = replace_query_param(url, paginator.page_query_param, page + 1)
+        else:
+            next_url = None
+        if page == 2:
+            previous_url = remove_query_param(url, paginator.page_query_param)
+        elif page > 2:
+            previous_url = replace_query_param(url, paginator.page_query_param, page - 1)
+        else:
+            previous_url = None
+
+        return {'count': count, 'next': next_url, 'previous': previous_url, 'results': results}
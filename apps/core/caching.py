@@ -0,0 +1,227 @@
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes (threads do mesmo processo) pela mesma chave: só a
+    primeira executa `fn`, as demais esperam e recebem o mesmo resultado ou exceção.
+    Evita que, após uma invalidação ou na partida a frio, cada requisição concorrente
+    recalcule o mesmo valor no banco (cache stampede).
+
+    Uso típico em um lookup com cache:
+
+        flight = SingleFlight()
+        value = flight.do(key, lambda: compute(key), timeout=5)
+    """
+
+    class _Call:
+        __slots__ = ('done', 'result', 'error')
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def busy(self, key):
+        """
+        Indica se há uma execução em andamento para a chave.
+        """
+        return key in self._calls
+
+    def do(self, key, fn, timeout=None):
+        """
+        Executa `fn()` ou, se outra thread já o executa para a mesma chave, espera o
+        resultado. Com `timeout` (s), quem espera recebe TimeoutError se a execução
+        demorar mais que isso; a execução em si continua.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Execução em andamento para {key!r} excedeu {timeout}s.")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def refresh_early(expires_at, delta, beta=1.0):
+    """
+    Recálculo antecipado probabilístico (XFetch): retorna True quando o valor deve ser
+    recalculado agora, com probabilidade crescente à medida que `expires_at` (relógio
+    monotônico) se aproxima. `delta` é o tempo (s) que o cálculo levou; `beta` > 1
+    antecipa mais, 0 só recalcula após a expiração. Assim um único chamador costuma
+    recalcular antes do prazo, em vez de todos ao mesmo tempo quando ele vence.
+    """
+    return time.monotonic() - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+class TieredCache:
+    """
+    Cache em dois níveis para lookups de serviços:
+
+    - local: LRU limitado (`max_size`) por processo, com os objetos Python já
+      desserializados (sem pickle) e TTL próprio (`local_ttl`);
+    - compartilhado: o cache do Django `alias` (ex.: FileBasedCache ou DatabaseCache,
+      que não exigem serviço externo), visto por todos os workers, com `shared_ttl`.
+
+    TTL None mantém a entrada até ser removida. Acertos no nível compartilhado são
+    promovidos ao local, e misses são calculados uma única vez por processo
+    (SingleFlight). `delete()` e `clear()` propagam pelos dois níveis; entradas locais
+    de outros processos expiram pelo TTL local, então chaves que precisam de coerência
+    imediata devem ser versionadas (ex.: pela geração das regras).
+    """
+
+    def __init__(self, name, alias='default', max_size=128, local_ttl=None, shared_ttl=None):
+        self.name = name
+        self.alias = alias
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.reset_stats()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def _namespace(self):
+        """
+        Versão das chaves no nível compartilhado, incrementada por `clear()`.
+        """
+        return self.shared.get_or_set(f"{self.name}:namespace", 1, timeout=None)
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.local_expirations += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.local_hits += 1
+            return value
+
+    def _local_set(self, key, value):
+        expires_at = time.monotonic() + self.local_ttl if self.local_ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.local_evictions += 1
+
+    def get(self, key, default=None):
+        value = self._local_get(key)
+        if value is not _MISSING:
+            return value
+
+        value = self.shared.get(f"{self.name}:{key}", _MISSING, version=self._namespace())
+        if value is _MISSING:
+            with self._lock:
+                self.misses += 1
+            return default
+
+        with self._lock:
+            self.shared_hits += 1
+        self._local_set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.shared.set(f"{self.name}:{key}", value, self.shared_ttl, version=self._namespace())
+        self._local_set(key, value)
+
+    def get_or_set(self, key, compute):
+        """
+        Retorna o valor em cache ou executa `compute()` (uma vez por processo, mesmo
+        com chamadas concorrentes) e o grava nos dois níveis.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        def fill():
+            value = self._local_get(key)
+            if value is _MISSING:
+                value = compute()
+                self.set(key, value)
+            return value
+
+        return self._flight.do(key, fill)
+
+    def delete(self, key):
+        self.shared.delete(f"{self.name}:{key}", version=self._namespace())
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Descarta todas as entradas: as locais deste processo e, trocando a versão das
+        chaves, as do nível compartilhado para todos os processos.
+        """
+        try:
+            self.shared.incr(f"{self.name}:namespace")
+        except ValueError:
+            self.shared.set(f"{self.name}:namespace", 2, timeout=None)
+        self.clear_local()
+
+    def clear_local(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.local_hits + self.shared_hits + self.misses
+            return {
+                'nome': self.name,
+                'local': {
+                    'tamanho': len(self._entries),
+                    'tamanho_maximo': self.max_size,
+                    'ttl': self.local_ttl,
+                    'acertos': self.local_hits,
+                    'remocoes': self.local_evictions,
+                    'expiracoes': self.local_expirations,
+                },
+                'compartilhado': {
+                    'cache': self.alias,
+                    'ttl': self.shared_ttl,
+                    'acertos': self.shared_hits,
+                },
+                'falhas': self.misses,
+                'taxa_acerto': round((self.local_hits + self.shared_hits) / total, 4) if total else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.local_hits = self.shared_hits = self.misses = 0
+            self.local_evictions = self.local_expirations = 0
@@ -1,2 +1,142 @@
+import threading
+import time
+from unittest import mock
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from core.caching import SingleFlight, TieredCache, refresh_early
 
-# Create your tests here.
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow(self, result=None, error=None):
+        def fn():
+            self.calls += 1
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return result
+        return fn
+
+    def run_concurrently(self, fn, count=6, **kwargs):
+        outcomes = []
+
+        def call():
+            try:
+                outcomes.append(self.flight.do('chave', fn, **kwargs))
+            except Exception as e:
+                outcomes.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        threads[0].start()
+        while not self.flight.busy('chave'):
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_callers_share_one_execution(self):
+        result = object()
+        outcomes = self.run_concurrently(self.slow(result))
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(outcome is result for outcome in outcomes))
+        self.assertFalse(self.flight.busy('chave'))
+
+    def test_error_is_shared_and_key_released(self):
+        error = RuntimeError("banco fora")
+        outcomes = self.run_concurrently(self.slow(error=error))
+
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(outcome is error for outcome in outcomes))
+        self.assertEqual(self.flight.do('chave', lambda: 42), 42)
+
+    def test_waiter_timeout(self):
+        leader = threading.Thread(target=self.flight.do, args=('chave', self.slow()))
+        leader.start()
+        while not self.flight.busy('chave'):
+            time.sleep(0.001)
+        with self.assertRaises(TimeoutError):
+            self.flight.do('chave', self.slow(), timeout=0.01)
+        self.release.set()
+        leader.join()
+        self.assertEqual(self.calls, 1)
+
+    def test_refresh_early(self):
+        now = time.monotonic()
+        # beta = 0: só após a expiração
+        self.assertFalse(refresh_early(now + 1, delta=10, beta=0))
+        self.assertTrue(refresh_early(now - 1, delta=10, beta=0))
+
+        with mock.patch('core.caching.random.random', return_value=0.5):
+            # -log(0.5) ~ 0.69: antecipa quando delta x beta x 0.69 alcança o prazo
+            self.assertFalse(refresh_early(now + 1, delta=1, beta=1))
+            self.assertTrue(refresh_early(now + 1, delta=2, beta=1))
+
+
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.cache = TieredCache('teste', alias='default', max_size=2, local_ttl=60)
+
+    def other_process(self):
+        """
+        Outra instância com o mesmo nome: nível local vazio, mesmo nível compartilhado.
+        """
+        return TieredCache('teste', alias='default', max_size=2)
+
+    def test_local_hit_returns_same_object(self):
+        value = {'aliquotas': (1, 2)}
+        self.cache.set('chave', value)
+        with mock.patch.object(caches['default'], 'get') as shared_get:
+            self.assertIs(self.cache.get('chave'), value)
+        shared_get.assert_not_called()
+        self.assertEqual(self.cache.stats()['local']['acertos'], 1)
+
+    def test_shared_hit_is_promoted(self):
+        self.cache.set('chave', [1, 2])
+        other = self.other_process()
+
+        value = other.get('chave')
+        self.assertEqual(value, [1, 2])
+        self.assertIs(other.get('chave'), value)
+        stats = other.stats()
+        self.assertEqual((stats['compartilhado']['acertos'], stats['local']['acertos'], stats['falhas']), (1, 1, 0))
+
+    def test_get_or_set_computes_once(self):
+        compute = mock.Mock(return_value=(1, 2))
+        self.assertEqual(self.cache.get_or_set('chave', compute), (1, 2))
+        self.assertEqual(self.other_process().get_or_set('chave', compute), (1, 2))
+        compute.assert_called_once()
+        self.assertEqual(self.cache.stats()['falhas'], 1)
+
+    def test_lru_eviction_and_local_ttl(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, key)
+        self.assertEqual(self.cache.stats()['local']['remocoes'], 1)
+        self.assertEqual(self.cache.get('a'), 'a')  # ainda no nível compartilhado
+
+        with mock.patch('core.caching.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(self.cache.get('c'), 'c')
+        stats = self.cache.stats()
+        self.assertEqual((stats['local']['expiracoes'], stats['compartilhado']['acertos']), (1, 2))
+
+    def test_delete_and_clear_propagate_through_both_tiers(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNone(self.other_process().get('a'))
+
+        self.cache.clear()
+        self.assertEqual(self.cache.stats()['local']['tamanho'], 0)
+        self.assertIsNone(self.other_process().get('b'))
+        self.cache.set('b', 3)
+        self.assertEqual(self.other_process().get('b'), 3)
@@ -1,11 +1,46 @@
-from django.contrib import admin
-from .models import TaxRule, SuggestionMatrix, SimulationLog
+from django.contrib import admin, messages
+from .models import TaxRule, SuggestionMatrix, SimulationLog, TransitionSchedule, RecomputeJob, ExportJob
+from .services.recompute import RecomputeRunner
 
 @admin.register(TaxRule)
 class TaxRuleAdmin(admin.ModelAdmin):
     list_display = ('name', 'rule_type', 'sector', 'state', 'rate', 'is_active')
     list_filter = ('rule_type', 'sector', 'state', 'is_active')
     search_fields = ('name',)
+    actions = ['recompute_affected_logs']
+
+    # Como em TaxRuleViewSet: cada alteração enfileira o recálculo dos logs afetados
+    # (escopo anterior e novo)
+    def save_model(self, request, obj, form, change):
+        previous = None
+        if change:
+            previous = TaxRule.objects.filter(pk=obj.pk).values_list('rule_type', 'sector', 'state').first()
+        super().save_model(request, obj, form, change)
+        if previous and previous != (obj.rule_type, obj.sector, obj.state):
+            RecomputeRunner.enqueue(*previous)
+        RecomputeRunner.enqueue(obj.rule_type, obj.sector, obj.state)
+
+    def delete_model(self, request, obj):
+        RecomputeRunner.enqueue(obj.rule_type, obj.sector, obj.state)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for scope in set(queryset.values_list('rule_type', 'sector', 'state')):
+            RecomputeRunner.enqueue(*scope)
+        super().delete_queryset(request, queryset)
+
+    @admin.action(description="Recalcular simulações afetadas")
+    def recompute_affected_logs(self, request, queryset):
+        jobs = [RecomputeRunner.enqueue(rule.rule_type, rule.sector, rule.state) for rule in queryset]
+        RecomputeRunner.start(jobs)
+        self.message_user(
+            request, f"{len(jobs)} recálculo(s) iniciado(s) em segundo plano.", messages.SUCCESS
+        )
+
+@admin.register(TransitionSchedule)
+class TransitionScheduleAdmin(admin.ModelAdmin):
+    list_display = ('year', 'current_factor', 'reform_factor', 'description')
+    ordering = ('year',)
 
 @admin.register(SuggestionMatrix)
 class SuggestionMatrixAdmin(admin.ModelAdmin):
@@ -23,4 +58,34 @@ class SimulationLogAdmin(admin.ModelAdmin):
     list_display = ('id', 'created_at', 'tax_regime', 'sector', 'state', 'impact_classification', 'delta_value')
     list_filter = ('tax_regime', 'sector', 'state', 'impact_classification', 'created_at')
     search_fields = ('id', 'company__name')
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(RecomputeJob)
+class RecomputeJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'rule_type', 'sector', 'state', 'status', 'processed', 'updated', 'last_id', 'max_id', 'created_at')
+    list_filter = ('status', 'rule_type')
+    readonly_fields = (
+        'status', 'last_id', 'max_id', 'processed', 'updated', 'error', 'started_at', 'finished_at',
+        'created_at', 'updated_at'
+    )
+    actions = ['run_jobs']
+
+    @admin.action(description="Executar / retomar recálculo")
+    def run_jobs(self, request, queryset):
+        # Jobs EXECUTANDO já estão em andamento; cada execução ainda reserva o job (claim)
+        jobs = list(
+            queryset.filter(status__in=[RecomputeJob.Status.PENDING, RecomputeJob.Status.FAILED]).order_by('created_at')
+        )
+        RecomputeRunner.start(jobs)
+        self.message_user(
+            request, f"{len(jobs)} recálculo(s) iniciado(s) em segundo plano.", messages.SUCCESS
+        )
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'export_format', 'status', 'rows_done', 'total_rows', 'created_at', 'expires_at')
+    list_filter = ('status', 'export_format')
+    readonly_fields = (
+        'status', 'total_rows', 'rows_done', 'file', 'error', 'started_at', 'finished_at', 'expires_at',
+        'created_at', 'updated_at'
+    )
@@ -0,0 +1,53 @@
+import django_filters
+from django import forms
+from companies.models import Company
+from .models import SimulationLog, SuggestionMatrix
+from .services.export_cursor import ExportCursor
+
+
+class CursorField(forms.CharField):
+    """
+    Campo de formulário que decodifica um cursor de exportação em (created_at, id).
+    """
+    def to_python(self, value):
+        value = super().to_python(value)
+        if not value:
+            return None
+        try:
+            return ExportCursor.decode(value)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+
+
+class CursorFilter(django_filters.Filter):
+    field_class = CursorField
+
+    def filter(self, qs, value):
+        if value is None:
+            return qs
+        return qs.filter(ExportCursor.after(value))
+
+
+class SimulationExportFilter(django_filters.FilterSet):
+    """
+    Filtros da exportação do histórico, aplicados no SQL: período de criação, setor,
+    UF, regime, impacto (aceitam vários valores: ?sector=SERVICOS&sector=COMERCIO),
+    empresa e `since` (cursor: apenas logs criados depois da posição que ele indica).
+    """
+    created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lt')
+    sector = django_filters.MultipleChoiceFilter(choices=Company.Sector.choices)
+    state = django_filters.MultipleChoiceFilter(choices=Company.UF.choices)
+    tax_regime = django_filters.MultipleChoiceFilter(choices=Company.TaxRegime.choices)
+    impact_classification = django_filters.MultipleChoiceFilter(
+        choices=SuggestionMatrix.ImpactClassification.choices
+    )
+    company = django_filters.NumberFilter(field_name='company_id')
+    since = CursorFilter()
+
+    class Meta:
+        model = SimulationLog
+        fields = [
+            'created_after', 'created_before', 'sector', 'state', 'tax_regime', 'impact_classification',
+            'company', 'since'
+        ]
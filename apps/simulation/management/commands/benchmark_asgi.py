@@ -0,0 +1,209 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from simulation.models import SimulationLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara, sob carga concorrente, as views síncronas servidas por WSGI (gunicorn) e por "
+        "ASGI (uvicorn) com as variantes assíncronas (/async/) servidas por ASGI."
+    )
+
+    # (nome, servidor, prefixo das rotas)
+    SCENARIOS = (
+        ('WSGI gunicorn + views síncronas', 'gunicorn', ''),
+        ('ASGI uvicorn + views síncronas', 'uvicorn', ''),
+        ('ASGI uvicorn + views assíncronas', 'uvicorn', 'async/'),
+    )
+
+    ENDPOINTS = ('history', 'dashboard', 'simulate')
+
+    PAYLOAD = {
+        "monthly_revenue": 50000.00,
+        "costs": 15000.00,
+        "tax_regime": "LUCRO_PRESUMIDO",
+        "sector": "SERVICOS",
+        "state": "SP"
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=200, help="Conexões simultâneas (keep-alive).")
+        parser.add_argument('--requests', type=int, default=5000, help="Requisições por endpoint e cenário.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processos de cada servidor.")
+        parser.add_argument('--threads', type=int, default=4, help="Threads por processo do gunicorn (gthread).")
+        parser.add_argument('--logs', type=int, default=200, help="Logs do usuário de teste no início de cada cenário.")
+        parser.add_argument('--endpoints', default="history,dashboard,simulate", help="Endpoints medidos, separados por vírgula.")
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        endpoints = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(endpoints) - set(self.ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Endpoints desconhecidos: {', '.join(sorted(unknown))}")
+
+        user, _ = User.objects.get_or_create(username='benchmark_asgi')
+        token = str(AccessToken.for_user(user))
+        host, port = '127.0.0.1', options['port']
+
+        self.stdout.write(
+            f"{options['connections']} conexões | {options['requests']} requisições por endpoint "
+            f"| {options['workers']} processos por servidor"
+        )
+        for name, server, prefix in self.SCENARIOS:
+            self.reset_logs(user, options['logs'])
+            process = self.start_server(server, host, port, options)
+            try:
+                self.wait_ready(host, port, process)
+                for endpoint in endpoints:
+                    request = self.build_request(host, port, prefix, endpoint, token)
+                    # Aquecimento: compila tabelas e abre conexões com o banco em cada processo
+                    asyncio.run(self.load(host, port, request, options['connections'], options['connections'] * 2))
+                    stats = asyncio.run(self.load(host, port, request, options['connections'], options['requests']))
+                    self.report(name, endpoint, stats)
+            finally:
+                process.terminate()
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    @staticmethod
+    def reset_logs(user, count):
+        SimulationLog.objects.filter(user=user).delete()
+        SimulationLog.objects.bulk_create([
+            SimulationLog(
+                user=user, monthly_revenue=Decimal('10000.00') + i, costs=Decimal('2000.00'),
+                tax_regime='SIMPLES_NACIONAL', sector='SERVICOS' if i % 2 else 'COMERCIO',
+                current_tax_load=Decimal('1000.00'), reform_tax_load=Decimal('2120.00'),
+                delta_value=Decimal('1120.00'), impact_classification='NEGATIVO'
+            ) for i in range(count)
+        ])
+
+    @staticmethod
+    def start_server(server, host, port, options):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),
+            DEBUG='False',
+            THROTTLE_USER_RATE='100000000/day',
+        )
+        workers = str(options['workers'])
+        if server == 'gunicorn':
+            command = [
+                sys.executable, '-m', 'gunicorn', 'config.wsgi:application', '--bind', f'{host}:{port}',
+                '--workers', workers, '--threads', str(options['threads']), '--log-level', 'warning',
+            ]
+        else:
+            command = [
+                sys.executable, '-m', 'uvicorn', 'config.asgi:application', '--host', host, '--port', str(port),
+                '--workers', workers, '--log-level', 'warning', '--no-access-log',
+            ]
+        return subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+
+    @staticmethod
+    def wait_ready(host, port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"O servidor terminou com código {process.returncode}.")
+            try:
+                with socket.create_connection((host, port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"O servidor não respondeu em {timeout}s.")
+
+    def build_request(self, host, port, prefix, endpoint, token):
+        path = f"/api/simulation/{prefix}{endpoint}/"
+        headers = [f"Host: {host}:{port}", f"Authorization: Bearer {token}", "Connection: keep-alive"]
+        if endpoint == 'simulate':
+            body = json.dumps(self.PAYLOAD).encode()
+            headers += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+            head = f"POST {path} HTTP/1.1\r\n"
+        else:
+            body = b""
+            head = f"GET {path} HTTP/1.1\r\n"
+        return (head + "\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+    @classmethod
+    async def load(cls, host, port, request, connections, total):
+        """
+        Envia `total` requisições por `connections` conexões keep-alive simultâneas.
+        Retorna latências (s), erros e duração total.
+        """
+        remaining = [total]
+        latencies = []
+        errors = [0]
+
+        async def worker():
+            reader = writer = None
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    start = time.perf_counter()
+                    writer.write(request)
+                    await writer.drain()
+                    status_code, keep_alive = await cls.read_response(reader)
+                    latencies.append(time.perf_counter() - start)
+                    if status_code >= 400:
+                        errors[0] += 1
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors[0] += 1
+                    keep_alive = False
+                if not keep_alive and writer is not None:
+                    writer.close()
+                    writer = None
+            if writer is not None:
+                writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(connections)))
+        return np.array(latencies), errors[0], time.perf_counter() - start
+
+    @staticmethod
+    async def read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        status_code = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await reader.readexactly(int(headers.get('content-length', 0)))
+        return status_code, headers.get('connection') != 'close'
+
+    def report(self, name, endpoint, stats):
+        latencies, errors, elapsed = stats
+        if not len(latencies):
+            self.stdout.write(f"{name:<34} {endpoint:<10} sem respostas | erros: {errors}")
+            return
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) * 1000
+        self.stdout.write(
+            f"{name:<34} {endpoint:<10} {len(latencies) / elapsed:>8,.0f} req/s "
+            f"| p50 {p50:7.1f} ms | p95 {p95:7.1f} ms | p99 {p99:7.1f} ms | erros: {errors}"
+        )
@@ -0,0 +1,41 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from companies.models import Company
+from simulation.services.batch import BatchSimulator
+from simulation.services.rate_table import RateTable
+
+
+class Command(BaseCommand):
+    help = "Mede a vazão (linhas/s) do motor de simulação em lote (BatchSimulator)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Linhas por execução.")
+        parser.add_argument('--repeat', type=int, default=5, help="Número de execuções medidas.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        rng = np.random.default_rng(options['seed'])
+
+        revenue = rng.integers(100_000, 100_000_000_00, size=rows, dtype=np.int64)
+        costs = (revenue * rng.random(rows)).astype(np.int64)
+        regime = rng.choice(np.array(BatchSimulator.REGIMES), size=rows)
+        sector = rng.choice(np.array(Company.Sector.values), size=rows)
+        state = rng.choice(np.array(Company.UF.values), size=rows)
+
+        table = RateTable.current()
+        # Aquecimento (compila os arrays de alíquotas)
+        BatchSimulator.run(revenue[:1000], costs[:1000], regime[:1000], sector[:1000], state[:1000], table)
+
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            BatchSimulator.run(revenue, costs, regime, sector, state, table)
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        self.stdout.write(
+            f"{rows:,} linhas | melhor: {best:.3f}s | mediana: {sorted(timings)[len(timings) // 2]:.3f}s "
+            f"| {rows / best:,.0f} linhas/s"
+        )
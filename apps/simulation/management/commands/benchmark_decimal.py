@@ -0,0 +1,120 @@
+import random
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from companies.models import Company
+from simulation.services.batch import RATE_SCALE, BatchSimulator, percentage_exact, scale_rate, to_decimal
+from simulation.services.calculator import TaxCalculator
+from simulation.services.rate_table import RateTable
+
+QUANTUM = Decimal('0.01')
+
+
+def decimal_simulation(table, data):
+    """
+    Caminho atual (Decimal): TaxCalculator sem arredondamento, classificação pela
+    diferença exata e quantize só na resposta, como em SimulationView.
+    """
+    company_data = {'tax_regime': data['tax_regime'], 'sector': data['sector'], 'state': data['state']}
+    financials = {'monthly_revenue': data['monthly_revenue'], 'costs': data['costs']}
+    current_tax = TaxCalculator.calculate_current_tax(company_data, financials, table=table)
+    reform_tax = TaxCalculator.calculate_reform_tax(company_data, financials, table=table)
+    delta_value = reform_tax - current_tax
+    if current_tax > 0:
+        delta_percentage = (delta_value / current_tax) * 100
+    else:
+        delta_percentage = Decimal('0.00')
+    classification = 'NEGATIVO' if delta_value > 0 else 'POSITIVO' if delta_value < 0 else 'NEUTRO'
+    return {
+        'carga_tributaria_atual': current_tax.quantize(QUANTUM),
+        'carga_tributaria_reforma': reform_tax.quantize(QUANTUM),
+        'diferenca_absoluta': delta_value.quantize(QUANTUM),
+        'diferenca_percentual': delta_percentage.quantize(QUANTUM),
+        'classificacao_impacto': classification,
+    }
+
+
+def _round_half_even(value):
+    """
+    Divide `value` (em 1/RATE_SCALE de centavo) por RATE_SCALE com ROUND_HALF_EVEN.
+    """
+    quotient, rest = divmod(value, RATE_SCALE)
+    twice = rest * 2
+    if twice > RATE_SCALE or (twice == RATE_SCALE and quotient % 2 == 1):
+        quotient += 1
+    return quotient
+
+
+def int_simulation(rates, data):
+    """
+    Núcleo com inteiros Python puros: centavos e alíquotas na escala RATE_SCALE já
+    convertidos, sem objetos intermediários; Decimal só na resposta.
+    """
+    revenue, costs = data['revenue_centavos'], data['costs_centavos']
+    current_tax = revenue * rates[data['tax_regime'], data['sector'], data['state']]
+    reform_tax = max(0, revenue - costs) * rates['REFORMA', data['sector'], data['state']]
+    delta_value = reform_tax - current_tax
+    classification = 'NEGATIVO' if delta_value > 0 else 'POSITIVO' if delta_value < 0 else 'NEUTRO'
+    return {
+        'carga_tributaria_atual': to_decimal(_round_half_even(current_tax)),
+        'carga_tributaria_reforma': to_decimal(_round_half_even(reform_tax)),
+        'diferenca_absoluta': to_decimal(_round_half_even(delta_value)),
+        'diferenca_percentual': to_decimal(percentage_exact(delta_value, current_tax)),
+        'classificacao_impacto': classification,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o tempo de CPU por simulação do caminho escalar com Decimal (TaxCalculator) "
+        "e de um núcleo equivalente com inteiros Python em centavos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200_000, help="Simulações por medição.")
+        parser.add_argument('--repeat', type=int, default=5, help="Número de medições.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        scenarios = []
+        for _ in range(1000):
+            revenue = rng.randint(100_000, 100_000_000_00)
+            costs = rng.randint(0, revenue)
+            scenarios.append({
+                'monthly_revenue': Decimal(revenue).scaleb(-2),
+                'costs': Decimal(costs).scaleb(-2),
+                'revenue_centavos': revenue,
+                'costs_centavos': costs,
+                'tax_regime': rng.choice(BatchSimulator.REGIMES),
+                'sector': rng.choice(Company.Sector.values),
+                'state': rng.choice(Company.UF.values),
+            })
+
+        table = RateTable.current()
+        # Alíquotas inteiras resolvidas uma vez, fora da medição
+        rates = {}
+        for data in scenarios:
+            for regime in (data['tax_regime'], 'REFORMA'):
+                key = (regime, data['sector'], data['state'])
+                if key not in rates:
+                    rates[key] = scale_rate(table.rate(*key))
+
+        # Os dois caminhos devem produzir a mesma resposta
+        for data in scenarios:
+            if decimal_simulation(table, data) != int_simulation(rates, data):
+                raise AssertionError(f"Resultados divergentes para {data}")
+
+        iterations = options['iterations']
+        results = {}
+        for label, simulate, context in (('Decimal', decimal_simulation, table), ('int', int_simulation, rates)):
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.process_time()
+                for index in range(iterations):
+                    simulate(context, scenarios[index % len(scenarios)])
+                timings.append(time.process_time() - start)
+            results[label] = min(timings) / iterations
+            self.stdout.write(f"{label:>8}: {results[label] * 1e6:.2f} µs de CPU por simulação")
+
+        self.stdout.write(f"Razão Decimal / int: {results['Decimal'] / results['int']:.2f}x")
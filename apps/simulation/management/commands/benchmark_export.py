@@ -0,0 +1,147 @@
+import os
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from openpyxl import Workbook
+from companies.models import Company
+from simulation.models import SimulationLog
+from simulation.services.columnar import ColumnarExporter
+from simulation.services.exporter import DataExporter
+
+
+def _legacy_excel(queryset, path):
+    """
+    Exportação anterior, para comparação: planilha inteira em memória e largura das
+    colunas calculada em uma segunda passada pelas células.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Histórico de Simulações"
+    ws.append(DataExporter.HEADERS)
+    for row in DataExporter._prepare_rows(queryset):
+        ws.append(row)
+    for column in ws.columns:
+        width = max(len(str(cell.value)) for cell in column if cell.value is not None)
+        ws.column_dimensions[column[0].column_letter].width = width + 2
+    wb.save(path)
+
+
+def _write_csv(queryset, path):
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        for chunk in DataExporter.iter_csv(queryset):
+            output.write(chunk)
+
+
+def _loaders():
+    """
+    Leitura de cada formato com pandas, como fazem os analistas (None sem pandas).
+    """
+    try:
+        import pandas
+    except ImportError:
+        return {}
+    return {
+        'csv': lambda path: pandas.read_csv(path, sep=';', encoding='utf-8-sig'),
+        'parquet': pandas.read_parquet,
+        'arrow': pandas.read_feather,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede tempo, pico de memória Python (tracemalloc) e tamanho das exportações do "
+        "histórico (CSV em streaming, Excel write-only, Excel anterior, Parquet e Arrow IPC) "
+        "com N registros temporários e, com pandas instalado, o tempo de leitura dos "
+        "arquivos. Os registros são criados em uma transação desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument(
+            '--legacy-max', type=int, default=100_000,
+            help="Maior volume medido com o Excel anterior (a memória cresce com as linhas).",
+        )
+        parser.add_argument(
+            '--formats', nargs='+', choices=['csv', 'excel', 'legacy', 'parquet', 'arrow'],
+            default=['csv', 'excel', 'legacy', 'parquet', 'arrow'],
+        )
+
+    def measure(self, label, rows, fn, path, loader=None):
+        """
+        Tempo de uma execução sem rastreamento e pico de memória de outra com tracemalloc
+        (que deixa a execução várias vezes mais lenta). Memória alocada pelo próprio
+        Arrow (fora do Python) não entra no pico.
+        """
+        start = time.perf_counter()
+        fn(path)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        fn(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        load = ""
+        if loader is not None:
+            start = time.perf_counter()
+            loader(path)
+            load = f" | leitura {time.perf_counter() - start:6.2f}s"
+        self.stdout.write(
+            f"{rows:>9,} linhas | {label:<16} | {elapsed:8.2f}s | pico {peak / 2**20:8.1f} MiB "
+            f"| {os.path.getsize(path) / 2**20:7.1f} MiB | {rows / elapsed:,.0f} linhas/s{load}"
+        )
+
+    def populate(self, rows):
+        SimulationLog.objects.all().delete()
+        companies = [
+            Company(
+                name=f"Empresa Benchmark {index}", cnpj=f"{index:014d}", monthly_revenue=Decimal('50000.00'),
+                sector=Company.Sector.SERVICES, state=Company.UF.SP, tax_regime=Company.TaxRegime.LUCRO_PRESUMIDO,
+            )
+            for index in range(100)
+        ]
+        Company.objects.bulk_create(companies)
+        companies = list(Company.objects.filter(name__startswith="Empresa Benchmark"))
+        batch = []
+        for index in range(rows):
+            batch.append(SimulationLog(
+                company=companies[index % len(companies)] if index % 10 else None,
+                monthly_revenue=Decimal(10_000 + index % 90_000), costs=Decimal('2500.75'),
+                tax_regime='LUCRO_PRESUMIDO', sector='SERVICOS', state='SP' if index % 2 else None,
+                current_tax_load=Decimal('1632.50'), reform_tax_load=Decimal('2120.00'),
+                delta_value=Decimal('487.50'), impact_classification='NEGATIVO',
+            ))
+            if len(batch) == 10_000:
+                SimulationLog.objects.bulk_create(batch)
+                batch = []
+        SimulationLog.objects.bulk_create(batch)
+
+    def handle(self, *args, **options):
+        loaders = _loaders()
+        if not loaders:
+            self.stdout.write("pandas não instalado: tempos de leitura omitidos.")
+        formats = {
+            'csv': ("CSV (streaming)", 'csv', _write_csv),
+            'excel': ("Excel write-only", 'xlsx', DataExporter.write_excel),
+            'legacy': ("Excel anterior", 'xlsx', _legacy_excel),
+            'parquet': ("Parquet", 'parquet', lambda queryset, path: ColumnarExporter.write(queryset, path, 'parquet')),
+            'arrow': ("Arrow IPC", 'arrow', lambda queryset, path: ColumnarExporter.write(queryset, path, 'arrow')),
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            for rows in options['rows']:
+                with transaction.atomic():
+                    self.populate(rows)
+                    queryset = SimulationLog.objects.order_by('-created_at')
+                    for name in options['formats']:
+                        if name == 'legacy' and rows > options['legacy_max']:
+                            continue
+                        label, extension, write = formats[name]
+                        self.measure(
+                            label, rows, lambda path: write(queryset, path),
+                            os.path.join(directory, f"{name}.{extension}"), loaders.get(name),
+                        )
+                    transaction.set_rollback(True)
@@ -0,0 +1,155 @@
+import time
+from decimal import Decimal
+from io import BytesIO
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from companies.models import Company
+from simulation.models import SimulationLog
+from simulation.services.batch import to_centavos, to_decimal
+from simulation.services.pdf_generator import OBSERVATION, PDFGenerator, brl
+from simulation.services.projection import TransitionProjector, TransitionTable
+
+
+def platypus_report(simulation_log):
+    """
+    Gerador anterior (referência): o mesmo relatório montado e paginado pelo platypus
+    a cada chamada.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('TitleStyle', parent=styles['Heading1'], alignment=1, spaceAfter=20)
+    section_style = ParagraphStyle('SectionStyle', parent=styles['Heading2'], spaceBefore=15, spaceAfter=10)
+
+    elements = [
+        Paragraph("Relatório de Impacto da Reforma Tributária", title_style),
+        Paragraph(f"Simulação ID: {simulation_log.id}", styles['Normal']),
+        Paragraph(f"Data: {simulation_log.created_at.strftime('%d/%m/%Y %H:%M')}", styles['Normal']),
+        Spacer(1, 1*cm),
+        Paragraph("Resumo dos Dados de Entrada", section_style),
+    ]
+    empresa_nome = simulation_log.company.name if simulation_log.company else "Não Identificada"
+    t_entrada = Table([
+        ["Empresa:", empresa_nome],
+        ["Regime Tributário Atual:", simulation_log.get_tax_regime_display()],
+        ["Setor de Atuação:", simulation_log.get_sector_display()],
+        ["UF:", simulation_log.state or "Não informada"],
+        ["Faturamento Mensal:", brl(simulation_log.monthly_revenue)],
+        ["Custos Operacionais:", brl(simulation_log.costs)],
+    ], colWidths=[6*cm, 10*cm])
+    t_entrada.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('PADDING', (0, 0), (-1, -1), 6),
+    ]))
+    elements += [t_entrada, Spacer(1, 1*cm), Paragraph("Comparativo de Carga Tributária", section_style)]
+
+    t_comp = Table([
+        ["Cenário", "Carga Mensal (R$)"],
+        ["Atual (Antes da Reforma)", brl(simulation_log.current_tax_load)],
+        ["Proposta (Pós-Reforma)", brl(simulation_log.reform_tax_load)],
+        ["Diferença (Delta)", brl(simulation_log.delta_value)],
+    ], colWidths=[8*cm, 8*cm])
+    delta_color = {'NEGATIVO': colors.red, 'POSITIVO': colors.green}.get(simulation_log.impact_classification, colors.black)
+    t_comp.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('TEXTCOLOR', (1, 3), (1, 3), delta_color),
+        ('FONTNAME', (0, 3), (1, 3), 'Helvetica-Bold'),
+        ('PADDING', (0, 0), (-1, -1), 8),
+    ]))
+    elements += [t_comp, Spacer(1, 1*cm)]
+
+    transition = TransitionTable.current()
+    if len(transition):
+        [loads] = TransitionProjector.project(
+            to_centavos([simulation_log.current_tax_load]), to_centavos([simulation_log.reform_tax_load]), transition
+        ).tolist()
+        elements.append(Paragraph(f"Projeção da Transição ({transition.years[0]}–{transition.years[-1]})", section_style))
+        data_projecao = [["Ano", "Carga Mensal (R$)", "Carga Anual (R$)", "Diferença Mensal (R$)"]]
+        for year, load in zip(transition.years, loads):
+            data_projecao.append([
+                str(year),
+                brl(to_decimal(load)),
+                brl(to_decimal(load * 12)),
+                brl(to_decimal(load) - simulation_log.current_tax_load),
+            ])
+        t_proj = Table(data_projecao, colWidths=[2.5*cm, 4.5*cm, 4.5*cm, 4.5*cm])
+        t_proj.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('PADDING', (0, 0), (-1, -1), 4),
+        ]))
+        elements += [t_proj, Spacer(1, 1*cm)]
+
+    elements += [
+        Paragraph("Análise e Sugestões", section_style),
+        Paragraph(
+            f"Classificação de Impacto: <b>{simulation_log.get_impact_classification_display()}</b>", styles['Normal']
+        ),
+        Spacer(1, 0.5*cm),
+        Paragraph("<b>Observações:</b>", styles['Normal']),
+        Paragraph(OBSERVATION, styles['Normal']),
+    ]
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara relatórios PDF de simulação gerados por segundo de CPU (por núcleo) pelo "
+        "gerador anterior (platypus) e pelo atual (canvas), com um log temporário criado "
+        "em uma transação desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=500, help="Relatórios por medição.")
+        parser.add_argument('--repeat', type=int, default=5, help="Número de medições.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark-pdf')
+            company = Company.objects.create(
+                user=user, name="Empresa de Referência Comércio e Serviços Ltda", cnpj="11.222.333/0001-81",
+                monthly_revenue=Decimal('1250000.00'), sector=Company.Sector.SERVICES, state=Company.UF.SP,
+                tax_regime=Company.TaxRegime.LUCRO_PRESUMIDO
+            )
+            log = SimulationLog.objects.create(
+                user=user, company=company, monthly_revenue=Decimal('1250000.00'), costs=Decimal('480000.00'),
+                tax_regime='LUCRO_PRESUMIDO', sector='SERVICOS', state='SP',
+                current_tax_load=Decimal('141875.00'), reform_tax_load=Decimal('204050.00'),
+                delta_value=Decimal('62175.00'), impact_classification='NEGATIVO'
+            )
+            log = SimulationLog.objects.select_related('company').get(pk=log.pk)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Anos de transição no relatório: {len(TransitionTable.current())}")
+        reports = options['reports']
+        results = {}
+        for label, generate in (('platypus', platypus_report), ('canvas', PDFGenerator.generate_simulation_report)):
+            # Aquecimento: tabela de transição e fontes carregadas fora da medição
+            size = len(generate(log).getvalue())
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.process_time()
+                for _ in range(reports):
+                    generate(log)
+                timings.append(time.process_time() - start)
+            results[label] = min(timings) / reports
+            self.stdout.write(
+                f"{label}: {1 / results[label]:.1f} relatórios/s por núcleo ({results[label] * 1000:.2f} ms de CPU "
+                f"por relatório, {size / 1024:.1f} KiB)"
+            )
+        self.stdout.write(f"Razão platypus / canvas: {results['platypus'] / results['canvas']:.2f}x")
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from simulation.models import ExportJob
+from simulation.services.export_jobs import ExportJobRunner
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa as exportações de histórico pendentes (ExportJob) e remove os arquivos "
+        "expirados. Sem --once, continua verificando a cada --interval segundos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Processa os pendentes e encerra.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Segundos entre verificações.")
+
+    def handle(self, *args, **options):
+        while True:
+            expired, stale, _ = ExportJobRunner.cleanup()
+            if expired or stale:
+                self.stdout.write(f"{expired} exportação(ões) expirada(s), {stale} interrompida(s).")
+
+            for job in ExportJob.objects.filter(status=ExportJob.Status.PENDING).order_by('created_at'):
+                self.stdout.write(f"Executando {job}...")
+                try:
+                    ExportJobRunner.run(job)
+                except Exception as e:
+                    self.stderr.write(f"{job} falhou: {e}")
+                    continue
+                if job.status == ExportJob.Status.DONE:
+                    self.stdout.write(self.style.SUCCESS(f"{job}: {job.rows_done} linhas."))
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
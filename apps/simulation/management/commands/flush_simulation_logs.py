@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from simulation.services.log_writer import SimulationLogWriter
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava no banco os logs de simulação que ficaram no spool write-behind de processos "
+        "encerrados deste host (ex.: após uma queda). Segmentos de processos vivos ou de "
+        "outros hosts não são tocados."
+    )
+
+    def handle(self, *args, **options):
+        written = SimulationLogWriter.recover()
+        self.stdout.write(f"{written} logs recuperados de {SimulationLogWriter.spool_dir()}")
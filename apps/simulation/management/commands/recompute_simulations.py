@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from simulation.models import RecomputeJob
+from simulation.services.recompute import RecomputeRunner
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os logs de simulação afetados por mudanças de regras. Sem argumentos, "
+        "processa os jobs pendentes e retoma os que falharam; um job interrompido em "
+        "EXECUTANDO (processo morto) é retomado com --job."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rule-type', help="Cria um job para o tipo de regra (ex.: REFORMA).")
+        parser.add_argument('--sector', help="Restringe o novo job a um setor.")
+        parser.add_argument('--state', help="Restringe o novo job a uma UF.")
+        parser.add_argument('--all', action='store_true', help="Cria um job que recalcula todos os logs.")
+        parser.add_argument('--job', type=int, help="Executa (ou retoma) um job específico, mesmo se EXECUTANDO.")
+
+    def handle(self, *args, **options):
+        if options['job']:
+            try:
+                jobs = [RecomputeJob.objects.get(pk=options['job'])]
+            except RecomputeJob.DoesNotExist:
+                raise CommandError(f"Job {options['job']} não encontrado.")
+        elif options['all'] or options['rule_type'] or options['sector'] or options['state']:
+            jobs = [RecomputeRunner.enqueue(options['rule_type'], options['sector'], options['state'])]
+        else:
+            jobs = list(
+                RecomputeJob.objects.filter(
+                    status__in=[RecomputeJob.Status.PENDING, RecomputeJob.Status.FAILED]
+                ).order_by('created_at')
+            )
+
+        if not jobs:
+            self.stdout.write("Nenhum job pendente.")
+            return
+
+        for job in jobs:
+            if job.status == RecomputeJob.Status.DONE:
+                self.stdout.write(f"{job} já foi concluído.")
+                continue
+            resumed = f" (retomando após o id {job.last_id})" if job.last_id else ""
+            self.stdout.write(f"Executando {job}{resumed}...")
+            try:
+                RecomputeRunner.run(job, resume=bool(options['job']))
+            except Exception as e:
+                raise CommandError(f"{job} falhou: {e}")
+            if job.status != RecomputeJob.Status.DONE:
+                self.stdout.write(f"{job} está em execução em outro processo.")
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"{job}: {job.processed} logs processados, {job.updated} alterados."
+            ))
@@ -0,0 +1,29 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from .services.generations import CacheGenerations
+
+
+class CacheGenerationMiddleware:
+    """
+    Verifica as gerações de cache (CacheGenerations) no início da requisição, antes da
+    view, no máximo uma vez a cada SIMULATION_GENERATION_CHECK_INTERVAL segundos:
+    alterações confirmadas por outros processos descartam as tabelas em memória deste
+    processo. Suporta WSGI e ASGI sem troca de thread no caminho síncrono.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        CacheGenerations.check()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        await CacheGenerations.acheck()
+        return await self.get_response(request)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0004_simulationlog_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransitionSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('year', models.PositiveSmallIntegerField(unique=True, verbose_name='Ano')),
+                ('current_factor', models.DecimalField(decimal_places=4, max_digits=5, verbose_name='Fator do Regime Atual (Ex: 0.6500)')),
+                ('reform_factor', models.DecimalField(decimal_places=4, max_digits=5, verbose_name='Fator da Reforma (Ex: 0.3500)')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='Descrição')),
+            ],
+            options={
+                'verbose_name': 'Fase de Transição',
+                'verbose_name_plural': 'Cronograma de Transição',
+                'ordering': ['year'],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from decimal import Decimal
+
+# Cronograma simplificado da transição (EC 132/2023 e LC 214/2025), consolidado em
+# dois fatores: parcela da carga atual ainda cobrada e parcela da alíquota IBS/CBS aplicada.
+SCHEDULE = [
+    (2026, '1.0000', '0.0000', "Ano de teste: CBS 0,9% e IBS 0,1% compensáveis com PIS/Cofins."),
+    (2027, '0.6500', '0.3500', "CBS integral; extinção de PIS/Cofins e IPI reduzido a zero."),
+    (2028, '0.6500', '0.3500', "CBS integral; IBS em alíquota de teste."),
+    (2029, '0.5850', '0.4150', "ICMS e ISS reduzidos a 90%; IBS assume 10%."),
+    (2030, '0.5200', '0.4800', "ICMS e ISS reduzidos a 80%; IBS assume 20%."),
+    (2031, '0.4550', '0.5450', "ICMS e ISS reduzidos a 70%; IBS assume 30%."),
+    (2032, '0.3900', '0.6100', "ICMS e ISS reduzidos a 60%; IBS assume 40%."),
+    (2033, '0.0000', '1.0000', "Extinção de ICMS e ISS; IBS/CBS integrais."),
+]
+
+def populate_schedule(apps, schema_editor):
+    TransitionSchedule = apps.get_model('simulation', 'TransitionSchedule')
+    for year, current_factor, reform_factor, description in SCHEDULE:
+        TransitionSchedule.objects.create(
+            year=year,
+            current_factor=Decimal(current_factor),
+            reform_factor=Decimal(reform_factor),
+            description=description
+        )
+
+def rollback_schedule(apps, schema_editor):
+    TransitionSchedule = apps.get_model('simulation', 'TransitionSchedule')
+    TransitionSchedule.objects.all().delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0005_transitionschedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_schedule, rollback_schedule),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0006_populate_transition_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecomputeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('rule_type', models.CharField(blank=True, choices=[('SIMPLES_NACIONAL', 'Simples Nacional'), ('LUCRO_PRESUMIDO', 'Lucro Presumido'), ('REFORMA', 'Pós-Reforma (IBS/CBS)')], max_length=20, null=True, verbose_name='Tipo de Regra')),
+                ('sector', models.CharField(blank=True, choices=[('SERVICOS', 'Serviços'), ('COMERCIO', 'Comércio'), ('INDUSTRIA', 'Indústria')], max_length=20, null=True, verbose_name='Setor')),
+                ('state', models.CharField(blank=True, choices=[('AC', 'Acre'), ('AL', 'Alagoas'), ('AP', 'Amapá'), ('AM', 'Amazonas'), ('BA', 'Bahia'), ('CE', 'Ceará'), ('DF', 'Distrito Federal'), ('ES', 'Espírito Santo'), ('GO', 'Goiás'), ('MA', 'Maranhão'), ('MT', 'Mato Grosso'), ('MS', 'Mato Grosso do Sul'), ('MG', 'Minas Gerais'), ('PA', 'Pará'), ('PB', 'Paraíba'), ('PR', 'Paraná'), ('PE', 'Pernambuco'), ('PI', 'Piauí'), ('RJ', 'Rio de Janeiro'), ('RN', 'Rio Grande do Norte'), ('RS', 'Rio Grande do Sul'), ('RO', 'Rondônia'), ('RR', 'Roraima'), ('SC', 'Santa Catarina'), ('SP', 'São Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins')], max_length=2, null=True, verbose_name='UF')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EXECUTANDO', 'Executando'), ('CONCLUIDO', 'Concluído'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=10, verbose_name='Status')),
+                ('last_id', models.BigIntegerField(default=0, verbose_name='Último ID Processado')),
+                ('max_id', models.BigIntegerField(blank=True, null=True, verbose_name='Maior ID')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Logs Processados')),
+                ('updated', models.PositiveIntegerField(default=0, verbose_name='Logs Alterados')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+            ],
+            options={
+                'verbose_name': 'Recálculo de Simulações',
+                'verbose_name_plural': 'Recálculos de Simulações',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0007_recomputejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('ALIQUOTAS', 'Alíquotas'), ('SUGESTOES', 'Sugestões'), ('TRANSICAO', 'Cronograma de Transição')], max_length=10, unique=True, verbose_name='Escopo')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Geração')),
+            ],
+            options={
+                'verbose_name': 'Geração de Cache',
+                'verbose_name_plural': 'Gerações de Cache',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:12
+
+import uuid
+from django.db import migrations, models
+
+
+def populate_generations(apps, schema_editor):
+    """
+    Cria a geração de cada escopo, com tokens distintos (o default do AddField é
+    avaliado uma única vez para as linhas existentes).
+    """
+    CacheGeneration = apps.get_model('simulation', 'CacheGeneration')
+    for scope in ('ALIQUOTAS', 'SUGESTOES', 'TRANSICAO'):
+        CacheGeneration.objects.update_or_create(scope=scope, defaults={'token': uuid.uuid4()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0008_cachegeneration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachegeneration',
+            name='token',
+            field=models.UUIDField(default=uuid.uuid4, verbose_name='Token'),
+        ),
+        migrations.RunPython(populate_generations, migrations.RunPython.noop),
+    ]
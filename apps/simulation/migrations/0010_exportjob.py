@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulation', '0009_cachegeneration_token'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('export_format', models.CharField(choices=[('CSV', 'CSV'), ('EXCEL', 'Excel (.xlsx)')], default='CSV', max_length=5, verbose_name='Formato')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EXECUTANDO', 'Executando'), ('CONCLUIDO', 'Concluído'), ('FALHOU', 'Falhou'), ('EXPIRADO', 'Expirado')], default='PENDENTE', max_length=10, verbose_name='Status')),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total de Linhas')),
+                ('rows_done', models.PositiveIntegerField(default=0, verbose_name='Linhas Exportadas')),
+                ('file', models.CharField(blank=True, max_length=255, verbose_name='Arquivo')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Expira em')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Exportação de Histórico',
+                'verbose_name_plural': 'Exportações de Histórico',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='simulation__status_4361c0_idx')],
+            },
+        ),
+    ]
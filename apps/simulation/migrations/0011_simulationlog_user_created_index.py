@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0005_company_user'),
+        ('simulation', '0010_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='simulationlog',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='simlog_user_created_idx'),
+        ),
+    ]
@@ -1,8 +1,68 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
 from core.models import TimeStampedModel
 from companies.models import Company
 
+
+class CacheGeneration(models.Model):
+    """
+    Geração dos dados compilados em memória por cada processo (alíquotas, sugestões,
+    cronograma). É incrementada na mesma transação de cada alteração, inclusive em
+    operações em massa (ver GenerationQuerySet), uma vez por transação; cada processo
+    compara os valores com os últimos vistos no início das requisições (no máximo a
+    cada SIMULATION_GENERATION_CHECK_INTERVAL segundos) e descarta as suas tabelas
+    quando mudam (ver CacheGenerations).
+
+    `token` muda a cada incremento e nunca se repete (o contador pode voltar a um valor
+    já usado se a transação for desfeita ou o banco restaurado): é ele que identifica a
+    geração nas chaves de cache compartilhadas entre processos.
+    """
+    class Scope(models.TextChoices):
+        TAX_RULES = 'ALIQUOTAS', 'Alíquotas'
+        SUGGESTIONS = 'SUGESTOES', 'Sugestões'
+        TRANSITION = 'TRANSICAO', 'Cronograma de Transição'
+
+    scope = models.CharField(max_length=10, choices=Scope.choices, unique=True, verbose_name="Escopo")
+    value = models.BigIntegerField(default=0, verbose_name="Geração")
+    token = models.UUIDField(default=uuid.uuid4, verbose_name="Token")
+
+    def __str__(self):
+        return f"{self.get_scope_display()} - geração {self.value}"
+
+    class Meta:
+        app_label = 'simulation'
+        verbose_name = "Geração de Cache"
+        verbose_name_plural = "Gerações de Cache"
+
+
+class GenerationQuerySet(models.QuerySet):
+    """
+    QuerySet dos modelos compilados em memória (atributo `cache_scope`). `update()` e
+    `bulk_create()` não disparam signals, então incrementam a geração aqui; `delete()`
+    já dispara post_delete para cada objeto (um só incremento por transação).
+    """
+
+    def _bump(self):
+        from simulation.services.generations import CacheGenerations
+
+        CacheGenerations.bump(self.model.cache_scope)
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            self._bump()
+        return rows
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            self._bump()
+        return objs
+    bulk_create.alters_data = True
+
+
 class TaxRule(TimeStampedModel):
     class RuleType(models.TextChoices):
         SIMPLES_NACIONAL = 'SIMPLES_NACIONAL', 'Simples Nacional'
@@ -28,6 +88,9 @@ class TaxRule(TimeStampedModel):
     rate = models.DecimalField(max_digits=6, decimal_places=4, verbose_name="Alíquota (Ex: 0.1500)")
     is_active = models.BooleanField(default=True, verbose_name="Ativo")
 
+    cache_scope = CacheGeneration.Scope.TAX_RULES
+    objects = GenerationQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.get_rule_type_display()} - {self.name} ({self.rate * 100}%)"
 
@@ -37,6 +100,37 @@ class TaxRule(TimeStampedModel):
         verbose_name_plural = "Regras Tributárias"
 
 
+class TransitionSchedule(TimeStampedModel):
+    """
+    Cronograma de transição da reforma: para cada ano, a fração da carga do regime
+    atual que ainda é cobrada e a fração da alíquota IBS/CBS já aplicada.
+    """
+    year = models.PositiveSmallIntegerField(unique=True, verbose_name="Ano")
+    current_factor = models.DecimalField(
+        max_digits=5, 
+        decimal_places=4, 
+        verbose_name="Fator do Regime Atual (Ex: 0.6500)"
+    )
+    reform_factor = models.DecimalField(
+        max_digits=5, 
+        decimal_places=4, 
+        verbose_name="Fator da Reforma (Ex: 0.3500)"
+    )
+    description = models.CharField(max_length=255, blank=True, verbose_name="Descrição")
+
+    cache_scope = CacheGeneration.Scope.TRANSITION
+    objects = GenerationQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.year} - Atual {self.current_factor * 100}% / Reforma {self.reform_factor * 100}%"
+
+    class Meta:
+        app_label = 'simulation'
+        verbose_name = "Fase de Transição"
+        verbose_name_plural = "Cronograma de Transição"
+        ordering = ['year']
+
+
 class SuggestionMatrix(TimeStampedModel):
     class ImpactClassification(models.TextChoices):
         POSITIVE = 'POSITIVO', 'Positivo'
@@ -51,6 +145,9 @@ class SuggestionMatrix(TimeStampedModel):
     )
     suggestion_text = models.TextField(verbose_name="Texto da Sugestão")
 
+    cache_scope = CacheGeneration.Scope.SUGGESTIONS
+    objects = GenerationQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.get_sector_display()} - {self.get_impact_display()}"
 
@@ -105,3 +202,120 @@ class SimulationLog(TimeStampedModel):
         verbose_name = "Log de Simulação"
         verbose_name_plural = "Logs de Simulações"
         ordering = ['-created_at']
+        indexes = [
+            # Histórico do usuário e exportações incrementais em ordem de keyset
+            models.Index(fields=['user', 'created_at', 'id'], name='simlog_user_created_idx'),
+        ]
+
+
+class RecomputeJob(TimeStampedModel):
+    """
+    Recálculo dos SimulationLogs afetados por uma mudança de regra (rule_type, setor, UF).
+    O progresso é salvo em `last_id` a cada bloco concluído, para que uma nova execução
+    retome de onde parou. Escopo vazio recalcula todos os logs.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDENTE', 'Pendente'
+        RUNNING = 'EXECUTANDO', 'Executando'
+        DONE = 'CONCLUIDO', 'Concluído'
+        FAILED = 'FALHOU', 'Falhou'
+
+    rule_type = models.CharField(
+        max_length=20, 
+        choices=TaxRule.RuleType.choices, 
+        null=True, 
+        blank=True, 
+        verbose_name="Tipo de Regra"
+    )
+    sector = models.CharField(max_length=20, choices=Company.Sector.choices, null=True, blank=True, verbose_name="Setor")
+    state = models.CharField(max_length=2, choices=Company.UF.choices, null=True, blank=True, verbose_name="UF")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Status")
+
+    # Checkpoint: último id concluído e maior id existente quando o job começou
+    last_id = models.BigIntegerField(default=0, verbose_name="Último ID Processado")
+    max_id = models.BigIntegerField(null=True, blank=True, verbose_name="Maior ID")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Logs Processados")
+    updated = models.PositiveIntegerField(default=0, verbose_name="Logs Alterados")
+    error = models.TextField(blank=True, verbose_name="Erro")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado em")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Concluído em")
+
+    def __str__(self):
+        scope = " / ".join(filter(None, (self.rule_type, self.sector, self.state))) or "Todos"
+        return f"Recálculo {self.id} - {scope} ({self.get_status_display()})"
+
+    def scope(self):
+        """
+        SimulationLogs afetados: regras de regime atingem só o próprio regime; a regra
+        REFORMA atinge todos. Setor e UF restringem quando informados.
+        """
+        queryset = SimulationLog.objects.all()
+        if self.rule_type and self.rule_type != TaxRule.RuleType.REFORMA:
+            queryset = queryset.filter(tax_regime=self.rule_type)
+        if self.sector:
+            queryset = queryset.filter(sector=self.sector)
+        if self.state:
+            queryset = queryset.filter(state=self.state)
+        return queryset
+
+    class Meta:
+        app_label = 'simulation'
+        verbose_name = "Recálculo de Simulações"
+        verbose_name_plural = "Recálculos de Simulações"
+        ordering = ['-created_at']
+
+
+class ExportJob(TimeStampedModel):
+    """
+    Exportação do histórico de simulações de um usuário gerada em segundo plano (ver
+    ExportJobRunner). O arquivo fica em SIMULATION_EXPORT_DIR até `expires_at` e depois
+    é removido pela limpeza, que marca o job como EXPIRADO.
+    """
+    class Format(models.TextChoices):
+        CSV = 'CSV', 'CSV'
+        EXCEL = 'EXCEL', 'Excel (.xlsx)'
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDENTE', 'Pendente'
+        RUNNING = 'EXECUTANDO', 'Executando'
+        DONE = 'CONCLUIDO', 'Concluído'
+        FAILED = 'FALHOU', 'Falhou'
+        EXPIRED = 'EXPIRADO', 'Expirado'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Usuário", related_name="export_jobs")
+    export_format = models.CharField(max_length=5, choices=Format.choices, default=Format.CSV, verbose_name="Formato")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Status")
+
+    # Progresso: linhas gravadas e total (contado quando o job começa)
+    total_rows = models.PositiveIntegerField(null=True, blank=True, verbose_name="Total de Linhas")
+    rows_done = models.PositiveIntegerField(default=0, verbose_name="Linhas Exportadas")
+    file = models.CharField(max_length=255, blank=True, verbose_name="Arquivo")
+    error = models.TextField(blank=True, verbose_name="Erro")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado em")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Concluído em")
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Expira em")
+
+    def __str__(self):
+        return f"Exportação {self.id} - {self.get_export_format_display()} ({self.get_status_display()})"
+
+    def scope(self):
+        """
+        Logs exportados: os do usuário criados até a criação do job, na ordem da
+        exportação síncrona (mais recentes primeiro).
+        """
+        return SimulationLog.objects.filter(user_id=self.user_id, created_at__lte=self.created_at).order_by('-created_at')
+
+    @property
+    def extension(self):
+        return 'xlsx' if self.export_format == self.Format.EXCEL else 'csv'
+
+    @property
+    def download_name(self):
+        return f"historico_simulacoes_{self.created_at:%Y%m%d}.{self.extension}"
+
+    class Meta:
+        app_label = 'simulation'
+        verbose_name = "Exportação de Histórico"
+        verbose_name_plural = "Exportações de Histórico"
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'expires_at'])]
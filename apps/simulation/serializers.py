@@ -1,6 +1,9 @@
+from decimal import Decimal
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
 from companies.models import Company
-from .models import SimulationLog, TaxRule, SuggestionMatrix
+from .models import ExportJob, SimulationLog, TaxRule, SuggestionMatrix, TransitionSchedule
 from drf_spectacular.utils import extend_schema_field
 
 class SimulationInputSerializer(serializers.Serializer):
@@ -79,6 +82,216 @@ class SimulationInputSerializer(serializers.Serializer):
         return data
 
 
+class SimulationBatchInputSerializer(serializers.Serializer):
+    """
+    Envelope da simulação em lote. Cada cenário é validado individualmente
+    pelo `SimulationInputSerializer` na view, para que os erros sejam por item.
+    """
+    scenarios = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        label="Cenários",
+        help_text="Lista de cenários no mesmo formato de /simulate/ (limite em SIMULATION_BATCH_MAX_ITEMS)."
+    )
+
+    def validate_scenarios(self, value):
+        limit = settings.SIMULATION_BATCH_MAX_ITEMS
+        if len(value) > limit:
+            raise serializers.ValidationError(f"O lote pode conter no máximo {limit} cenários.")
+        return value
+
+
+class DecimalRangeSerializer(serializers.Serializer):
+    """
+    Faixa inclusiva de valores monetários [start, stop] com passo `step`.
+    """
+    start = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0, label="Início")
+    stop = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0, label="Fim")
+    step = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0.01'), label="Passo")
+
+    def validate(self, data):
+        if data['stop'] < data['start']:
+            raise serializers.ValidationError({"stop": "O fim da faixa deve ser maior ou igual ao início."})
+        return data
+
+
+class SimulationSweepInputSerializer(serializers.Serializer):
+    """
+    Valida a grade de sensibilidade: um cenário base (regime, setor, UF), faixas de
+    faturamento e custos e listas opcionais que substituem regime, setor e UF.
+    """
+    monthly_revenue = DecimalRangeSerializer(label="Faixa de Faturamento Mensal")
+    costs = DecimalRangeSerializer(label="Faixa de Custos Mensais")
+    tax_regime = serializers.ChoiceField(choices=Company.TaxRegime.choices, label="Regime Tributário")
+    sector = serializers.ChoiceField(choices=Company.Sector.choices, label="Setor de Atuação")
+    state = serializers.ChoiceField(choices=Company.UF.choices, required=False, label="UF")
+    tax_regimes = serializers.ListField(
+        child=serializers.ChoiceField(choices=Company.TaxRegime.choices), required=False, allow_empty=False,
+        help_text="Regimes a comparar (substitui `tax_regime`)."
+    )
+    sectors = serializers.ListField(
+        child=serializers.ChoiceField(choices=Company.Sector.choices), required=False, allow_empty=False,
+        help_text="Setores a comparar (substitui `sector`)."
+    )
+    states = serializers.ListField(
+        child=serializers.ChoiceField(choices=Company.UF.choices), required=False, allow_empty=False,
+        help_text="UFs a comparar (substitui `state`)."
+    )
+
+    def validate_monthly_revenue(self, value):
+        if value['start'] <= 0:
+            raise serializers.ValidationError("O faturamento deve ser um valor positivo.")
+        return value
+
+    def validate(self, data):
+        data['tax_regimes'] = list(dict.fromkeys(data.get('tax_regimes') or [data['tax_regime']]))
+        data['sectors'] = list(dict.fromkeys(data.get('sectors') or [data['sector']]))
+        data['states'] = list(dict.fromkeys(data.get('states') or [data.get('state')]))
+
+        cells = len(data['tax_regimes']) * len(data['sectors']) * len(data['states'])
+        for field in ('monthly_revenue', 'costs'):
+            axis = data[field]
+            cells *= int((axis['stop'] - axis['start']) // axis['step']) + 1
+
+        limit = settings.SIMULATION_SWEEP_MAX_CELLS
+        if cells > limit:
+            raise serializers.ValidationError(
+                f"A grade solicitada tem {cells} células; o máximo permitido é {limit}."
+            )
+        data['cells'] = cells
+        return data
+
+
+class BreakEvenInputSerializer(serializers.Serializer):
+    """
+    Valida o cálculo do ponto de equilíbrio para um ou vários faturamentos.
+    """
+    monthly_revenue = serializers.DecimalField(
+        max_digits=15, decimal_places=2, required=False, min_value=Decimal('0.01'),
+        label="Faturamento Mensal"
+    )
+    monthly_revenues = serializers.ListField(
+        child=serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0.01')),
+        required=False, allow_empty=False,
+        label="Faturamentos Mensais",
+        help_text="Lista de faturamentos calculados em uma única chamada."
+    )
+    tax_regime = serializers.ChoiceField(choices=Company.TaxRegime.choices, label="Regime Tributário")
+    sector = serializers.ChoiceField(choices=Company.Sector.choices, label="Setor de Atuação")
+    state = serializers.ChoiceField(choices=Company.UF.choices, required=False, label="UF")
+
+    def validate(self, data):
+        revenues = list(data.get('monthly_revenues') or [])
+        if data.get('monthly_revenue') is not None:
+            revenues.insert(0, data['monthly_revenue'])
+        if not revenues:
+            raise serializers.ValidationError({
+                "monthly_revenue": "Informe `monthly_revenue` ou `monthly_revenues`."
+            })
+        limit = settings.SIMULATION_BATCH_MAX_ITEMS
+        if len(revenues) > limit:
+            raise serializers.ValidationError({
+                "monthly_revenues": f"Informe no máximo {limit} faturamentos."
+            })
+        data['revenues'] = revenues
+        return data
+
+
+class ProjectionInputSerializer(serializers.Serializer):
+    """
+    Valida a projeção da transição para um ou mais cenários.
+    """
+    scenarios = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        label="Cenários",
+        help_text="Lista de cenários no mesmo formato de /simulate/."
+    )
+
+    def validate_scenarios(self, value):
+        limit = settings.SIMULATION_BATCH_MAX_ITEMS
+        if len(value) > limit:
+            raise serializers.ValidationError(f"Informe no máximo {limit} cenários.")
+        scenarios = SimulationInputSerializer(data=value, many=True)
+        scenarios.is_valid(raise_exception=True)
+        return scenarios.validated_data
+
+
+class DistributionSerializer(serializers.Serializer):
+    """
+    Distribuição de probabilidade de uma variável incerta da simulação de Monte Carlo.
+    """
+    REQUIRED_PARAMS = {
+        'fixed': ('value',),
+        'uniform': ('min', 'max'),
+        'triangular': ('min', 'mode', 'max'),
+        'normal': ('mean', 'std'),
+    }
+
+    distribution = serializers.ChoiceField(
+        choices=[('fixed', 'Fixo'), ('uniform', 'Uniforme'), ('triangular', 'Triangular'), ('normal', 'Normal')],
+        label="Distribuição"
+    )
+    value = serializers.DecimalField(max_digits=15, decimal_places=4, min_value=0, required=False, label="Valor")
+    min = serializers.DecimalField(max_digits=15, decimal_places=4, min_value=0, required=False, label="Mínimo")
+    mode = serializers.DecimalField(max_digits=15, decimal_places=4, min_value=0, required=False, label="Moda")
+    max = serializers.DecimalField(max_digits=15, decimal_places=4, min_value=0, required=False, label="Máximo")
+    mean = serializers.DecimalField(max_digits=15, decimal_places=4, min_value=0, required=False, label="Média")
+    std = serializers.DecimalField(max_digits=15, decimal_places=4, min_value=0, required=False, label="Desvio Padrão")
+
+    def validate(self, data):
+        missing = [param for param in self.REQUIRED_PARAMS[data['distribution']] if data.get(param) is None]
+        if missing:
+            raise serializers.ValidationError({param: "Obrigatório para esta distribuição." for param in missing})
+        if data['distribution'] in ('uniform', 'triangular'):
+            if data['min'] > data.get('mode', data['min']) or data.get('mode', data['max']) > data['max']:
+                raise serializers.ValidationError("É preciso que min <= mode <= max.")
+        return data
+
+
+class MonteCarloInputSerializer(serializers.Serializer):
+    """
+    Valida a simulação de Monte Carlo: um cenário base e distribuições opcionais
+    para a alíquota da reforma, o faturamento e os custos.
+    """
+    monthly_revenue = serializers.DecimalField(
+        max_digits=15, decimal_places=2, min_value=Decimal('0.01'), label="Faturamento Mensal"
+    )
+    costs = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0, label="Custos Mensais")
+    tax_regime = serializers.ChoiceField(choices=Company.TaxRegime.choices, label="Regime Tributário")
+    sector = serializers.ChoiceField(choices=Company.Sector.choices, label="Setor de Atuação")
+    state = serializers.ChoiceField(choices=Company.UF.choices, required=False, label="UF")
+    draws = serializers.IntegerField(
+        min_value=1, default=10_000, label="Sorteios",
+        help_text="Número de sorteios (limite em SIMULATION_MONTE_CARLO_MAX_DRAWS)."
+    )
+    seed = serializers.IntegerField(
+        min_value=0, required=False, label="Semente",
+        help_text="Semente para reproduzir um resultado; gerada e devolvida quando omitida."
+    )
+    reform_rate_distribution = DistributionSerializer(
+        required=False, label="Distribuição da Alíquota da Reforma",
+        help_text="Alíquota decimal (ex.: 0.2650). Omitida, usa a regra REFORMA vigente."
+    )
+    revenue_distribution = DistributionSerializer(
+        required=False, label="Distribuição do Faturamento", help_text="Valores em reais."
+    )
+    costs_distribution = DistributionSerializer(
+        required=False, label="Distribuição dos Custos", help_text="Valores em reais."
+    )
+
+    def validate_draws(self, value):
+        limit = settings.SIMULATION_MONTE_CARLO_MAX_DRAWS
+        if value > limit:
+            raise serializers.ValidationError(f"Informe no máximo {limit} sorteios.")
+        return value
+
+    def validate_reform_rate_distribution(self, value):
+        if any(value.get(param, 0) > 1 for param in ('value', 'min', 'mode', 'max', 'mean')):
+            raise serializers.ValidationError("A alíquota deve estar entre 0 e 1.")
+        return value
+
+
 class SimulationLogListSerializer(serializers.ModelSerializer):
     """
     Serializer para listagem amigável do histórico de simulações.
@@ -119,6 +332,15 @@ class TaxRuleSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class TransitionScheduleSerializer(serializers.ModelSerializer):
+    """
+    Serializer para gestão administrativa do cronograma de transição.
+    """
+    class Meta:
+        model = TransitionSchedule
+        fields = '__all__'
+
+
 class SuggestionMatrixSerializer(serializers.ModelSerializer):
     """
     Serializer para gestão administrativa da matriz de sugestões.
@@ -126,3 +348,49 @@ class SuggestionMatrixSerializer(serializers.ModelSerializer):
     class Meta:
         model = SuggestionMatrix
         fields = '__all__'
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer das exportações em segundo plano: criação (só o formato) e
+    acompanhamento do progresso.
+    """
+    progresso = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id',
+            'export_format',
+            'status',
+            'total_rows',
+            'rows_done',
+            'progresso',
+            'download_url',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+            'expires_at'
+        ]
+        read_only_fields = [field for field in fields if field != 'export_format']
+
+    @extend_schema_field(serializers.FloatField(allow_null=True))
+    def get_progresso(self, obj):
+        """
+        Percentual de linhas exportadas (None até o total ser contado).
+        """
+        if obj.total_rows is None:
+            return None
+        if obj.total_rows == 0:
+            return 100.0
+        return round(100 * obj.rows_done / obj.total_rows, 1)
+
+    @extend_schema_field(serializers.URLField(allow_null=True))
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.Status.DONE:
+            return None
+        url = reverse('export-jobs-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
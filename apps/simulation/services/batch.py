@@ -0,0 +1,276 @@
+from decimal import Decimal
+from functools import lru_cache
+import numpy as np
+from .rate_table import RateTable
+
+# Alíquotas têm 4 casas decimais (TaxRule.rate: decimal_places=4)
+RATE_SCALE = 10_000
+
+# Limite para que as divisões longas em int64 não estourem (10 * LIMIT < 2**63)
+_INT64_SAFE_LIMIT = 900_000_000_000_000_000
+
+# Índice = sinal da diferença + 1
+IMPACT_LABELS = np.array(['POSITIVO', 'NEUTRO', 'NEGATIVO'])
+
+
+def to_centavos(values):
+    """
+    Converte uma sequência de Decimal (ou str/int) em reais para um array int64 de centavos.
+    """
+    centavos = []
+    for value in values:
+        scaled = Decimal(value).scaleb(2)
+        if scaled != scaled.to_integral_value():
+            raise ValueError(f"Valor com mais de duas casas decimais: {value}")
+        centavos.append(int(scaled))
+    return np.array(centavos, dtype=np.int64)
+
+
+def to_decimal(centavos, places=2):
+    """
+    Converte um inteiro de centavos (ou centésimos de ponto percentual) em Decimal.
+    """
+    return Decimal(int(centavos)).scaleb(-places)
+
+
+def percentage_exact(delta, base):
+    """
+    Percentual `delta / base * 100` em centésimos (ROUND_HALF_EVEN) com inteiros Python,
+    de precisão arbitrária. Versão escalar de `_percentage`, usada nos valores extremos
+    do lote e nos totais agregados. Retorna 0 se `base <= 0`.
+    """
+    if base <= 0:
+        return 0
+    acc, rest = divmod(abs(delta) * 10_000, base)
+    twice = rest * 2
+    if twice > base or (twice == base and acc % 2 == 1):
+        acc += 1
+    return -acc if delta < 0 else acc
+
+
+def scale_rate(rate):
+    """
+    Converte uma alíquota Decimal em inteiro na escala RATE_SCALE (ex.: 0.2650 -> 2650).
+    """
+    value = Decimal(rate).scaleb(4)
+    if value != value.to_integral_value():
+        raise ValueError(f"Alíquota com mais de quatro casas decimais: {rate}")
+    return int(value)
+
+
+def _mul_rate(amount, rate):
+    """
+    Produto exato de centavos por alíquota, sem overflow.
+    Retorna (parte inteira em centavos, resto em 1/RATE_SCALE de centavo).
+    """
+    q, r = np.divmod(amount, RATE_SCALE)
+    low = r * rate
+    return q * rate + low // RATE_SCALE, low % RATE_SCALE
+
+
+def _round_half_even(high, frac, scale):
+    """
+    Arredonda `high + frac/scale` (0 <= frac < scale) para inteiro com ROUND_HALF_EVEN,
+    o mesmo modo usado por `Decimal.quantize`.
+    """
+    half = scale // 2
+    up = (frac > half) | ((frac == half) & (high % 2 == 1))
+    return high + up
+
+
+def _difference(reform_high, reform_low, current_high, current_low):
+    """
+    Diferença exata reforma - atual, normalizada para (centavos, resto) com 0 <= resto < RATE_SCALE.
+    """
+    delta_high = reform_high - current_high
+    delta_low = reform_low - current_low
+    borrow = delta_low < 0
+    return delta_high - borrow, delta_low + borrow * RATE_SCALE
+
+
+def _impact_sign(delta_high, delta_low):
+    """
+    Sinal (-1, 0, 1) da diferença exata, usado como índice em IMPACT_LABELS.
+    """
+    return np.where(
+        delta_high > 0, 1, np.where(delta_high < 0, -1, (delta_low > 0).astype(np.int64))
+    ).astype(np.int8)
+
+
+def _percentage(delta, base):
+    """
+    Calcula round_half_even(10_000 * delta / base) em int64, isto é, o percentual
+    `delta / base * 100` em centésimos. Exige |delta|, base <= _INT64_SAFE_LIMIT.
+    """
+    divisor = np.where(base > 0, base, 1)
+    acc, rest = np.divmod(np.abs(delta), divisor)
+    for _ in range(4):
+        digit, rest = np.divmod(rest * 10, divisor)
+        acc = acc * 10 + digit
+    twice = rest * 2
+    acc = acc + ((twice > divisor) | ((twice == divisor) & (acc % 2 == 1)))
+    acc = np.where(delta < 0, -acc, acc)
+    return np.where(base > 0, acc, 0)
+
+
+class BatchResult:
+    """
+    Resultado vetorizado de uma simulação em lote. Valores monetários em centavos (int64)
+    e percentual em centésimos de ponto percentual, já arredondados como no caminho escalar.
+    """
+
+    __slots__ = ('current_tax', 'reform_tax', 'delta_value', 'delta_percentage', 'impact_sign')
+
+    def __init__(self, current_tax, reform_tax, delta_value, delta_percentage, impact_sign):
+        self.current_tax = current_tax
+        self.reform_tax = reform_tax
+        self.delta_value = delta_value
+        self.delta_percentage = delta_percentage
+        self.impact_sign = impact_sign
+
+    def __len__(self):
+        return len(self.current_tax)
+
+    @property
+    def impact_classification(self):
+        return IMPACT_LABELS[self.impact_sign + 1]
+
+    def row(self, index):
+        """
+        Retorna uma linha do resultado com os valores convertidos para Decimal.
+        """
+        return {
+            'current_tax_load': to_decimal(self.current_tax[index]),
+            'reform_tax_load': to_decimal(self.reform_tax[index]),
+            'delta_value': to_decimal(self.delta_value[index]),
+            'delta_percentage': to_decimal(self.delta_percentage[index]),
+            'impact_classification': str(IMPACT_LABELS[self.impact_sign[index] + 1]),
+        }
+
+
+class BatchSimulator:
+    """
+    Motor de simulação em lote: calcula carga atual, carga pós-reforma, diferença,
+    percentual e classificação de impacto para milhões de cenários de uma vez,
+    com aritmética inteira de centavos (int64) e as alíquotas da RateTable.
+
+    O arredondamento reproduz exatamente `TaxCalculator` + `ImpactAnalyzer.analyze`
+    seguidos de `quantize(Decimal('0.01'))`.
+    """
+
+    REGIMES = ('SIMPLES_NACIONAL', 'LUCRO_PRESUMIDO')
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def rate_arrays(table):
+        """
+        Expande a RateTable em arrays densos de alíquotas inteiras (x RATE_SCALE):
+        atual[regime, setor, uf] e reforma[setor, uf]. O índice 0 de setor/UF é "não informado".
+        """
+        from companies.models import Company
+
+        sectors = [None, *Company.Sector.values]
+        states = [None, *Company.UF.values]
+
+        current = np.array([
+            [[scale_rate(table.get(regime, sector, state)) for state in states] for sector in sectors]
+            for regime in BatchSimulator.REGIMES
+        ], dtype=np.int64)
+        reform = np.array([
+            [scale_rate(table.get('REFORMA', sector, state)) for state in states] for sector in sectors
+        ], dtype=np.int64)
+        return current, reform
+
+    @staticmethod
+    def encode(values, choices, field, allow_unknown=True):
+        """
+        Converte um array de códigos textuais no índice correspondente em `choices`.
+        Valores ausentes (None/'') viram 0; valores desconhecidos também, exceto
+        quando `allow_unknown` é falso.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind in 'iu':
+            return values.astype(np.intp, copy=False)
+        if values.dtype == object:
+            values = np.where(np.equal(values, None), '', values).astype(str)
+
+        # Busca binária sobre os choices ordenados (evita ordenar o array de entrada)
+        known = sorted((choice, index) for index, choice in enumerate(choices) if choice)
+        keys = np.array([choice for choice, _ in known])
+        positions = np.searchsorted(keys, values).clip(max=len(keys) - 1)
+        found = keys[positions] == values
+        if not allow_unknown and not found.all():
+            raise ValueError(f"Valor inválido para {field}: {values[~found][0]!r}")
+        indexes = np.array([index for _, index in known], dtype=np.intp)
+        return np.where(found, indexes[positions], 0)
+
+    @classmethod
+    def run(cls, revenue, costs, regime, sector, state, table=None):
+        """
+        Executa a simulação em lote.
+
+        `revenue` e `costs` são arrays de centavos (int64); `regime`, `sector` e `state`
+        são arrays de códigos (ex.: 'SIMPLES_NACIONAL', 'SERVICOS', 'SP') ou índices já
+        codificados. Setores/UFs ausentes ou desconhecidos usam a alíquota genérica.
+        """
+        from companies.models import Company
+
+        revenue = np.asarray(revenue, dtype=np.int64)
+        costs = np.asarray(costs, dtype=np.int64)
+        if revenue.shape != costs.shape:
+            raise ValueError("Faturamento e custos devem ter o mesmo tamanho.")
+        if (revenue < 0).any() or (costs < 0).any():
+            raise ValueError("Faturamento e custos não podem ser negativos.")
+
+        regime_idx = cls.encode(regime, cls.REGIMES, 'tax_regime', allow_unknown=False)
+        sector_idx = cls.encode(sector, (None, *Company.Sector.values), 'sector')
+        state_idx = cls.encode(state, (None, *Company.UF.values), 'state')
+
+        current_rates, reform_rates = cls.rate_arrays(table or RateTable.current())
+        current_rate = current_rates[regime_idx, sector_idx, state_idx]
+        reform_rate = reform_rates[sector_idx, state_idx]
+
+        value_added = np.maximum(revenue - costs, 0)
+
+        # Produtos exatos: centavos inteiros + fração de 1/RATE_SCALE de centavo
+        current_high, current_low = _mul_rate(revenue, current_rate)
+        reform_high, reform_low = _mul_rate(value_added, reform_rate)
+
+        delta_high, delta_low = _difference(reform_high, reform_low, current_high, current_low)
+
+        current_tax = _round_half_even(current_high, current_low, RATE_SCALE)
+        reform_tax = _round_half_even(reform_high, reform_low, RATE_SCALE)
+        delta_value = _round_half_even(delta_high, delta_low, RATE_SCALE)
+        impact_sign = _impact_sign(delta_high, delta_low)
+
+        # Percentual sobre os valores exatos (em 1/RATE_SCALE de centavo)
+        safe = (
+            (revenue <= _INT64_SAFE_LIMIT // np.maximum(current_rate, 1))
+            & (value_added <= _INT64_SAFE_LIMIT // np.maximum(reform_rate, 1))
+        )
+        delta_exact = np.where(safe, delta_high * RATE_SCALE + delta_low, 0)
+        current_exact = np.where(safe, current_high * RATE_SCALE + current_low, 0)
+        delta_percentage = _percentage(delta_exact, current_exact)
+
+        for index in np.flatnonzero(~safe):
+            delta_percentage[index] = percentage_exact(
+                int(delta_high[index]) * RATE_SCALE + int(delta_low[index]),
+                int(current_high[index]) * RATE_SCALE + int(current_low[index]),
+            )
+
+        return BatchResult(current_tax, reform_tax, delta_value, delta_percentage, impact_sign)
+
+    @classmethod
+    def run_records(cls, records, table=None):
+        """
+        Executa a simulação em lote a partir de dicionários já validados
+        (mesmo formato de `SimulationInputSerializer.validated_data`).
+        """
+        return cls.run(
+            to_centavos([record['monthly_revenue'] for record in records]),
+            to_centavos([record['costs'] for record in records]),
+            np.array([record['tax_regime'] for record in records], dtype=object),
+            np.array([record['sector'] for record in records], dtype=object),
+            np.array([record.get('state') for record in records], dtype=object),
+            table,
+        )
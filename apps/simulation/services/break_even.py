@@ -0,0 +1,96 @@
+from .batch import scale_rate, to_centavos, to_decimal
+from .rate_table import RateTable
+
+
+def _div_half_even(numerator, denominator):
+    """
+    Divisão inteira com arredondamento ROUND_HALF_EVEN (denominador positivo).
+    """
+    quotient, rest = divmod(numerator, denominator)
+    twice = rest * 2
+    if twice > denominator or (twice == denominator and quotient % 2 == 1):
+        quotient += 1
+    return quotient
+
+
+def _interval(start, end):
+    if start > end:
+        return None
+    return {'de': to_decimal(start), 'ate': to_decimal(end)}
+
+
+class BreakEvenSolver:
+    """
+    Resolve em forma fechada o nível de custos em que a reforma se torna neutra.
+
+    As duas cargas são lineares:
+        atual   = faturamento x alíquota_regime
+        reforma = max(0, faturamento - custos) x alíquota_reforma
+    logo a diferença zera em custos* = faturamento x (1 - alíquota_regime / alíquota_reforma).
+    Abaixo desse ponto o impacto é NEGATIVO e acima é POSITIVO, exatamente como
+    classificado pelo ImpactAnalyzer. Toda a conta é feita com inteiros (centavos).
+
+    Se a alíquota do regime supera a de reforma, custos* seria negativo: não há ponto
+    de equilíbrio entre 0 e o faturamento (a reforma é sempre POSITIVA) e os campos
+    de equilíbrio ficam nulos.
+    """
+
+    @classmethod
+    def rates(cls, tax_regime, sector=None, state=None, table=None):
+        table = table or RateTable.current()
+        return table.get(tax_regime, sector, state), table.get('REFORMA', sector, state)
+
+    @classmethod
+    def solve(cls, revenues, tax_regime, sector=None, state=None, table=None):
+        """
+        Retorna, para cada faturamento, o custo de equilíbrio e as faixas de custos
+        (entre 0 e o faturamento) de cada classificação de impacto.
+        """
+        current_rate, reform_rate = cls.rates(tax_regime, sector, state, table)
+        rc = scale_rate(current_rate)
+        rr = scale_rate(reform_rate)
+
+        if rr > 0:
+            margin = _div_half_even(rc * 10_000, rr)
+        else:
+            margin = None
+
+        results = []
+        for revenue in to_centavos(revenues).tolist():
+            results.append(cls._solve_one(revenue, rc, rr, margin))
+        return results
+
+    @staticmethod
+    def _solve_one(revenue, rc, rr, margin):
+        result = {
+            'faturamento': to_decimal(revenue),
+            'custo_equilibrio': None,
+            'custo_equilibrio_percentual': None,
+            'margem_equilibrio_percentual': None,
+        }
+
+        if rr == 0 or rc > rr:
+            # Sem alíquota de reforma o custo não altera o resultado; com a alíquota do
+            # regime maior, a reforma reduz a carga para qualquer custo
+            label = 'POSITIVO' if rc > 0 else 'NEUTRO'
+            result['faixas'] = {key: None for key in ('NEGATIVO', 'NEUTRO', 'POSITIVO')}
+            result['faixas'][label] = _interval(0, revenue)
+            return result
+
+        # custos* em centavos = faturamento x (rr - rc) / rr  (racional exato)
+        numerator = revenue * (rr - rc)
+        exact = numerator % rr == 0
+        max_negative = -(-numerator // rr) - 1
+        min_positive = numerator // rr + 1
+
+        result['custo_equilibrio'] = to_decimal(_div_half_even(numerator, rr))
+        result['custo_equilibrio_percentual'] = to_decimal(10_000 - margin)
+        result['margem_equilibrio_percentual'] = to_decimal(margin)
+
+        neutral = numerator // rr if exact else None
+        result['faixas'] = {
+            'NEGATIVO': _interval(0, min(max_negative, revenue)),
+            'NEUTRO': _interval(neutral, neutral) if neutral is not None and 0 <= neutral <= revenue else None,
+            'POSITIVO': _interval(max(min_positive, 0), revenue),
+        }
+        return result
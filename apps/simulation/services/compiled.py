@@ -0,0 +1,217 @@
+import logging
+import threading
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from core.caching import SingleFlight, TieredCache, refresh_early
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledTable:
+    """
+    Base para estruturas imutáveis compiladas a partir do banco e mantidas em memória
+    no processo (ex.: RateTable). Cada subclasse guarda a sua instância em uso, que é
+    trocada atomicamente: `invalidate()` descarta a instância e a próxima chamada de
+    `current()` compila outra. Uma compilação iniciada antes de uma invalidação nunca
+    é publicada.
+
+    Subclasses implementam `rows()` (consulta das linhas de origem, serializáveis) e
+    `__init__(rows)`, ou `build()` diretamente, e, opcionalmente, `empty()` (usada
+    quando a compilação falha sem versão anterior) e `ttl()`: uma instância com TTL é
+    recompilada depois desse prazo mesmo sem invalidação (ex.: tabelas que caíram em
+    valores de fallback).
+
+    Com `generation_scope` (escopo de CacheGeneration), as linhas de origem passam pelo
+    cache em dois níveis (ver `source()`): um worker que recompila após uma alteração
+    ou na partida reaproveita as linhas já lidas por outro, sem consultar o banco.
+
+    Proteção contra stampede:
+
+    - single-flight: chamadas concorrentes esperam a única compilação em andamento;
+    - recálculo antecipado (XFetch): instâncias com TTL podem ser recompiladas por um
+      único chamador pouco antes do prazo (SIMULATION_CACHE_EARLY_REFRESH_BETA);
+    - stale-while-revalidate: instância vencida continua servida enquanto outro
+      chamador recompila; após uma invalidação, se a compilação falhar ou demorar
+      mais que SIMULATION_CACHE_WAIT_TIMEOUT, serve-se a última instância publicada
+      (nova tentativa após SIMULATION_CACHE_RETRY_INTERVAL) em vez de `empty()`.
+    """
+
+    __slots__ = ('_expires_at', '_delta')
+
+    _flight = SingleFlight()
+    _sources = None
+
+    generation_scope = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._current = None
+        cls._last_good = None
+        cls._retry_at = 0.0
+        cls._version = 0
+        cls._version_lock = threading.Lock()
+
+    @classmethod
+    def rows(cls):
+        """
+        Linhas de origem lidas do banco, como tupla serializável.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def build(cls):
+        return cls(cls.source())
+
+    @staticmethod
+    def source_cache():
+        """
+        Cache em dois níveis (LRU local + cache compartilhado) das linhas de origem.
+        """
+        if CompiledTable._sources is None:
+            CompiledTable._sources = TieredCache(
+                'compiled_tables',
+                alias=settings.SIMULATION_LOOKUP_CACHE_ALIAS,
+                max_size=settings.SIMULATION_LOOKUP_CACHE_LOCAL_SIZE,
+                local_ttl=settings.SIMULATION_LOOKUP_CACHE_LOCAL_TTL or None,
+                shared_ttl=settings.SIMULATION_LOOKUP_CACHE_SHARED_TTL or None,
+            )
+        return CompiledTable._sources
+
+    @classmethod
+    def source(cls):
+        """
+        Linhas de origem da tabela. A chave no cache é a classe mais o token da geração
+        do escopo vista pelo processo, então uma alteração nunca reaproveita linhas
+        antigas; com a geração desconhecida (ver CacheGenerations.token), lê do banco.
+        """
+        key = cls._source_key()
+        if key is None:
+            return cls.rows()
+        return cls.source_cache().get_or_set(key, cls.rows)
+
+    @classmethod
+    def _source_key(cls):
+        from .generations import CacheGenerations
+
+        token = CacheGenerations.token(cls.generation_scope) if cls.generation_scope else None
+        return None if token is None else f"{cls.__name__}:{token}"
+
+    @classmethod
+    def empty(cls):
+        return cls()
+
+    def ttl(self):
+        """
+        Segundos até a instância ser recompilada, ou None para mantê-la até a próxima invalidação.
+        """
+        return None
+
+    def _fresh(self):
+        """
+        False depois do TTL ou quando sorteada para recálculo antecipado (XFetch).
+        """
+        expires_at = getattr(self, '_expires_at', None)
+        return expires_at is None or not refresh_early(
+            expires_at, self._delta, settings.SIMULATION_CACHE_EARLY_REFRESH_BETA
+        )
+
+    @classmethod
+    def current(cls):
+        """
+        Retorna a instância em uso no processo, compilando-a na primeira chamada
+        ou após uma invalidação.
+        """
+        table = cls._current
+        if table is not None:
+            if table._fresh():
+                return table
+            return cls._revalidate(table)
+        return cls._compile_or_last_good()
+
+    @classmethod
+    def _revalidate(cls, table):
+        """
+        Instância vencida (ou sorteada para recálculo antecipado): só um chamador
+        recompila; os demais, e todos se a compilação falhar, recebem a instância atual.
+        """
+        if cls._flight.busy(cls) or time.monotonic() < cls._retry_at:
+            return table
+        try:
+            return cls._flight.do(cls, cls._recompile)
+        except Exception:
+            return table
+
+    @classmethod
+    def _recompile(cls):
+        """
+        Recompilação por prazo: o TTL existe para ver linhas gravadas sem alterar a
+        geração, então as linhas de origem em cache para a geração atual são descartadas.
+        """
+        key = cls._source_key()
+        if key is not None:
+            cls.source_cache().delete(key)
+        return cls._compile()
+
+    @classmethod
+    def _compile_or_last_good(cls):
+        last_good = cls._last_good
+        if last_good is None:
+            try:
+                return cls._flight.do(cls, cls._compile)
+            except Exception:
+                # Não instala a instância: a próxima chamada tenta novamente
+                return cls.empty()
+
+        if time.monotonic() < cls._retry_at:
+            return last_good
+        try:
+            return cls._flight.do(cls, cls._compile, timeout=settings.SIMULATION_CACHE_WAIT_TIMEOUT)
+        except TimeoutError:
+            logger.warning(f"Compilação de {cls.__name__} em andamento há mais de {settings.SIMULATION_CACHE_WAIT_TIMEOUT}s: servindo a versão anterior.")
+            return last_good
+        except Exception:
+            return last_good
+
+    @classmethod
+    def _compile(cls):
+        version = cls._version
+        started = time.monotonic()
+        try:
+            table = cls.build()
+        except Exception as e:
+            logger.error(f"Erro ao compilar {cls.__name__}: {e}")
+            cls._retry_at = time.monotonic() + settings.SIMULATION_CACHE_RETRY_INTERVAL
+            raise
+
+        now = time.monotonic()
+        ttl = table.ttl()
+        table._delta = now - started
+        table._expires_at = now + ttl if ttl else None
+
+        # Só publica se nenhuma invalidação ocorreu durante a compilação
+        with cls._version_lock:
+            if cls._version == version:
+                cls._current = cls._last_good = table
+        return table
+
+    @classmethod
+    async def acurrent(cls):
+        """
+        Versão assíncrona de `current()`: com a instância já compilada não há troca de
+        thread; só a compilação (que consulta o banco) roda via sync_to_async.
+        """
+        table = cls._current
+        if table is not None and table._fresh():
+            return table
+        return await sync_to_async(cls.current)()
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Descarta a instância em uso; a próxima consulta recompila a partir do banco.
+        """
+        with cls._version_lock:
+            cls._version += 1
+            cls._current = None
+            cls._retry_at = 0.0
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import uuid
+from contextlib import suppress
+from django.conf import settings
+from django.db.models import Count, Max
+
+
+class ExportCache:
+    """
+    Cache em disco dos arquivos gerados pela exportação do histórico, para que repetir
+    uma exportação sem mudanças nos dados não gere o arquivo de novo.
+
+    A chave (`key`) combina usuário, formato, filtros da requisição e a versão dos
+    dados do usuário: maior `updated_at` e contagem dos seus logs (e da empresa
+    vinculada, cujo nome vai no arquivo). Criar, recalcular ou excluir um log muda a
+    versão e, portanto, a chave; o arquivo antigo deixa de ser usado e sai pelo LRU.
+    A chave também serve de ETag forte da resposta.
+
+    Os arquivos ficam em SIMULATION_EXPORT_CACHE_DIR, são gravados como .part e
+    renomeados ao final (um arquivo com o nome da chave está sempre completo) e têm o
+    mtime atualizado a cada uso. Acima de SIMULATION_EXPORT_CACHE_MAX_BYTES, os usados
+    há mais tempo são removidos; 0 desativa o cache em disco.
+    """
+
+    # Incrementar quando o conteúdo gerado mudar (colunas, formatação), invalidando tudo
+    VERSION = 1
+
+    @staticmethod
+    def enabled():
+        return settings.SIMULATION_EXPORT_CACHE_MAX_BYTES > 0
+
+    @staticmethod
+    def directory():
+        os.makedirs(settings.SIMULATION_EXPORT_CACHE_DIR, exist_ok=True)
+        return settings.SIMULATION_EXPORT_CACHE_DIR
+
+    @staticmethod
+    def path(key):
+        return os.path.join(settings.SIMULATION_EXPORT_CACHE_DIR, key)
+
+    @classmethod
+    def key(cls, user, export_format, params):
+        """
+        Chave do arquivo para `params` (query params, exceto `format`, já resolvido em
+        `export_format`), calculada com uma única consulta agregada sobre os logs do
+        usuário (índice (user, created_at, id)).
+        """
+        from simulation.models import SimulationLog
+
+        version = SimulationLog.objects.filter(user=user).aggregate(
+            updated=Max('updated_at'), rows=Count('id'),
+            company_updated=Max('company__updated_at'), companies=Count('company'),
+        )
+        filters = sorted((name, value) for name in params if name != 'format' for value in params.getlist(name))
+        payload = [
+            cls.VERSION, user.pk, export_format, filters,
+            [str(version[name]) for name in ('updated', 'rows', 'company_updated', 'companies')],
+        ]
+        return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+    @classmethod
+    def get(cls, key):
+        """
+        Abre o arquivo em cache (binário) e o marca como usado, ou retorna None.
+        """
+        if not cls.enabled():
+            return None
+        path = cls.path(key)
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        with suppress(FileNotFoundError):
+            os.utime(path)
+        return file
+
+    @classmethod
+    def exists(cls, key):
+        return cls.enabled() and os.path.exists(cls.path(key))
+
+    @classmethod
+    def store(cls, key, chunks):
+        """
+        Repassa os pedaços de `chunks` (str em UTF-8 ou bytes) e os grava no cache;
+        o arquivo só entra no cache se a geração chegar ao fim. Se o cliente desconectar
+        ou ocorrer um erro, o arquivo parcial é removido.
+        """
+        path = cls.path(key)
+        partial = os.path.join(cls.directory(), f"{key}.{uuid.uuid4().hex}.part")
+        try:
+            with open(partial, 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+                    yield chunk
+            os.replace(partial, path)
+        finally:
+            with suppress(FileNotFoundError):
+                os.remove(partial)
+        cls.evict()
+
+    @classmethod
+    def store_file(cls, key, write):
+        """
+        Gera o arquivo com `write(caminho)` direto no cache e o retorna aberto.
+        """
+        path = cls.path(key)
+        partial = os.path.join(cls.directory(), f"{key}.{uuid.uuid4().hex}.part")
+        try:
+            write(partial)
+            os.replace(partial, path)
+        finally:
+            with suppress(FileNotFoundError):
+                os.remove(partial)
+        file = open(path, 'rb')
+        cls.evict()
+        return file
+
+    @classmethod
+    def evict(cls):
+        """
+        Remove os arquivos usados há mais tempo até o total caber em
+        SIMULATION_EXPORT_CACHE_MAX_BYTES. Retorna quantos foram removidos.
+        """
+        entries = []
+        with os.scandir(cls.directory()) as scan:
+            for entry in scan:
+                if entry.name.endswith('.part'):
+                    continue
+                with suppress(FileNotFoundError):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= settings.SIMULATION_EXPORT_CACHE_MAX_BYTES:
+                break
+            with suppress(FileNotFoundError):
+                os.remove(path)
+                removed += 1
+            total -= size
+        return removed
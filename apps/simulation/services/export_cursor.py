@@ -0,0 +1,70 @@
+from datetime import datetime
+from django.core import signing
+from django.db.models import Q
+
+
+class ExportCursor:
+    """
+    Cursor opaco das exportações incrementais: a posição (created_at, id) do último
+    log entregue, assinada com a SECRET_KEY para que o cliente não consiga montar ou
+    alterar um cursor (ValueError ao decodificar um inválido).
+
+    A exportação a partir de um cursor percorre os logs em ordem de keyset
+    (created_at, id), ambas crescentes e desempatadas pelo id, com o índice
+    (user, created_at, id) de SimulationLog.
+    """
+
+    SALT = 'simulation.export-cursor'
+    ORDERING = ('created_at', 'id')
+
+    @classmethod
+    def encode(cls, created_at, pk):
+        return signing.dumps([created_at.isoformat(), pk], salt=cls.SALT, compress=True)
+
+    @classmethod
+    def decode(cls, token):
+        try:
+            created_at, pk = signing.loads(token, salt=cls.SALT)
+            return datetime.fromisoformat(created_at), int(pk)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise ValueError("Cursor inválido.")
+
+    @staticmethod
+    def after(position):
+        """
+        Condição dos logs posteriores à posição (created_at, id).
+        """
+        created_at, pk = position
+        return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+    @staticmethod
+    def until(position):
+        """
+        Condição dos logs até a posição (created_at, id), inclusive.
+        """
+        created_at, pk = position
+        return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lte=pk)
+
+    @classmethod
+    def page(cls, queryset, position=None, size=None):
+        """
+        Recorta uma página em ordem de keyset: os logs após `position` (todos, se None)
+        até o `size`-ésimo. Retorna (queryset da página, posição do último log ou
+        None se vazia, há mais logs depois da página).
+
+        A página é delimitada pelas duas pontas (após `position`, até a última posição)
+        em vez de um LIMIT, então o cursor seguinte é conhecido antes da leitura e pode
+        ir nos cabeçalhos de uma resposta transmitida em blocos.
+        """
+        queryset = queryset.order_by(*cls.ORDERING)
+        if position is not None:
+            queryset = queryset.filter(cls.after(position))
+
+        edge = list(queryset.values_list(*cls.ORDERING)[size - 1:size + 1]) if size else []
+        if edge:
+            last, has_more = edge[0], len(edge) > 1
+        else:
+            last, has_more = queryset.reverse().values_list(*cls.ORDERING).first(), False
+        if last is None:
+            return queryset.none(), None, False
+        return queryset.filter(cls.until(last)), last, has_more
@@ -0,0 +1,179 @@
+import logging
+import os
+import uuid
+from contextlib import suppress
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .exporter import DataExporter
+from .process_pool import ExportPool
+
+logger = logging.getLogger(__name__)
+
+
+def _run_export(job_id):
+    """
+    Executa o ExportJob em um processo do pool. Erros ficam registrados no job e no
+    log; a exceção não volta para o processo web.
+    """
+    from simulation.models import ExportJob
+
+    try:
+        ExportJobRunner.run(ExportJob.objects.get(pk=job_id))
+    except Exception:
+        logger.exception(f"Falha ao executar a exportação {job_id}")
+
+
+class ExportJobRunner:
+    """
+    Exportações do histórico em segundo plano, sem broker externo. O job é gravado no
+    banco e executado pelo pool de exportações do servidor (ExportPool, separado do pool
+    do Monte Carlo; SIMULATION_EXPORT_JOBS_MODE = 'pool', padrão) ou pelo comando
+    `export_worker` ('worker'). Quem executa primeiro
+    reserva o job com um UPDATE condicional (PENDENTE -> EXECUTANDO), então um worker
+    pode rodar junto com o pool sem exportar o mesmo job duas vezes.
+
+    O progresso (`rows_done`) é gravado a cada bloco de SIMULATION_EXPORT_CHUNK_SIZE
+    linhas. O arquivo é escrito com a extensão .part e renomeado ao final, então um
+    arquivo com o nome do job está sempre completo. Ele expira SIMULATION_EXPORT_TTL
+    segundos após a conclusão e é removido por `cleanup()`.
+    """
+
+    @staticmethod
+    def directory():
+        os.makedirs(settings.SIMULATION_EXPORT_DIR, exist_ok=True)
+        return settings.SIMULATION_EXPORT_DIR
+
+    @staticmethod
+    def path(job):
+        return os.path.join(settings.SIMULATION_EXPORT_DIR, job.file)
+
+    @classmethod
+    def enqueue(cls, user, export_format):
+        """
+        Cria o job pendente e, no modo 'pool', o envia ao pool após o commit. Também
+        remove os arquivos expirados, para que a limpeza não dependa de um worker.
+        """
+        from simulation.models import ExportJob
+
+        cls.cleanup()
+        job = ExportJob.objects.create(user=user, export_format=export_format)
+        if settings.SIMULATION_EXPORT_JOBS_MODE == 'pool':
+            transaction.on_commit(lambda: ExportPool.map(_run_export, [(job.pk,)]))
+        return job
+
+    @staticmethod
+    def claim(job):
+        """
+        Reserva o job pendente para esta execução. Retorna False se outro processo já
+        o reservou.
+        """
+        from simulation.models import ExportJob
+
+        now = timezone.now()
+        claimed = ExportJob.objects.filter(pk=job.pk, status=ExportJob.Status.PENDING).update(
+            status=ExportJob.Status.RUNNING, started_at=now, updated_at=now
+        )
+        if claimed:
+            job.status, job.started_at = ExportJob.Status.RUNNING, now
+        return bool(claimed)
+
+    @classmethod
+    def run(cls, job):
+        """
+        Executa o job até o fim, se ainda estiver pendente. Em caso de erro o job fica
+        FALHOU, o arquivo parcial é removido e a exceção é propagada.
+        """
+        from simulation.models import ExportJob
+
+        if not cls.claim(job):
+            return job
+
+        queryset = job.scope()
+        job.total_rows = queryset.count()
+        job.file = f"{job.pk}-{uuid.uuid4().hex}.{job.extension}"
+        job.save(update_fields=['total_rows', 'file', 'updated_at'])
+
+        path = os.path.join(cls.directory(), job.file)
+        partial = f"{path}.part"
+        try:
+            cls.write(job, queryset, partial)
+            os.replace(partial, path)
+        except Exception as e:
+            logger.error(f"Erro na exportação {job.pk}: {e}")
+            with suppress(FileNotFoundError):
+                os.remove(partial)
+            job.status = ExportJob.Status.FAILED
+            job.error = str(e)
+            job.file = ''
+            job.save(update_fields=['status', 'error', 'file', 'updated_at'])
+            raise
+
+        job.status = ExportJob.Status.DONE
+        job.finished_at = timezone.now()
+        job.expires_at = job.finished_at + timedelta(seconds=settings.SIMULATION_EXPORT_TTL)
+        job.save(update_fields=['status', 'rows_done', 'finished_at', 'expires_at', 'updated_at'])
+        return job
+
+    @staticmethod
+    def write(job, queryset, path):
+        from simulation.models import ExportJob
+
+        def progress(rows):
+            job.rows_done = rows
+            ExportJob.objects.filter(pk=job.pk).update(rows_done=rows, updated_at=timezone.now())
+
+        if job.export_format == ExportJob.Format.EXCEL:
+            DataExporter.write_excel(queryset, path, progress=progress)
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            for chunk in DataExporter.iter_csv(queryset, progress=progress):
+                output.write(chunk)
+
+    @classmethod
+    def cleanup(cls):
+        """
+        Remove os arquivos dos jobs concluídos que expiraram (o job fica EXPIRADO) e
+        marca como FALHOU os jobs em execução sem progresso há mais de
+        SIMULATION_EXPORT_STALE_AFTER segundos (processo interrompido).
+
+        No modo 'pool', os jobs pendentes há mais desse tempo (perdidos quando o pool foi
+        encerrado, ex.: reinício do servidor) são enviados de novo ao pool; o UPDATE
+        condicional renova `updated_at`, então cada um é reenviado no máximo uma vez por
+        período, e a reserva em `claim` impede que rode duas vezes. No modo 'worker' o
+        comando export_worker já executa todos os pendentes.
+        Retorna (expirados, interrompidos, reenviados).
+        """
+        from simulation.models import ExportJob
+
+        now = timezone.now()
+        expired = ExportJob.objects.filter(status=ExportJob.Status.DONE, expires_at__lte=now)
+        stale_before = now - timedelta(seconds=settings.SIMULATION_EXPORT_STALE_AFTER)
+        stale = ExportJob.objects.filter(status=ExportJob.Status.RUNNING, updated_at__lt=stale_before)
+        counts = []
+        for queryset, changes, suffix in (
+            (expired, {'status': ExportJob.Status.EXPIRED}, ''),
+            (stale, {'status': ExportJob.Status.FAILED, 'error': "Execução interrompida."}, '.part'),
+        ):
+            count = 0
+            for job in list(queryset):
+                # Condicional: o job pode ter mudado desde a consulta
+                if not queryset.filter(pk=job.pk).update(file='', updated_at=now, **changes):
+                    continue
+                count += 1
+                if job.file:
+                    with suppress(FileNotFoundError):
+                        os.remove(cls.path(job) + suffix)
+            counts.append(count)
+
+        lost = []
+        if settings.SIMULATION_EXPORT_JOBS_MODE == 'pool':
+            pending = ExportJob.objects.filter(status=ExportJob.Status.PENDING, updated_at__lt=stale_before)
+            for pk in list(pending.values_list('pk', flat=True)):
+                if pending.filter(pk=pk).update(updated_at=now):
+                    lost.append(pk)
+            if lost:
+                logger.warning(f"Reenviando {len(lost)} exportação(ões) pendente(s) ao pool: {lost}")
+                ExportPool.map(_run_export, [(pk,) for pk in lost])
+        return (*counts, len(lost))
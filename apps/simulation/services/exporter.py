@@ -1,7 +1,12 @@
 import csv
-from io import BytesIO, StringIO
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
 from openpyxl import Workbook
-from django.utils import timezone
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+from django.conf import settings
+from django.db.models import Max, Min
+from django.db.models.functions import Length
 
 class DataExporter:
     """
@@ -15,74 +20,149 @@ class DataExporter:
         "Carga Reforma (R$)", "Diferença (Delta R$)", "Classificação de Impacto"
     ]
 
+    AMOUNT_FIELDS = ('monthly_revenue', 'costs', 'current_tax_load', 'reform_tax_load', 'delta_value')
+
+    class _Echo:
+        """
+        Pseudo-arquivo para o csv.writer: `writerow` retorna a linha formatada.
+        """
+        def write(self, value):
+            return value
+
     @staticmethod
-    def _prepare_rows(queryset):
+    def _row(log):
+        return [
+            log.id,
+            log.created_at.strftime('%d/%m/%Y %H:%M'),
+            log.company.name if log.company else "Não Identificada",
+            log.get_sector_display(),
+            log.get_tax_regime_display(),
+            log.state or "N/A",
+            float(log.monthly_revenue),
+            float(log.costs),
+            float(log.current_tax_load),
+            float(log.reform_tax_load),
+            float(log.delta_value),
+            log.get_impact_classification_display()
+        ]
+
+    @staticmethod
+    def _iter_logs(queryset, chunk_size=None, progress=None):
         """
-        Converte o queryset em uma lista de listas para os exportadores.
+        Itera os logs sem materializar o queryset: empresa carregada no mesmo SELECT
+        (select_related) e leitura em blocos de `chunk_size` registros. Se informado,
+        `progress(linhas)` recebe o total de linhas já geradas a cada bloco e ao final.
         """
-        rows = []
-        for log in queryset:
-            rows.append([
-                log.id,
-                log.created_at.strftime('%d/%m/%Y %H:%M'),
-                log.company.name if log.company else "Não Identificada",
-                log.get_sector_display(),
-                log.get_tax_regime_display(),
-                log.state or "N/A",
-                float(log.monthly_revenue),
-                float(log.costs),
-                float(log.current_tax_load),
-                float(log.reform_tax_load),
-                float(log.delta_value),
-                log.get_impact_classification_display()
-            ])
-        return rows
+        chunk_size = chunk_size or settings.SIMULATION_EXPORT_CHUNK_SIZE
+        done = 0
+        for log in queryset.select_related('company').iterator(chunk_size=chunk_size):
+            yield log
+            done += 1
+            if progress is not None and done % chunk_size == 0:
+                progress(done)
+        if progress is not None:
+            progress(done)
+
+    @classmethod
+    def _prepare_rows(cls, queryset, chunk_size=None, progress=None):
+        for log in cls._iter_logs(queryset, chunk_size, progress):
+            yield cls._row(log)
+
+    @classmethod
+    def iter_csv(cls, queryset, chunk_size=None, progress=None):
+        """
+        Gera o CSV (UTF-8 com BOM, para compatibilidade com Excel Windows; separador `;`)
+        em pedaços para StreamingHttpResponse: BOM e cabeçalho antes de consultar o
+        banco, depois um pedaço por bloco de `chunk_size` registros. A memória usada
+        não depende do número de registros.
+        """
+        chunk_size = chunk_size or settings.SIMULATION_EXPORT_CHUNK_SIZE
+        writer = csv.writer(cls._Echo(), delimiter=';', quoting=csv.QUOTE_MINIMAL)
+        yield '\ufeff' + writer.writerow(cls.HEADERS)
+
+        lines = []
+        for row in cls._prepare_rows(queryset, chunk_size, progress):
+            lines.append(writer.writerow(row))
+            if len(lines) >= chunk_size:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
 
     @classmethod
     def export_to_csv(cls, queryset):
         """
-        Gera um buffer CSV com UTF-8 com BOM (para compatibilidade com Excel Windows).
+        Gera um buffer CSV completo (mesmo conteúdo de `iter_csv`), para usos fora de
+        respostas HTTP.
         """
-        buffer = StringIO()
-        # Adicionar BOM para Excel reconhecer UTF-8
-        buffer.write('\ufeff')
-        
-        writer = csv.writer(buffer, delimiter=';', quoting=csv.QUOTE_MINIMAL)
-        writer.writerow(cls.HEADERS)
-        writer.writerows(cls._prepare_rows(queryset))
-        
-        return BytesIO(buffer.getvalue().encode('utf-8'))
+        return BytesIO(''.join(cls.iter_csv(queryset)).encode('utf-8'))
 
     @classmethod
-    def export_to_excel(cls, queryset):
+    def _column_widths(cls, queryset):
         """
-        Gera um buffer Excel (.xlsx) usando openpyxl.
+        Largura de cada coluna (maior texto + 2). Em planilhas write-only as larguras
+        precisam ser definidas antes da primeira linha, então vêm de uma única consulta
+        agregada (maior id, maior nome de empresa, extremos dos valores) e dos rótulos
+        dos choices, em vez de uma segunda passada pelas células.
         """
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Histórico de Simulações"
+        model = queryset.model
+        aggregates = {'id': Max('id'), 'company': Max(Length('company__name'))}
+        for field in cls.AMOUNT_FIELDS:
+            aggregates[f'{field}__min'] = Min(field)
+            aggregates[f'{field}__max'] = Max(field)
+        stats = queryset.order_by().aggregate(**aggregates)
 
-        # Adicionar Cabeçalhos
-        ws.append(cls.HEADERS)
+        def labels(field):
+            return max(len(str(label)) for _, label in model._meta.get_field(field).choices)
+
+        def amount(field):
+            values = (stats[f'{field}__min'], stats[f'{field}__max'])
+            return max((len(str(float(value))) for value in values if value is not None), default=0)
+
+        widths = [
+            len(str(stats['id'] or '')),
+            len('00/00/0000 00:00'),
+            max(stats['company'] or 0, len("Não Identificada")),
+            labels('sector'),
+            labels('tax_regime'),
+            len("N/A"),
+            *(amount(field) for field in cls.AMOUNT_FIELDS),
+            labels('impact_classification'),
+        ]
+        return [max(len(header), width) + 2 for header, width in zip(cls.HEADERS, widths)]
+
+    @classmethod
+    def write_excel(cls, queryset, target, chunk_size=None, progress=None):
+        """
+        Grava o Excel (.xlsx) em `target` (caminho ou arquivo binário) com uma planilha
+        write-only do openpyxl, que grava cada linha em arquivo temporário ao ser
+        adicionada, a partir do queryset lido em blocos. A memória usada não depende do
+        número de registros.
 
-        # Adicionar Dados
-        for row in cls._prepare_rows(queryset):
+        A data é gravada como data do Excel (formato dd/mm/aaaa hh:mm), não como texto:
+        textos distintos iriam para a tabela de strings compartilhadas, mantida em memória.
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Histórico de Simulações")
+        for index, width in enumerate(cls._column_widths(queryset), start=1):
+            ws.column_dimensions[get_column_letter(index)].width = width
+
+        ws.append(cls.HEADERS)
+        for log in cls._iter_logs(queryset, chunk_size, progress):
+            row = cls._row(log)
+            row[1] = WriteOnlyCell(ws, value=log.created_at.replace(tzinfo=None))
+            row[1].number_format = 'DD/MM/YYYY HH:MM'
             ws.append(row)
+        wb.save(target)
 
-        # Ajuste básico de largura de colunas
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column].width = adjusted_width
-
-        buffer = BytesIO()
-        wb.save(buffer)
+    @classmethod
+    def export_to_excel(cls, queryset, chunk_size=None):
+        """
+        Gera o Excel em um SpooledTemporaryFile: em memória até
+        SIMULATION_EXPORT_SPOOL_MAX_SIZE bytes, em disco acima disso. Quem recebe o
+        arquivo deve fechá-lo (FileResponse fecha).
+        """
+        buffer = SpooledTemporaryFile(max_size=settings.SIMULATION_EXPORT_SPOOL_MAX_SIZE)
+        cls.write_excel(queryset, buffer, chunk_size)
         buffer.seek(0)
         return buffer
@@ -0,0 +1,53 @@
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class FallbackCounter:
+    """
+    Contador (por processo) de consultas resolvidas por valores de fallback:
+    alíquotas de FALLBACK_RATES (nenhuma TaxRule ativa para a chave) e a sugestão
+    padrão (nenhuma linha na SuggestionMatrix para setor x impacto). Expõe regras
+    mal configuradas em produção; a primeira ocorrência de cada chave também é
+    registrada em log.
+
+    Só o caminho de fallback paga o custo do lock.
+    """
+
+    RATE = 'aliquota'
+    SUGGESTION = 'sugestao'
+
+    _counts = Counter()
+    _lock = threading.Lock()
+
+    @classmethod
+    def hit(cls, kind, key):
+        key = (kind, cls.label(key))
+        with cls._lock:
+            first = key not in cls._counts
+            cls._counts[key] += 1
+        if first:
+            logger.warning(f"Fallback de {kind} usado para {key[1]}: verifique as regras cadastradas.")
+
+    @staticmethod
+    def label(key):
+        return "|".join(part or '*' for part in key)
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            items = cls._counts.most_common()
+        return {
+            'total': sum(count for _, count in items),
+            'por_chave': [
+                {'tipo': kind, 'chave': label, 'ocorrencias': count}
+                for (kind, label), count in items
+            ],
+        }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._counts.clear()
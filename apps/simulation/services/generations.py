@@ -0,0 +1,167 @@
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .projection import TransitionTable
+from .rate_table import RateTable
+from .result_cache import SimulationResultCache
+from .suggestion_index import SuggestionIndex
+
+
+class _Bumped:
+    """
+    Callback de on_commit que marca o escopo como já incrementado na transação corrente.
+    A marca sai junto com a transação (ou o savepoint) em que o UPDATE foi feito: se ela
+    for desfeita, o próximo `bump` incrementa de novo. Após o commit, descarta mais uma
+    vez as estruturas do processo, que podem ter sido compiladas antes dele.
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+
+    def __call__(self):
+        CacheGenerations.invalidate(self.scope)
+
+    @classmethod
+    def pending(cls, scope):
+        connection = transaction.get_connection()
+        return connection.in_atomic_block and any(
+            isinstance(func, cls) and func.scope == scope for _, func, _ in connection.run_on_commit
+        )
+
+
+class CacheGenerations:
+    """
+    Coerência entre processos (workers do gunicorn/uvicorn) dos dados mantidos em
+    memória: RateTable, SuggestionIndex, TransitionTable e SimulationResultCache.
+
+    Cada alteração incrementa a geração do escopo no banco (CacheGeneration), na mesma
+    transação da mudança: `save()`/`delete()` via signals e `update()`/`bulk_create()`
+    via GenerationQuerySet. Cada processo guarda o token da última geração vista de cada
+    escopo e, no início de cada requisição (CacheGenerationMiddleware), lê todos em uma
+    única consulta: escopos que mudaram têm as suas estruturas descartadas e recompiladas
+    na próxima consulta. O token também versiona as linhas de origem das tabelas no
+    cache compartilhado (ver CompiledTable.source).
+
+    SIMULATION_GENERATION_CHECK_INTERVAL (s, padrão 1) limita a frequência da leitura:
+    alterações confirmadas por outros processos são vistas em até esse tempo, sem uma
+    consulta por requisição. Com 0, toda requisição lê as gerações.
+
+    Cada escopo é incrementado no máximo uma vez por transação: um `delete()` em massa
+    dispara post_delete por objeto, mas só o primeiro faz o UPDATE (ver `_Bumped`).
+    """
+
+    _seen = {}
+    _checked_at = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def dependents(scope):
+        """
+        Estruturas em memória compiladas a partir do escopo. Resultados de simulação
+        dependem de alíquotas e sugestões.
+        """
+        from simulation.models import CacheGeneration
+
+        return {
+            CacheGeneration.Scope.TAX_RULES: (RateTable, SimulationResultCache),
+            CacheGeneration.Scope.SUGGESTIONS: (SuggestionIndex, SimulationResultCache),
+            CacheGeneration.Scope.TRANSITION: (TransitionTable,),
+        }[scope]
+
+    @classmethod
+    def invalidate(cls, scope):
+        for dependent in cls.dependents(scope):
+            dependent.invalidate()
+
+    @classmethod
+    def bump(cls, scope):
+        """
+        Incrementa a geração do escopo (na transação corrente, uma vez por transação) e
+        descarta as estruturas do próprio processo. A geração vista é esquecida até a
+        próxima verificação: a nova ainda pode ser desfeita, então nada é compartilhado
+        com esse token.
+        """
+        from simulation.models import CacheGeneration
+
+        with cls._lock:
+            cls._seen.pop(scope, None)
+        cls.invalidate(scope)
+        if _Bumped.pending(scope):
+            return
+
+        with transaction.atomic():
+            if not CacheGeneration.objects.filter(scope=scope).update(value=F('value') + 1, token=uuid.uuid4()):
+                _, created = CacheGeneration.objects.get_or_create(scope=scope, defaults={'value': 1})
+                if not created:
+                    CacheGeneration.objects.filter(scope=scope).update(value=F('value') + 1, token=uuid.uuid4())
+        transaction.on_commit(_Bumped(scope))
+
+    @classmethod
+    def token(cls, scope):
+        """
+        Token da geração do escopo vista na última verificação, ou None se desconhecida
+        (antes da primeira verificação ou após uma alteração neste processo).
+        """
+        return cls._seen.get(scope)
+
+    @classmethod
+    def _due(cls):
+        interval = settings.SIMULATION_GENERATION_CHECK_INTERVAL
+        now = time.monotonic()
+        if interval and cls._checked_at is not None and now - cls._checked_at < interval:
+            return False
+        cls._checked_at = now
+        return True
+
+    @classmethod
+    def apply(cls, generations):
+        """
+        Registra as gerações lidas do banco e descarta as estruturas dos escopos que
+        mudaram desde a última leitura (todos, na primeira). Retorna esses escopos.
+        """
+        from simulation.models import CacheGeneration
+
+        with cls._lock:
+            changed = [
+                scope for scope in CacheGeneration.Scope.values
+                if scope not in cls._seen or cls._seen[scope] != generations.get(scope)
+            ]
+            cls._seen = {scope: generations.get(scope) for scope in CacheGeneration.Scope.values}
+
+        for scope in changed:
+            cls.invalidate(scope)
+        return changed
+
+    @classmethod
+    def check(cls):
+        """
+        Compara as gerações do banco com as últimas vistas (no máximo uma consulta).
+        """
+        from simulation.models import CacheGeneration
+
+        if not cls._due():
+            return []
+        return cls.apply(dict(CacheGeneration.objects.values_list('scope', 'token')))
+
+    @classmethod
+    async def acheck(cls):
+        """
+        Versão assíncrona de `check()`, usada pelo middleware sob ASGI.
+        """
+        from simulation.models import CacheGeneration
+
+        if not cls._due():
+            return []
+        return cls.apply({scope: token async for scope, token in CacheGeneration.objects.values_list('scope', 'token')})
+
+    @classmethod
+    def reset(cls):
+        """
+        Esquece as gerações vistas: a próxima verificação descarta todas as estruturas.
+        """
+        with cls._lock:
+            cls._seen = {}
+            cls._checked_at = None
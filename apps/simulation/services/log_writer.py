@@ -0,0 +1,315 @@
+import atexit
+import itertools
+import json
+import logging
+import os
+import re
+import socket
+import threading
+from decimal import Decimal
+from pathlib import Path
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DECIMAL_FIELDS = ('monthly_revenue', 'costs', 'current_tax_load', 'reform_tax_load', 'delta_value')
+
+
+# Segmento de spool: {host}-{pid}-{início do processo}-{sequência}.jsonl
+SEGMENT_NAME = re.compile(r'^(?P<host>.+)-(?P<pid>\d+)-(?P<started>\d+)-(?P<sequence>[^-]+)\.jsonl$')
+# Versões anteriores: {pid}-{sequência}.jsonl, ou {pid}-recover-{nome} quando recuperado
+LEGACY_SEGMENT_NAME = re.compile(r'^(?P<pid>\d+)-')
+
+
+def _process_started(pid):
+    """
+    Instante de início do processo (em ticks desde o boot, campo 22 de /proc/<pid>/stat),
+    que distingue um processo de outro que reutilizou o mesmo PID. 0 se indisponível
+    (processo inexistente ou sistema sem /proc).
+    """
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as stat:
+            fields = stat.read().rsplit(b')', 1)[1].split()
+        return int(fields[19])
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _process_alive(pid, started=0):
+    """
+    Se o processo `pid` (iniciado em `started`, quando conhecido) ainda existe neste host.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return not started or _process_started(pid) in (0, started)
+
+
+class SimulationLogWriter:
+    """
+    Gravação dos SimulationLogs de /simulate/. Por padrão grava na hora (`create`).
+    Com SIMULATION_LOG_WRITE_BEHIND ativo, o log é anexado a um spool local (um
+    arquivo JSON Lines por processo) e enfileirado em memória; uma thread em segundo
+    plano grava a fila com `bulk_create` ao atingir SIMULATION_LOG_FLUSH_SIZE logs ou
+    a cada SIMULATION_LOG_FLUSH_INTERVAL segundos, e na saída do processo.
+
+    A cada gravação o spool ativo vira um segmento, apagado só depois do commit. Segmentos
+    de processos que morreram sem gravar são regravados por `recover()` (na partida da
+    thread ou pelo comando flush_simulation_logs). A entrega é "pelo menos uma vez": uma
+    queda entre o commit e a remoção do segmento regrava aquele bloco.
+
+    O nome do segmento traz o host, o PID e o início do processo. `recover()` só toca
+    segmentos do próprio host, e um PID reutilizado por outro processo não mantém o
+    segmento preso. Um diretório compartilhado entre hosts é possível desde que cada host
+    tenha um hostname distinto; os segmentos de um host que não volta mais precisam ser
+    recuperados pelo flush_simulation_logs em um host com o mesmo nome.
+
+    O `created_at` dos logs gravados pela fila, e também dos recuperados, é o momento da
+    gravação (até SIMULATION_LOG_FLUSH_INTERVAL segundos depois da requisição, ou mais
+    na recuperação). Assim um log nunca aparece antes da posição de um cursor de
+    exportação (`since`, ordem por created_at) já entregue ao cliente.
+    """
+
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _wakeup = threading.Event()
+    _stop = threading.Event()
+    _pid = None
+    _thread = None
+    _spool = None
+    _spool_path = None
+    _sequence = 0
+    _recovered = itertools.count(1)
+    _pending = []
+    # Segmentos fechados ainda não gravados: [(caminho, linhas)]; os que falham voltam para cá
+    _segments = []
+
+    @classmethod
+    def enabled(cls):
+        return settings.SIMULATION_LOG_WRITE_BEHIND
+
+    @classmethod
+    def save(cls, **fields):
+        """
+        Grava o log na hora ou, com write-behind ativo, o enfileira.
+        """
+        if not cls.enabled():
+            from simulation.models import SimulationLog
+
+            return SimulationLog.objects.create(**fields)
+        cls.enqueue(fields)
+
+    @classmethod
+    async def asave(cls, **fields):
+        if not cls.enabled():
+            from simulation.models import SimulationLog
+
+            return await SimulationLog.objects.acreate(**fields)
+        cls.enqueue(fields)
+
+    @staticmethod
+    def encode(fields):
+        row = {
+            'user_id': fields['user'].pk if 'user' in fields else fields['user_id'],
+            'company_id': fields.get('company_id'),
+            'tax_regime': fields['tax_regime'],
+            'sector': fields['sector'],
+            'state': fields.get('state'),
+            'impact_classification': fields['impact_classification'],
+        }
+        for field in DECIMAL_FIELDS:
+            row[field] = str(fields[field])
+        return row
+
+    @staticmethod
+    def decode(row):
+        from simulation.models import SimulationLog
+
+        row = dict(row)
+        # Spools de versões anteriores trazem a data da requisição, que não é usada
+        row.pop('created_at', None)
+        for field in DECIMAL_FIELDS:
+            row[field] = Decimal(row[field])
+        return SimulationLog(**row)
+
+    @classmethod
+    def enqueue(cls, fields):
+        line = json.dumps(cls.encode(fields)) + "\n"
+        with cls._lock:
+            cls._ensure_started()
+            cls._spool.write(line)
+            cls._spool.flush()
+            if settings.SIMULATION_LOG_SPOOL_FSYNC:
+                os.fsync(cls._spool.fileno())
+            cls._pending.append(line)
+            if len(cls._pending) >= settings.SIMULATION_LOG_FLUSH_SIZE:
+                cls._wakeup.set()
+
+    @classmethod
+    def spool_dir(cls):
+        path = Path(settings.SIMULATION_LOG_SPOOL_DIR)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @staticmethod
+    def segment_prefix():
+        """
+        Identificação do processo atual nos nomes dos segmentos: host, PID e início.
+        """
+        pid = os.getpid()
+        return f"{socket.gethostname()}-{pid}-{_process_started(pid)}"
+
+    @classmethod
+    def _open_spool(cls):
+        cls._sequence += 1
+        cls._spool_path = cls.spool_dir() / f"{cls.segment_prefix()}-{cls._sequence}.jsonl"
+        cls._spool = open(cls._spool_path, 'a', encoding='utf-8')
+
+    @classmethod
+    def _ensure_started(cls):
+        """
+        Abre o spool e inicia a thread de gravação na primeira chamada do processo
+        (também depois de um fork). Chamado com `_lock` adquirido.
+        """
+        if cls._pid == os.getpid():
+            return
+        cls._pid = os.getpid()
+        cls._pending = []
+        cls._segments = []
+        cls._stop.clear()
+        cls._wakeup.clear()
+        cls._open_spool()
+        cls._thread = threading.Thread(target=cls._run, name="simulation-log-writer", daemon=True)
+        cls._thread.start()
+        # Sob ASGI a gravação final é feita no evento lifespan.shutdown (ver config/asgi.py):
+        # o uvicorn encerra seus workers relançando o SIGTERM, sem rodar o atexit
+        atexit.register(cls.shutdown)
+
+    @classmethod
+    def _run(cls):
+        try:
+            try:
+                cls.recover()
+            except Exception as e:
+                logger.error(f"Erro ao recuperar o spool de logs: {e}")
+            while not cls._stop.is_set():
+                cls._wakeup.wait(settings.SIMULATION_LOG_FLUSH_INTERVAL)
+                cls._wakeup.clear()
+                if cls._stop.is_set():
+                    break
+                try:
+                    cls.flush()
+                except Exception as e:
+                    logger.error(f"Erro ao gravar logs de simulação: {e}")
+                close_old_connections()
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def flush(cls):
+        """
+        Grava a fila atual (e segmentos que falharam antes) com bulk_create.
+        Retorna o número de logs gravados.
+        """
+        with cls._flush_lock:
+            with cls._lock:
+                if cls._pending:
+                    segment = cls._spool_path
+                    cls._spool.close()
+                    cls._segments.append((segment, cls._pending))
+                    cls._pending = []
+                    cls._open_spool()
+                segments, cls._segments = cls._segments, []
+
+            written = 0
+            for position, (segment, lines) in enumerate(segments):
+                try:
+                    cls._write(lines)
+                except Exception:
+                    with cls._lock:
+                        cls._segments = segments[position:] + cls._segments
+                    raise
+                segment.unlink(missing_ok=True)
+                written += len(lines)
+            return written
+
+    @classmethod
+    def _write(cls, lines):
+        from simulation.models import SimulationLog
+
+        logs = [cls.decode(json.loads(line)) for line in lines if line.strip()]
+        with transaction.atomic():
+            SimulationLog.objects.bulk_create(logs, batch_size=settings.SIMULATION_BATCH_CHUNK_SIZE)
+        return len(logs)
+
+    @classmethod
+    def recover(cls):
+        """
+        Regrava os segmentos de spool deste host cujos processos não estão mais vivos,
+        com `created_at` no momento da recuperação. Segmentos de outros hosts são
+        ignorados. Cada segmento é antes renomeado para o processo atual (rename
+        atômico), então dois processos nunca regravam o mesmo arquivo. Retorna o número
+        de logs gravados.
+        """
+        host = socket.gethostname()
+        prefix = cls.segment_prefix()
+        written = 0
+        for path in sorted(cls.spool_dir().glob('*.jsonl')):
+            match = SEGMENT_NAME.match(path.name)
+            if match:
+                if match['host'] != host:
+                    continue
+                pid, started = int(match['pid']), int(match['started'])
+            else:
+                # Segmentos de versões anteriores, sem host no nome: tratados como locais
+                match = LEGACY_SEGMENT_NAME.match(path.name)
+                if not match:
+                    continue
+                pid, started = int(match['pid']), 0
+            # Inclui o próprio processo (spool ativo e segmentos ainda não gravados)
+            if _process_alive(pid, started):
+                continue
+            claimed = path.with_name(f"{prefix}-recover{next(cls._recovered)}.jsonl")
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue
+            lines = claimed.read_text(encoding='utf-8').splitlines()
+            written += cls._write(lines)
+            claimed.unlink()
+            logger.info(f"Spool {path.name} recuperado ({len(lines)} logs).")
+        return written
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Para a thread e grava o que restou na fila (chamado na saída do processo).
+        """
+        if cls._pid != os.getpid():
+            return
+        cls._stop.set()
+        cls._wakeup.set()
+        if cls._thread is not None and cls._thread is not threading.current_thread():
+            cls._thread.join(timeout=settings.SIMULATION_LOG_FLUSH_INTERVAL + 5)
+        try:
+            cls.flush()
+        except Exception as e:
+            logger.error(f"Erro ao gravar logs de simulação na saída (mantidos no spool): {e}")
+        with cls._lock:
+            if cls._spool is not None:
+                cls._spool.close()
+                if cls._spool_path.exists() and cls._spool_path.stat().st_size == 0:
+                    cls._spool_path.unlink()
+                cls._spool = None
+            cls._pid = None
+            cls._thread = None
+        atexit.unregister(cls.shutdown)
+
+    @classmethod
+    def pending(cls):
+        with cls._lock:
+            return len(cls._pending)
@@ -0,0 +1,211 @@
+import logging
+import secrets
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from decimal import Decimal
+import numpy as np
+from .batch import (
+    IMPACT_LABELS, RATE_SCALE, _difference, _impact_sign, _mul_rate, _round_half_even, scale_rate, to_decimal
+)
+from .process_pool import ProcessPool
+from .rate_table import RateTable
+
+logger = logging.getLogger(__name__)
+
+
+def _sample(rng, spec, size):
+    """
+    Sorteia `size` valores (float) conforme a especificação (tipo, a, b, c),
+    com parâmetros já nas unidades inteiras (centavos ou alíquota x RATE_SCALE).
+    """
+    kind, a, b, c = spec
+    if kind == 'uniform':
+        return rng.uniform(a, b, size)
+    if kind == 'triangular':
+        return rng.triangular(a, b, c, size) if a < c else np.full(size, b)
+    if kind == 'normal':
+        return rng.normal(a, b, size)
+    return np.full(size, a)
+
+
+def _run_chunk(seed, size, current_rate, revenue_spec, costs_spec, rate_spec):
+    """
+    Executa um bloco de sorteios (em um processo do pool ou no próprio processo).
+    Retorna (diferenças em centavos, contagem por classificação, segundos de CPU gastos).
+    """
+    started = time.process_time()
+    rng = np.random.default_rng(seed)
+
+    revenue = np.rint(_sample(rng, revenue_spec, size)).astype(np.int64).clip(min=0)
+    costs = np.rint(_sample(rng, costs_spec, size)).astype(np.int64).clip(min=0)
+    reform_rate = np.rint(_sample(rng, rate_spec, size)).astype(np.int64).clip(0, RATE_SCALE)
+
+    current_high, current_low = _mul_rate(revenue, current_rate)
+    reform_high, reform_low = _mul_rate(np.maximum(revenue - costs, 0), reform_rate)
+    delta_high, delta_low = _difference(reform_high, reform_low, current_high, current_low)
+
+    delta_value = _round_half_even(delta_high, delta_low, RATE_SCALE)
+    counts = np.bincount(_impact_sign(delta_high, delta_low) + 1, minlength=3)
+    return delta_value, counts, time.process_time() - started
+
+
+class MonteCarloSimulator:
+    """
+    Simulação de incerteza: sorteia a alíquota da reforma, o faturamento e os custos
+    conforme distribuições informadas e resume a diferença (reforma - atual) em
+    percentis e probabilidades de cada classificação de impacto.
+
+    Os sorteios são divididos em blocos de CHUNK_SIZE, cada um com o seu próprio fluxo
+    de números aleatórios derivado da semente (`SeedSequence.spawn`). Como a divisão não
+    depende do número de processos, a mesma semente sempre produz o mesmo resultado.
+
+    A execução respeita um orçamento de CPU (soma do tempo de CPU dos blocos): ao
+    esgotá-lo, os blocos pendentes são cancelados e o resumo usa os que terminaram.
+    """
+
+    CHUNK_SIZE = 50_000
+    PERCENTILES = (5, 25, 50, 75, 95)
+    DISTRIBUTIONS = ('fixed', 'uniform', 'triangular', 'normal')
+
+    @staticmethod
+    def spec(distribution, default, scale):
+        """
+        Converte a distribuição validada pelo serializer (valores em reais ou alíquota
+        decimal) em uma tupla (tipo, a, b, c) em unidades inteiras. Sem distribuição,
+        o valor é fixo em `default`.
+        """
+        if not distribution:
+            return ('fixed', float(default * scale), 0.0, 0.0)
+
+        kind = distribution['distribution']
+        params = {
+            'fixed': ('value',),
+            'uniform': ('min', 'max'),
+            'triangular': ('min', 'mode', 'max'),
+            'normal': ('mean', 'std'),
+        }[kind]
+        values = [float(distribution[param] * scale) for param in params]
+        return (kind, *values, *[0.0] * (3 - len(values)))
+
+    @classmethod
+    def tasks(cls, draws, seed, current_rate, revenue_spec, costs_spec, rate_spec):
+        """
+        Divide os sorteios em blocos com fluxos aleatórios independentes e reproduzíveis.
+        """
+        sizes = [cls.CHUNK_SIZE] * (draws // cls.CHUNK_SIZE)
+        if draws % cls.CHUNK_SIZE:
+            sizes.append(draws % cls.CHUNK_SIZE)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        return [
+            (child, size, current_rate, revenue_spec, costs_spec, rate_spec)
+            for child, size in zip(seeds, sizes)
+        ]
+
+    @classmethod
+    def execute(cls, tasks, cpu_budget):
+        """
+        Executa os blocos (no pool de processos quando há mais de um processo disponível)
+        até terminar ou esgotar o orçamento de CPU. Retorna os resultados por índice.
+
+        Se um processo do pool morrer durante a execução (ex.: OOM), o pool é descartado
+        para ser recriado na próxima requisição e nenhum resultado é retornado.
+        """
+        results = {}
+        cpu_time = 0.0
+
+        if len(tasks) == 1 or ProcessPool.max_workers() == 1:
+            for index, task in enumerate(tasks):
+                results[index] = _run_chunk(*task)
+                cpu_time += results[index][2]
+                if cpu_time > cpu_budget:
+                    break
+            return results, cpu_time
+
+        futures = ProcessPool.map(_run_chunk, tasks)
+        indexes = {future: index for index, future in enumerate(futures)}
+        pending = set(futures)
+        # O tempo de parede também é limitado, para o caso de o pool estar ocupado
+        deadline = time.monotonic() + cpu_budget
+        try:
+            while pending and cpu_time <= cpu_budget:
+                done, pending = wait(pending, timeout=deadline - time.monotonic(), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    results[indexes[future]] = future.result()
+                    cpu_time += results[indexes[future]][2]
+        except BrokenProcessPool:
+            logger.warning("Processo do pool interrompido durante o Monte Carlo; recriando o pool.")
+            ProcessPool.shutdown(wait=False)
+            return {}, cpu_time
+
+        for future in pending:
+            future.cancel()
+        return results, cpu_time
+
+    @classmethod
+    def run(cls, revenue, costs, tax_regime, sector, state=None, draws=10_000, seed=None,
+            revenue_distribution=None, costs_distribution=None, rate_distribution=None,
+            cpu_budget=None, table=None):
+        """
+        Executa a simulação de Monte Carlo para um cenário base e retorna o resumo.
+        Distribuições omitidas mantêm o valor do cenário (ou a alíquota da RateTable).
+        """
+        from django.conf import settings
+
+        table = table or RateTable.current()
+        if seed is None:
+            seed = secrets.randbits(32)
+        if cpu_budget is None:
+            cpu_budget = settings.SIMULATION_MONTE_CARLO_CPU_BUDGET
+
+        current_rate = scale_rate(table.get(tax_regime, sector, state))
+        reform_rate = table.get('REFORMA', sector, state)
+        tasks = cls.tasks(
+            draws, seed, current_rate,
+            cls.spec(revenue_distribution, Decimal(revenue), 100),
+            cls.spec(costs_distribution, Decimal(costs), 100),
+            cls.spec(rate_distribution, reform_rate, RATE_SCALE),
+        )
+        results, cpu_time = cls.execute(tasks, cpu_budget)
+
+        completed = [results[index] for index in sorted(results)]
+        deltas = np.concatenate([delta for delta, _, _ in completed]) if completed else np.empty(0, np.int64)
+        counts = sum((count for _, count, _ in completed), np.zeros(3, dtype=np.int64))
+        return cls.summarize(deltas, counts, {
+            'sorteios': draws,
+            'sorteios_realizados': len(deltas),
+            'semente': seed,
+            'orcamento_esgotado': len(completed) < len(tasks),
+            'tempo_cpu': round(cpu_time, 3),
+            'aliquota_atual': table.get(tax_regime, sector, state),
+            'aliquota_reforma': reform_rate,
+        })
+
+    @classmethod
+    def summarize(cls, deltas, counts, summary):
+        """
+        Percentis (valores sorteados, sem interpolação), média e desvio padrão da
+        diferença em reais e probabilidade de cada classificação de impacto.
+        """
+        total = len(deltas)
+        if not total:
+            summary.update({'diferenca': None, 'probabilidades': None})
+            return summary
+
+        percentiles = np.quantile(deltas, [p / 100 for p in cls.PERCENTILES], method='inverted_cdf')
+        summary['diferenca'] = {
+            'media': Decimal(float(deltas.mean()) / 100).quantize(Decimal('0.01')),
+            'desvio_padrao': Decimal(float(deltas.std()) / 100).quantize(Decimal('0.01')),
+            'minimo': to_decimal(deltas.min()),
+            'maximo': to_decimal(deltas.max()),
+            'percentis': {
+                f"p{p}": to_decimal(value) for p, value in zip(cls.PERCENTILES, percentiles.tolist())
+            },
+        }
+        summary['probabilidades'] = {
+            str(label): (Decimal(int(count)) / total).quantize(Decimal('0.0001'))
+            for label, count in zip(IMPACT_LABELS, counts.tolist())
+        }
+        return summary
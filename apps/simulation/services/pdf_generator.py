@@ -1,13 +1,166 @@
 from io import BytesIO
+from itertools import accumulate
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from .batch import to_centavos, to_decimal
+from .projection import TransitionProjector, TransitionTable
+
+# Página A4 com margens de 2 cm; o texto começa 6 pt dentro da margem
+PAGE_WIDTH, PAGE_HEIGHT = A4
+LEFT = 2*cm + 6
+TOP = 2*cm + 6
+BOTTOM = PAGE_HEIGHT - 2*cm - 6
+WIDTH = PAGE_WIDTH - 2 * LEFT
+CENTER = LEFT + WIDTH / 2
+
+FONT, BOLD = 'Helvetica', 'Helvetica-Bold'
+TITLE_SIZE, SECTION_SIZE, TEXT_SIZE = 18, 14, 10
+TEXT_LEADING = 12
+
+IMPACT_COLORS = {'NEGATIVO': colors.red, 'POSITIVO': colors.green}
+OBSERVATION = "O resultado acima é uma estimativa baseada nas alíquotas padrão da reforma tributária (IBS/CBS)."
+
+_BRL = str.maketrans(',.', '.,')
+
+
+def brl(value):
+    """
+    Formata um valor em reais: 1234567.8 -> 'R$ 1.234.567,80'.
+    """
+    return f"R$ {value:,.2f}".translate(_BRL)
+
+
+class _Table:
+    """
+    Tabela de layout fixo: colunas de largura fixa centralizadas na página, linhas de
+    18 pt, grade e, opcionalmente, cabeçalho em negrito com fundo cinza.
+    """
+    ROW_HEIGHT = 18
+    PADDING = 6
+
+    def __init__(self, widths, grid_width, grid_color, centered=False, header=False, bold_column=False):
+        self.left = LEFT + (WIDTH - sum(widths)) / 2
+        self.edges = [self.left, *(self.left + edge for edge in accumulate(widths))]
+        self.widths = widths
+        self.grid_width, self.grid_color = grid_width, grid_color
+        self.centered, self.header, self.bold_column = centered, header, bold_column
+
+    def draw(self, report, rows, bold_rows=(), color_cells=None):
+        """
+        Desenha as linhas a partir da posição atual do relatório, continuando na página
+        seguinte se não couberem. `color_cells` mapeia (linha, coluna) -> cor do texto.
+        """
+        color_cells = color_cells or {}
+        start = 0
+        while start < len(rows):
+            report.ensure(self.ROW_HEIGHT)
+            fit = min(len(rows) - start, int((BOTTOM - report.y) // self.ROW_HEIGHT))
+            self._draw_rows(report, rows, start, start + fit, bold_rows, color_cells)
+            report.y += fit * self.ROW_HEIGHT
+            start += fit
+
+    def _draw_rows(self, report, rows, start, end, bold_rows, color_cells):
+        canvas = report.canvas
+        top = PAGE_HEIGHT - report.y
+        bottom = top - (end - start) * self.ROW_HEIGHT
+
+        if self.header and start == 0:
+            canvas.setFillColor(colors.lightgrey)
+            canvas.rect(self.left, top - self.ROW_HEIGHT, self.edges[-1] - self.left, self.ROW_HEIGHT, stroke=0, fill=1)
+
+        # Um único objeto de texto para as células; fonte e cor só mudam quando necessário
+        text = canvas.beginText()
+        current_font = current_color = None
+        for index in range(start, end):
+            baseline = top - (index - start + 1) * self.ROW_HEIGHT + 5
+            row_bold = index in bold_rows or (self.header and index == 0)
+            for column, value in enumerate(rows[index]):
+                font = BOLD if row_bold or (self.bold_column and column == 0) else FONT
+                color = color_cells.get((index, column), colors.black)
+                if font != current_font:
+                    text.setFont(font, TEXT_SIZE)
+                    current_font = font
+                if color != current_color:
+                    text.setFillColor(color)
+                    current_color = color
+                width = stringWidth(value, font, TEXT_SIZE)
+                if self.centered:
+                    x = self.edges[column] + (self.widths[column] - width) / 2
+                else:
+                    limit = self.widths[column] - 2 * self.PADDING
+                    if width > limit:
+                        while value and stringWidth(value + '…', font, TEXT_SIZE) > limit:
+                            value = value[:-1]
+                        value += '…'
+                    x = self.edges[column] + self.PADDING
+                text.setTextOrigin(x, baseline)
+                text.textOut(value)
+        canvas.drawText(text)
+
+        canvas.setStrokeColor(self.grid_color)
+        canvas.setLineWidth(self.grid_width)
+        for edge in self.edges:
+            canvas.line(edge, top, edge, bottom)
+        for line in range(end - start + 1):
+            y = top - line * self.ROW_HEIGHT
+            canvas.line(self.left, y, self.edges[-1], y)
+
+
+INPUT_TABLE = _Table([6*cm, 10*cm], 0.5, colors.grey, bold_column=True)
+COMPARISON_TABLE = _Table([8*cm, 8*cm], 1, colors.black, centered=True, header=True)
+PROJECTION_TABLE = _Table([2.5*cm, 4.5*cm, 4.5*cm, 4.5*cm], 0.5, colors.grey, centered=True, header=True)
+
+
+class _Report:
+    """
+    Estado de um relatório em desenho: o canvas e a posição vertical `y` (distância do
+    topo da página), com quebra de página quando o próximo bloco não cabe.
+    """
+    def __init__(self, buffer):
+        self.canvas = Canvas(buffer, pagesize=A4)
+        self.y = TOP
+
+    def ensure(self, height):
+        if self.y + height > BOTTOM:
+            self.canvas.showPage()
+            self.y = TOP
+
+    def text(self, value, font=FONT, bold_suffix=''):
+        """
+        Uma linha de texto; `bold_suffix` continua a linha em negrito.
+        """
+        self.ensure(TEXT_LEADING)
+        baseline = PAGE_HEIGHT - self.y - TEXT_SIZE
+        self.canvas.setFont(font, TEXT_SIZE)
+        self.canvas.setFillColor(colors.black)
+        self.canvas.drawString(LEFT, baseline, value)
+        if bold_suffix:
+            self.canvas.setFont(BOLD, TEXT_SIZE)
+            self.canvas.drawString(LEFT + stringWidth(value, font, TEXT_SIZE), baseline, bold_suffix)
+        self.y += TEXT_LEADING
+
+    def section(self, title):
+        self.y += 15
+        self.ensure(18 + 10 + _Table.ROW_HEIGHT)
+        self.canvas.setFont(BOLD, SECTION_SIZE)
+        self.canvas.setFillColor(colors.black)
+        self.canvas.drawString(LEFT, PAGE_HEIGHT - self.y - SECTION_SIZE, title)
+        self.y += 18 + 10
+
+    def space(self, height):
+        self.y += height
+
 
 class PDFGenerator:
     """
     Serviço especializado na geração de relatórios de impacto tributário em formato PDF.
+
+    O layout do relatório é fixo, então ele é desenhado direto no canvas do ReportLab,
+    com posições, tabelas e fontes definidas uma vez no módulo, em vez de montado e
+    paginado pelo platypus a cada requisição.
     """
 
     @staticmethod
@@ -16,104 +169,71 @@ class PDFGenerator:
         Gera um buffer de bytes contendo o PDF da simulação.
         """
         buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Estilos Customizados
-        title_style = ParagraphStyle(
-            'TitleStyle',
-            parent=styles['Heading1'],
-            alignment=1, # Center
-            spaceAfter=20
-        )
-        
-        section_style = ParagraphStyle(
-            'SectionStyle',
-            parent=styles['Heading2'],
-            spaceBefore=15,
-            spaceAfter=10
-        )
+        report = _Report(buffer)
+        canvas = report.canvas
 
         # Cabeçalho
-        elements.append(Paragraph("Relatório de Impacto da Reforma Tributária", title_style))
-        elements.append(Paragraph(f"Simulação ID: {simulation_log.id}", styles['Normal']))
-        elements.append(Paragraph(f"Data: {simulation_log.created_at.strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
-        elements.append(Spacer(1, 1*cm))
+        canvas.setFont(BOLD, TITLE_SIZE)
+        canvas.drawCentredString(CENTER, PAGE_HEIGHT - TOP - TITLE_SIZE, "Relatório de Impacto da Reforma Tributária")
+        report.space(22 + 20)
+        report.text(f"Simulação ID: {simulation_log.id}")
+        report.text(f"Data: {simulation_log.created_at.strftime('%d/%m/%Y %H:%M')}")
+        report.space(1*cm)
 
         # Dados da Empresa
-        elements.append(Paragraph("Resumo dos Dados de Entrada", section_style))
+        report.section("Resumo dos Dados de Entrada")
         empresa_nome = simulation_log.company.name if simulation_log.company else "Não Identificada"
-        
-        data_entrada = [
+        INPUT_TABLE.draw(report, [
             ["Empresa:", empresa_nome],
             ["Regime Tributário Atual:", simulation_log.get_tax_regime_display()],
             ["Setor de Atuação:", simulation_log.get_sector_display()],
             ["UF:", simulation_log.state or "Não informada"],
-            ["Faturamento Mensal:", f"R$ {simulation_log.monthly_revenue:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")],
-            ["Custos Operacionais:", f"R$ {simulation_log.costs:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")]
-        ]
-        
-        t_entrada = Table(data_entrada, colWidths=[6*cm, 10*cm])
-        t_entrada.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('PADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(t_entrada)
-        elements.append(Spacer(1, 1*cm))
-
-        # Comparativo Financeiro
-        elements.append(Paragraph("Comparativo de Carga Tributária", section_style))
-        
-        data_comparativo = [
+            ["Faturamento Mensal:", brl(simulation_log.monthly_revenue)],
+            ["Custos Operacionais:", brl(simulation_log.costs)],
+        ])
+        report.space(1*cm)
+
+        # Comparativo Financeiro (cor da diferença conforme o impacto)
+        report.section("Comparativo de Carga Tributária")
+        COMPARISON_TABLE.draw(report, [
             ["Cenário", "Carga Mensal (R$)"],
-            ["Atual (Antes da Reforma)", f"R$ {simulation_log.current_tax_load:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")],
-            ["Proposta (Pós-Reforma)", f"R$ {simulation_log.reform_tax_load:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")],
-            ["Diferença (Delta)", f"R$ {simulation_log.delta_value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")]
-        ]
-        
-        t_comp = Table(data_comparativo, colWidths=[8*cm, 8*cm])
-        
-        # Cor baseada no impacto
-        delta_color = colors.black
-        if simulation_log.impact_classification == 'NEGATIVO':
-            delta_color = colors.red
-        elif simulation_log.impact_classification == 'POSITIVO':
-            delta_color = colors.green
-
-        t_comp.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('TEXTCOLOR', (1, 3), (1, 3), delta_color),
-            ('FONTNAME', (0, 3), (1, 3), 'Helvetica-Bold'),
-            ('PADDING', (0, 0), (-1, -1), 8),
-        ]))
-        elements.append(t_comp)
-        elements.append(Spacer(1, 1*cm))
+            ["Atual (Antes da Reforma)", brl(simulation_log.current_tax_load)],
+            ["Proposta (Pós-Reforma)", brl(simulation_log.reform_tax_load)],
+            ["Diferença (Delta)", brl(simulation_log.delta_value)],
+        ], bold_rows=(3,), color_cells={
+            (3, 1): IMPACT_COLORS.get(simulation_log.impact_classification, colors.black)
+        })
+        report.space(1*cm)
+
+        # Projeção da Transição
+        transition = TransitionTable.current()
+        if len(transition):
+            [loads] = TransitionProjector.project(
+                to_centavos([simulation_log.current_tax_load]),
+                to_centavos([simulation_log.reform_tax_load]),
+                transition
+            ).tolist()
+            report.section(f"Projeção da Transição ({transition.years[0]}–{transition.years[-1]})")
+            data_projecao = [["Ano", "Carga Mensal (R$)", "Carga Anual (R$)", "Diferença Mensal (R$)"]]
+            for year, load in zip(transition.years, loads):
+                data_projecao.append([
+                    str(year),
+                    brl(to_decimal(load)),
+                    brl(to_decimal(load * 12)),
+                    brl(to_decimal(load) - simulation_log.current_tax_load),
+                ])
+            PROJECTION_TABLE.draw(report, data_projecao)
+            report.space(1*cm)
 
         # Análise Qualitativa
-        elements.append(Paragraph("Análise e Sugestões", section_style))
-        impacto_text = f"Classificação de Impacto: <b>{simulation_log.get_impact_classification_display()}</b>"
-        elements.append(Paragraph(impacto_text, styles['Normal']))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        elements.append(Paragraph("<b>Observações:</b>", styles['Normal']))
-        obs = "O resultado acima é uma estimativa baseada nas alíquotas padrão da reforma tributária (IBS/CBS)."
-        elements.append(Paragraph(obs, styles['Normal']))
-
-        # Gerar PDF
-        doc.build(elements)
+        report.section("Análise e Sugestões")
+        report.text("Classificação de Impacto: ", bold_suffix=simulation_log.get_impact_classification_display())
+        report.space(0.5*cm)
+
+        report.ensure(2 * TEXT_LEADING)
+        report.text("Observações:", BOLD)
+        report.text(OBSERVATION)
+
+        canvas.save()
         buffer.seek(0)
         return buffer
@@ -0,0 +1,99 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(settings_module):
+    """
+    Inicializa o Django em cada processo do pool, permitindo que as tarefas usem o ORM.
+    """
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+class ProcessPool:
+    """
+    Pool de processos compartilhado pelo processo web para tarefas de CPU intensas
+    (ex.: Monte Carlo). É criado sob demanda, com o contexto `spawn` (seguro para
+    servidores com threads) e recriado automaticamente se algum processo morrer.
+
+    O número de processos vem da configuração `workers_setting`. Subclasses com o seu
+    próprio `_executor`/`_lock` (ex.: ExportPool) são pools independentes.
+    """
+
+    workers_setting = 'SIMULATION_POOL_WORKERS'
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def max_workers(cls):
+        from django.conf import settings
+
+        return max(1, getattr(settings, cls.workers_setting))
+
+    @classmethod
+    def get(cls):
+        """
+        Retorna o executor em uso, criando-o na primeira chamada.
+        """
+        executor = cls._executor
+        if executor is not None:
+            return executor
+
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=cls.max_workers(),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+                )
+            return cls._executor
+
+    @classmethod
+    def map(cls, fn, tasks):
+        """
+        Submete `fn(*task)` para cada tarefa e retorna a lista de futures.
+        Se o pool estiver quebrado, ele é recriado uma vez antes de desistir.
+        """
+        try:
+            executor = cls.get()
+            return [executor.submit(fn, *task) for task in tasks]
+        except BrokenProcessPool:
+            logger.warning("Pool de processos quebrado; recriando.")
+            cls.shutdown(wait=False)
+            executor = cls.get()
+            return [executor.submit(fn, *task) for task in tasks]
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        """
+        Encerra o pool (as tarefas pendentes são canceladas).
+        """
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class ExportPool(ProcessPool):
+    """
+    Pool separado, e pequeno (SIMULATION_EXPORT_POOL_WORKERS), para as exportações em
+    segundo plano: exportações longas não ocupam os processos do Monte Carlo.
+    """
+
+    workers_setting = 'SIMULATION_EXPORT_POOL_WORKERS'
+    _executor = None
+    _lock = threading.Lock()
+
+
+atexit.register(ProcessPool.shutdown, wait=False)
+atexit.register(ExportPool.shutdown, wait=False)
@@ -0,0 +1,63 @@
+import numpy as np
+from .batch import RATE_SCALE, _mul_rate, _round_half_even, scale_rate
+from .compiled import CompiledTable
+
+
+class TransitionTable(CompiledTable):
+    """
+    Cronograma de transição (TransitionSchedule) pré-compilado em arrays:
+    anos e fatores inteiros (x RATE_SCALE) da carga atual e da reforma.
+    """
+
+    __slots__ = ('years', 'current_factors', 'reform_factors')
+
+    generation_scope = 'TRANSICAO'  # CacheGeneration.Scope.TRANSITION
+
+    def __init__(self, rows=()):
+        """
+        `rows` é um iterável de tuplas (year, current_factor, reform_factor).
+        """
+        rows = sorted(rows)
+        self.years = tuple(year for year, _, _ in rows)
+        self.current_factors = np.array([scale_rate(factor) for _, factor, _ in rows], dtype=np.int64)
+        self.reform_factors = np.array([scale_rate(factor) for _, _, factor in rows], dtype=np.int64)
+        self.current_factors.setflags(write=False)
+        self.reform_factors.setflags(write=False)
+
+    def __len__(self):
+        return len(self.years)
+
+    @classmethod
+    def rows(cls):
+        from simulation.models import TransitionSchedule
+
+        return tuple(TransitionSchedule.objects.values_list('year', 'current_factor', 'reform_factor'))
+
+
+class TransitionProjector:
+    """
+    Projeta a carga tributária mensal de cada cenário ao longo da transição:
+        carga(ano) = carga_atual x fator_atual(ano) + carga_reforma x fator_reforma(ano)
+    para todos os cenários e anos em uma única operação vetorizada (N x anos),
+    com centavos inteiros e arredondamento ROUND_HALF_EVEN.
+
+    A projeção é apenas anual: os fatores do cronograma valem para o ano-calendário
+    inteiro, então a carga de cada mês é a do seu ano.
+    """
+
+    @classmethod
+    def project(cls, current_tax, reform_tax, table=None):
+        """
+        Recebe arrays de cargas mensais em centavos (atual e pós-reforma) e retorna
+        a matriz (cenários x anos) de cargas mensais projetadas, em centavos.
+        """
+        table = table or TransitionTable.current()
+        current_tax = np.asarray(current_tax, dtype=np.int64)[:, None]
+        reform_tax = np.asarray(reform_tax, dtype=np.int64)[:, None]
+
+        current_high, current_low = _mul_rate(current_tax, table.current_factors[None, :])
+        reform_high, reform_low = _mul_rate(reform_tax, table.reform_factors[None, :])
+
+        low = current_low + reform_low
+        high = current_high + reform_high + low // RATE_SCALE
+        return _round_half_even(high, low % RATE_SCALE, RATE_SCALE)
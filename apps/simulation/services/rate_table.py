@@ -0,0 +1,137 @@
+from decimal import Decimal
+from types import MappingProxyType
+from django.conf import settings
+from .compiled import CompiledTable
+from .fallbacks import FallbackCounter
+
+# Alíquotas Fallback (caso o banco esteja vazio)
+FALLBACK_RATES = MappingProxyType({
+    'SIMPLES_NACIONAL': Decimal('0.1000'),
+    'LUCRO_PRESUMIDO': Decimal('0.1633'), # PIS + COFINS + ISS + IRPJ + CSLL
+    'REFORMA': Decimal('0.2650'),
+})
+
+DEFAULT_RATE = Decimal('0.00')
+
+
+class RateTable(CompiledTable):
+    """
+    Tabela compilada e imutável de alíquotas, indexada por (rule_type, sector, state).
+
+    É construída uma única vez a partir de todas as TaxRules ativas e mantida em
+    memória no processo. Todas as combinações conhecidas de regra x setor x UF são
+    resolvidas na compilação, do mais específico para o menos específico:
+
+        (setor, UF) -> (setor, qualquer UF) -> (qualquer setor, UF) -> genérica -> fallback
+
+    Assim a consulta é um único acesso a dicionário, sem cache nem banco.
+    Em caso de regras duplicadas para a mesma chave, prevalece a de menor id.
+
+    Chaves sem nenhuma regra aplicável usam FALLBACK_RATES: cada consulta a elas por
+    `rate()` é contada no FallbackCounter, e uma tabela com chaves assim é recompilada
+    a cada SIMULATION_FALLBACK_TTL segundos (cache negativo com prazo menor).
+    """
+
+    __slots__ = ('_rates', '_fallback')
+
+    generation_scope = 'ALIQUOTAS'  # CacheGeneration.Scope.TAX_RULES
+
+    def __init__(self, rules=()):
+        """
+        `rules` é um iterável de tuplas (rule_type, sector, state, rate) já ordenado
+        por prioridade (a primeira ocorrência de cada chave prevalece).
+        """
+        from companies.models import Company
+        from simulation.models import TaxRule
+
+        specific = {}
+        for rule_type, sector, state, rate in rules:
+            specific.setdefault((rule_type, sector or None, state or None), rate)
+
+        rates = {}
+        fallback_keys = set()
+        sectors = [None, *Company.Sector.values]
+        states = [None, *Company.UF.values]
+        for rule_type in TaxRule.RuleType.values:
+            fallback = FALLBACK_RATES.get(rule_type, DEFAULT_RATE)
+            for sector in sectors:
+                for state in states:
+                    rate = self._resolve(specific, rule_type, sector, state, None)
+                    if rate is None:
+                        rate = fallback
+                        fallback_keys.add((rule_type, sector, state))
+                    rates[(rule_type, sector, state)] = rate
+
+        self._rates = MappingProxyType(rates)
+        self._fallback = frozenset(fallback_keys)
+
+    @staticmethod
+    def _resolve(specific, rule_type, sector, state, fallback):
+        for key in (
+            (rule_type, sector, state),
+            (rule_type, sector, None),
+            (rule_type, None, state),
+            (rule_type, None, None),
+        ):
+            rate = specific.get(key)
+            if rate is not None:
+                return rate
+        return fallback
+
+    def get(self, rule_type, sector=None, state=None):
+        """
+        Retorna a alíquota resolvida para a combinação informada.
+        Setores/UFs fora dos choices (ex.: 'OUTROS') caem para o nível menos específico.
+        """
+        rates = self._rates
+        rate = rates.get((rule_type, sector or None, state or None))
+        if rate is not None:
+            return rate
+
+        for key in ((rule_type, sector, None), (rule_type, None, state), (rule_type, None, None)):
+            rate = rates.get(key)
+            if rate is not None:
+                return rate
+        return FALLBACK_RATES.get(rule_type, DEFAULT_RATE)
+
+    def rate(self, rule_type, sector=None, state=None):
+        """
+        Mesma resolução de `get`, usada pelo TaxCalculator: as consultas resolvidas por
+        fallback são contadas no FallbackCounter.
+        """
+        key = (rule_type, sector or None, state or None)
+        rate = self._rates.get(key)
+        if rate is None:
+            return self._rate_slow(rule_type, sector, state)
+        if key in self._fallback:
+            FallbackCounter.hit(FallbackCounter.RATE, key)
+        return rate
+
+    def _rate_slow(self, rule_type, sector, state):
+        # Setor/UF fora dos choices: resolve pelos níveis menos específicos
+        rates = self._rates
+        for key in ((rule_type, sector, None), (rule_type, None, state), (rule_type, None, None)):
+            rate = rates.get(key)
+            if rate is not None:
+                if key in self._fallback:
+                    FallbackCounter.hit(FallbackCounter.RATE, (rule_type, sector, state))
+                return rate
+        FallbackCounter.hit(FallbackCounter.RATE, (rule_type, sector, state))
+        return FALLBACK_RATES.get(rule_type, DEFAULT_RATE)
+
+    def __len__(self):
+        return len(self._rates)
+
+    def ttl(self):
+        return settings.SIMULATION_FALLBACK_TTL if self._fallback else None
+
+    @classmethod
+    def rows(cls):
+        """
+        TaxRules ativas, em ordem de prioridade (uma única consulta).
+        """
+        from simulation.models import TaxRule
+
+        return tuple(TaxRule.objects.filter(is_active=True).order_by('id').values_list(
+            'rule_type', 'sector', 'state', 'rate'
+        ))
@@ -0,0 +1,205 @@
+import logging
+import threading
+from collections import deque
+from django.conf import settings
+from django.db import connections
+from django.db.models import Max
+from django.utils import timezone
+from .batch import BatchSimulator, to_centavos
+from .process_pool import ProcessPool
+from .rate_table import RateTable
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = ('current_tax_load', 'reform_tax_load', 'delta_value', 'impact_classification')
+
+
+def _recompute_range(job_id, first_id, last_id, rules):
+    """
+    Recalcula os logs do escopo do job com id em [first_id, last_id] usando o retrato
+    das regras `rules` e grava apenas os que mudaram (bulk_update).
+    Roda em um processo do pool ou no próprio processo. Retorna (processados, alterados).
+    """
+    from simulation.models import RecomputeJob, SimulationLog
+
+    job = RecomputeJob.objects.get(pk=job_id)
+    logs = list(
+        job.scope().filter(id__gte=first_id, id__lte=last_id).order_by('id').only(
+            'id', 'monthly_revenue', 'costs', 'tax_regime', 'sector', 'state', *RESULT_FIELDS
+        )
+    )
+    if not logs:
+        return 0, 0
+
+    result = BatchSimulator.run(
+        to_centavos([log.monthly_revenue for log in logs]),
+        to_centavos([log.costs for log in logs]),
+        [log.tax_regime for log in logs],
+        [log.sector for log in logs],
+        [log.state for log in logs],
+        RateTable(rules),
+    )
+
+    changed = []
+    now = timezone.now()
+    for position, log in enumerate(logs):
+        row = result.row(position)
+        values = {field: row[field] for field in RESULT_FIELDS}
+        if any(getattr(log, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(log, field, value)
+            log.updated_at = now
+            changed.append(log)
+
+    if changed:
+        SimulationLog.objects.bulk_update(
+            changed, [*RESULT_FIELDS, 'updated_at'], batch_size=settings.SIMULATION_BATCH_CHUNK_SIZE
+        )
+    return len(logs), len(changed)
+
+
+class RecomputeRunner:
+    """
+    Executa um RecomputeJob: divide o escopo em faixas de ids (SIMULATION_RECOMPUTE_CHUNK_SIZE
+    logs cada), recalcula as faixas no pool de processos e avança o checkpoint (`last_id`)
+    sempre na ordem das faixas. Uma faixa interrompida é refeita por inteiro na próxima
+    execução, o que é seguro porque o recálculo é idempotente.
+
+    Todas as faixas usam o mesmo retrato das regras ativas, lido uma vez no início.
+    Quem executa reserva o job com um UPDATE condicional (PENDENTE/FALHOU -> EXECUTANDO),
+    então o admin e o comando não executam o mesmo job ao mesmo tempo.
+    """
+
+    @classmethod
+    def ranges(cls, job, chunk_size):
+        """
+        Gera as faixas (primeiro_id, último_id) do escopo a partir do checkpoint, por keyset.
+        """
+        cursor = job.last_id
+        scope = job.scope().filter(id__lte=job.max_id)
+        while True:
+            ids = list(scope.filter(id__gt=cursor).order_by('id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                return
+            yield ids[0], ids[-1]
+            cursor = ids[-1]
+
+    @staticmethod
+    def claim(job, resume=False):
+        """
+        Reserva o job pendente ou que falhou para esta execução; com `resume`, também um
+        job EXECUTANDO (interrompido sem chegar a FALHOU, ex.: processo morto). Retorna
+        False se o job não está em um desses estados (outro processo já o reservou).
+        """
+        from simulation.models import RecomputeJob
+
+        statuses = [RecomputeJob.Status.PENDING, RecomputeJob.Status.FAILED]
+        if resume:
+            statuses.append(RecomputeJob.Status.RUNNING)
+        claimed = RecomputeJob.objects.filter(pk=job.pk, status__in=statuses).update(
+            status=RecomputeJob.Status.RUNNING, updated_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+        return bool(claimed)
+
+    @classmethod
+    def run(cls, job, resume=False):
+        """
+        Executa (ou retoma) o job até o fim, se conseguir reservá-lo (ver `claim`). Em
+        caso de erro o job fica FALHOU com o checkpoint da última faixa concluída.
+        """
+        from simulation.models import RecomputeJob, TaxRule
+
+        if not cls.claim(job, resume):
+            return job
+
+        if job.max_id is None:
+            job.max_id = job.scope().aggregate(top=Max('id'))['top'] or 0
+        job.started_at = job.started_at or timezone.now()
+        job.error = ''
+        job.save(update_fields=['max_id', 'started_at', 'error', 'updated_at'])
+
+        rules = list(
+            TaxRule.objects.filter(is_active=True).order_by('id').values_list('rule_type', 'sector', 'state', 'rate')
+        )
+        try:
+            for last_id, processed, updated in cls.execute(job, rules):
+                job.last_id = last_id
+                job.processed += processed
+                job.updated += updated
+                job.save(update_fields=['last_id', 'processed', 'updated', 'updated_at'])
+        except Exception as e:
+            logger.error(f"Erro no recálculo {job.pk}: {e}")
+            job.status = RecomputeJob.Status.FAILED
+            job.error = str(e)
+            job.save(update_fields=['status', 'error', 'updated_at'])
+            raise
+
+        job.status = RecomputeJob.Status.DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at', 'updated_at'])
+        return job
+
+    @classmethod
+    def execute(cls, job, rules):
+        """
+        Gera (último_id, processados, alterados) de cada faixa concluída, em ordem.
+        Com mais de um processo, mantém até 2 faixas por processo em andamento.
+        """
+        ranges = cls.ranges(job, settings.SIMULATION_RECOMPUTE_CHUNK_SIZE)
+        workers = ProcessPool.max_workers()
+        if workers == 1:
+            for first_id, last_id in ranges:
+                yield (last_id, *_recompute_range(job.pk, first_id, last_id, rules))
+            return
+
+        in_flight = deque()
+        try:
+            for first_id, last_id in ranges:
+                [future] = ProcessPool.map(_recompute_range, [(job.pk, first_id, last_id, rules)])
+                in_flight.append((last_id, future))
+                if len(in_flight) >= 2 * workers:
+                    last_id, future = in_flight.popleft()
+                    yield (last_id, *future.result())
+            while in_flight:
+                last_id, future = in_flight.popleft()
+                yield (last_id, *future.result())
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+
+    @classmethod
+    def start(cls, jobs):
+        """
+        Executa os jobs, um após o outro, em uma thread em segundo plano (usado pelo admin).
+        """
+        def target():
+            try:
+                for job in jobs:
+                    try:
+                        cls.run(job)
+                    except Exception:
+                        # O erro já foi registrado no job (status FALHOU)
+                        continue
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=target, name="recompute-simulations", daemon=True)
+        thread.start()
+        return thread
+
+    @classmethod
+    def enqueue(cls, rule_type=None, sector=None, state=None):
+        """
+        Cria um job pendente para o escopo, reaproveitando um pendente igual se existir.
+        """
+        from simulation.models import RecomputeJob
+
+        job, _ = RecomputeJob.objects.get_or_create(
+            rule_type=rule_type or None,
+            sector=sector or None,
+            state=state or None,
+            status=RecomputeJob.Status.PENDING,
+        )
+        return job
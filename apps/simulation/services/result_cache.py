@@ -0,0 +1,121 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class SimulationResultCache:
+    """
+    Cache LRU em memória (por processo) dos resultados de `SimulationView`: cargas,
+    diferença e análise (incluindo sugestões) para uma mesma entrada.
+
+    A chave é um hash canônico das entradas normalizadas (valores, regime, setor, UF)
+    e da versão do conjunto de regras, incrementada por `invalidate()` sempre que uma
+    TaxRule ou SuggestionMatrix muda (ver signals). Um resultado calculado antes de uma
+    invalidação nunca é gravado. O tamanho é limitado por SIMULATION_RESULT_CACHE_SIZE.
+    """
+
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+    version = 0
+    hits = 0
+    misses = 0
+    evictions = 0
+
+    @classmethod
+    def max_size(cls):
+        from django.conf import settings
+
+        return settings.SIMULATION_RESULT_CACHE_SIZE
+
+    @classmethod
+    def key(cls, company_data, financials, version=None):
+        """
+        Hash canônico das entradas normalizadas e da versão das regras.
+        """
+        canonical = "|".join((
+            # normalize(): 10000, 10000.0 e 10000.00 são a mesma entrada
+            str(financials['monthly_revenue'].normalize()),
+            str(financials['costs'].normalize()),
+            company_data['tax_regime'],
+            company_data.get('sector') or '',
+            company_data.get('state') or '',
+            str(cls.version if version is None else version),
+        ))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @classmethod
+    def get_or_compute(cls, company_data, financials, compute):
+        """
+        Retorna o resultado em cache para a entrada ou executa `compute()` e o guarda.
+        O valor guardado é compartilhado entre requisições e não deve ser alterado.
+        """
+        version = cls.version
+        key = cls.key(company_data, financials, version)
+        result = cls._lookup(key)
+        if result is None:
+            result = compute()
+            cls._store(key, version, result)
+        return result
+
+    @classmethod
+    async def aget_or_compute(cls, company_data, financials, compute):
+        """
+        Versão assíncrona de `get_or_compute`: `compute()` retorna um awaitable.
+        O lock só protege operações em memória, então não bloqueia o event loop.
+        """
+        version = cls.version
+        key = cls.key(company_data, financials, version)
+        result = cls._lookup(key)
+        if result is None:
+            result = await compute()
+            cls._store(key, version, result)
+        return result
+
+    @classmethod
+    def _lookup(cls, key):
+        with cls._lock:
+            result = cls._entries.get(key)
+            if result is not None:
+                cls._entries.move_to_end(key)
+                cls.hits += 1
+                return result
+            cls.misses += 1
+            return None
+
+    @classmethod
+    def _store(cls, key, version, result):
+        with cls._lock:
+            if cls.version == version:
+                cls._entries[key] = result
+                cls._entries.move_to_end(key)
+                while len(cls._entries) > cls.max_size():
+                    cls._entries.popitem(last=False)
+                    cls.evictions += 1
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Incrementa a versão das regras e descarta todos os resultados em cache.
+        """
+        with cls._lock:
+            cls.version += 1
+            cls._entries.clear()
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            total = cls.hits + cls.misses
+            return {
+                'versao_regras': cls.version,
+                'tamanho': len(cls._entries),
+                'tamanho_maximo': cls.max_size(),
+                'acertos': cls.hits,
+                'falhas': cls.misses,
+                'remocoes': cls.evictions,
+                'taxa_acerto': round(cls.hits / total, 4) if total else 0.0,
+            }
+
+    @classmethod
+    def reset_stats(cls):
+        with cls._lock:
+            cls.hits = cls.misses = cls.evictions = 0
@@ -0,0 +1,103 @@
+from types import MappingProxyType
+from django.conf import settings
+from .compiled import CompiledTable
+from .fallbacks import FallbackCounter
+
+# Sugestão padrão quando a matriz não tem entradas para (setor, impacto)
+DEFAULT_SUGGESTIONS = (
+    "Considere revisar seus créditos tributários e analisar o impacto na precificação final.",
+)
+
+CLASSIFICATIONS = ('NEGATIVO', 'NEUTRO', 'POSITIVO')
+
+
+class SuggestionIndex(CompiledTable):
+    """
+    Índice compilado e imutável usado pelo ImpactAnalyzer:
+
+    - sugestões da SuggestionMatrix por (setor, impacto), carregadas em uma única
+      consulta, como tuplas na ordem de cadastro;
+    - mensagem e detalhes setoriais já renderizados por (setor, classificação, UF).
+
+    É trocado atomicamente quando a matriz muda (ver signals), então `analyze` não
+    faz consultas nem formata textos. Setores ou UFs fora dos choices são renderizados
+    na hora, com o mesmo texto.
+
+    Combinações sem sugestões usam DEFAULT_SUGGESTIONS: cada consulta a elas é contada
+    no FallbackCounter, e um índice incompleto é recompilado a cada
+    SIMULATION_FALLBACK_TTL segundos (cache negativo com prazo menor).
+    """
+
+    __slots__ = ('_suggestions', '_texts', '_complete')
+
+    generation_scope = 'SUGESTOES'  # CacheGeneration.Scope.SUGGESTIONS
+
+    def __init__(self, rows=()):
+        """
+        `rows` é um iterável de tuplas (sector, impact, suggestion_text) já ordenado.
+        """
+        from companies.models import Company
+
+        suggestions = {}
+        for sector, impact, text in rows:
+            suggestions.setdefault((sector, impact), []).append(text)
+        self._suggestions = MappingProxyType({key: tuple(texts) for key, texts in suggestions.items()})
+        self._complete = all(
+            (sector, impact) in suggestions for sector in Company.Sector.values for impact in CLASSIFICATIONS
+        )
+
+        ufs = dict(Company.UF.choices)
+        self._texts = MappingProxyType({
+            (sector, classification, uf): self.render(sector, classification, uf, ufs)
+            for sector in Company.Sector.values
+            for classification in CLASSIFICATIONS
+            for uf in (None, *ufs)
+        })
+
+    @staticmethod
+    def render(sector, classification, uf, ufs):
+        """
+        Retorna (mensagem, detalhes_setoriais) para a combinação.
+        """
+        if classification == 'NEGATIVO':
+            message = f"Sua carga tributária para o setor de {sector.capitalize()} deve aumentar com a reforma."
+        elif classification == 'POSITIVO':
+            message = f"Sua carga tributária para o setor de {sector.capitalize()} deve diminuir com a reforma."
+        else:
+            message = "Sua carga tributária deve permanecer estável."
+
+        details = f"Análise baseada nas médias nacionais para {sector.capitalize()}."
+        if uf:
+            details += f" Consideradas particularidades da região {ufs.get(uf, uf)} no contexto da transição federativa."
+        return message, details
+
+    def suggestions(self, sector, impact):
+        suggestions = self._suggestions.get((sector, impact))
+        if suggestions is None:
+            FallbackCounter.hit(FallbackCounter.SUGGESTION, (sector, impact))
+            return DEFAULT_SUGGESTIONS
+        return suggestions
+
+    def texts(self, sector, classification, uf=None):
+        texts = self._texts.get((sector, classification, uf or None))
+        if texts is not None:
+            return texts
+
+        from companies.models import Company
+
+        return self.render(sector, classification, uf, dict(Company.UF.choices))
+
+    def __len__(self):
+        return len(self._suggestions)
+
+    def ttl(self):
+        return None if self._complete else settings.SIMULATION_FALLBACK_TTL
+
+    @classmethod
+    def rows(cls):
+        """
+        Linhas da SuggestionMatrix em ordem de cadastro (uma única consulta).
+        """
+        from simulation.models import SuggestionMatrix
+
+        return tuple(SuggestionMatrix.objects.order_by('id').values_list('sector', 'impact', 'suggestion_text'))
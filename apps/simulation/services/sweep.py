@@ -0,0 +1,104 @@
+import json
+import numpy as np
+from .batch import BatchSimulator, IMPACT_LABELS, to_centavos
+from .rate_table import RateTable
+
+
+def _money(centavos):
+    """
+    Formata centavos (ou centésimos de ponto percentual) como número JSON com duas casas.
+    """
+    sign = '-' if centavos < 0 else ''
+    value = abs(centavos)
+    return f"{sign}{value // 100}.{value % 100:02d}"
+
+
+class SweepGrid:
+    """
+    Grade de sensibilidade: produto cartesiano de faixas de faturamento e custos
+    com listas de regime, setor e UF. É calculada em memória, em blocos, pelo
+    BatchSimulator, sem gravar nada no banco.
+
+    Células com custos maiores que o faturamento são descartadas, pela mesma
+    regra de validação da simulação simples.
+    """
+
+    def __init__(self, revenues, costs, regimes, sectors, states):
+        self.revenues = to_centavos(revenues)
+        self.costs = to_centavos(costs)
+        self.regimes = list(regimes)
+        self.sectors = list(sectors)
+        self.states = list(states)
+        self.shape = (
+            len(self.regimes), len(self.sectors), len(self.states), len(self.revenues), len(self.costs)
+        )
+
+    @staticmethod
+    def axis(start, stop, step):
+        """
+        Valores de uma faixa inclusiva [start, stop] com passo `step` (Decimal).
+        """
+        count = int((stop - start) // step) + 1
+        return [start + step * index for index in range(count)]
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+    def emitted(self):
+        """
+        Número de células efetivamente geradas (custos <= faturamento), sem calculá-las.
+        """
+        pairs = np.searchsorted(np.sort(self.costs), self.revenues, side='right').sum()
+        return int(pairs) * len(self.regimes) * len(self.sectors) * len(self.states)
+
+    def iter_chunks(self, chunk_size, table=None):
+        """
+        Gera blocos (índices da grade, BatchResult) de até `chunk_size` células.
+        """
+        table = table or RateTable.current()
+        regimes = np.array(self.regimes)
+        sectors = np.array(self.sectors, dtype=object)
+        states = np.array(self.states, dtype=object)
+
+        for start in range(0, len(self), chunk_size):
+            flat = np.arange(start, min(start + chunk_size, len(self)))
+            regime_i, sector_i, state_i, revenue_i, cost_i = np.unravel_index(flat, self.shape)
+            revenue = self.revenues[revenue_i]
+            costs = self.costs[cost_i]
+
+            keep = costs <= revenue
+            if not keep.any():
+                continue
+            regime_i, sector_i, state_i = regime_i[keep], sector_i[keep], state_i[keep]
+            revenue, costs = revenue[keep], costs[keep]
+
+            result = BatchSimulator.run(
+                revenue, costs, regimes[regime_i], sectors[sector_i], states[state_i], table
+            )
+            yield (regime_i, sector_i, state_i, revenue, costs), result
+
+    def iter_ndjson(self, chunk_size, table=None):
+        """
+        Serializa a grade como NDJSON (uma célula por linha), bloco a bloco.
+        """
+        regimes = [json.dumps(value) for value in self.regimes]
+        sectors = [json.dumps(value) for value in self.sectors]
+        states = [json.dumps(value) for value in self.states]
+        labels = [json.dumps(str(label)) for label in IMPACT_LABELS]
+
+        for (regime_i, sector_i, state_i, revenue, costs), result in self.iter_chunks(chunk_size, table):
+            lines = []
+            for row in zip(
+                regime_i.tolist(), sector_i.tolist(), state_i.tolist(), revenue.tolist(), costs.tolist(),
+                result.current_tax.tolist(), result.reform_tax.tolist(), result.delta_value.tolist(),
+                result.delta_percentage.tolist(), result.impact_sign.tolist(),
+            ):
+                lines.append(
+                    '{"regime_atual": %s, "setor": %s, "estado": %s, "faturamento": %s, "custos": %s, '
+                    '"carga_tributaria_atual": %s, "carga_tributaria_reforma": %s, "diferenca_absoluta": %s, '
+                    '"diferenca_percentual": %s, "classificacao_impacto": %s}\n' % (
+                        regimes[row[0]], sectors[row[1]], states[row[2]], _money(row[3]), _money(row[4]),
+                        _money(row[5]), _money(row[6]), _money(row[7]), _money(row[8]), labels[row[9] + 1],
+                    )
+                )
+            yield ''.join(lines)
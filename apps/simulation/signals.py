@@ -1,22 +1,31 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
-from .models import TaxRule, SuggestionMatrix
+from .models import CacheGeneration, TaxRule, SuggestionMatrix, TransitionSchedule
+from .services.generations import CacheGenerations
 
 @receiver(post_save, sender=TaxRule)
 @receiver(post_delete, sender=TaxRule)
 def invalidate_tax_rule_cache(sender, instance, **kwargs):
     """
-    Limpa o cache da alíquota quando uma TaxRule é salva ou deletada.
+    Incrementa a geração das alíquotas quando uma TaxRule é salva ou deletada: a tabela
+    compilada (e os resultados em cache) são descartados neste processo e, na próxima
+    requisição, nos demais. A recompilação inclui chaves de rule_type antigos.
     """
-    cache_key = f"tax_rate_{instance.rule_type}"
-    cache.delete(cache_key)
+    CacheGenerations.bump(CacheGeneration.Scope.TAX_RULES)
+
+@receiver(post_save, sender=TransitionSchedule)
+@receiver(post_delete, sender=TransitionSchedule)
+def invalidate_transition_schedule(sender, instance, **kwargs):
+    """
+    Incrementa a geração do cronograma de transição quando uma fase é salva ou deletada.
+    """
+    CacheGenerations.bump(CacheGeneration.Scope.TRANSITION)
 
 @receiver(post_save, sender=SuggestionMatrix)
 @receiver(post_delete, sender=SuggestionMatrix)
 def invalidate_suggestion_cache(sender, instance, **kwargs):
     """
-    Limpa o cache de sugestões quando uma SuggestionMatrix é salva ou deletada.
+    Incrementa a geração das sugestões (índice compilado e resultados de simulação em
+    cache, que incluem as sugestões) quando uma SuggestionMatrix é salva ou deletada.
     """
-    cache_key = f"suggestions_{instance.sector}_{instance.impact}"
-    cache.delete(cache_key)
+    CacheGenerations.bump(CacheGeneration.Scope.SUGGESTIONS)
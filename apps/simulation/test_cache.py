@@ -4,10 +4,14 @@ from decimal import Decimal
 from .models import TaxRule, SuggestionMatrix
 from .services.calculator import TaxCalculator
 from .services.analyzer import ImpactAnalyzer
+from .services.rate_table import RateTable
+from .services.suggestion_index import SuggestionIndex
 
 class CacheSystemTest(TestCase):
     def setUp(self):
         cache.clear()
+        RateTable.invalidate()
+        SuggestionIndex.invalidate()
         # Limpa dados de migrações para evitar conflitos
         TaxRule.objects.all().delete()
         SuggestionMatrix.objects.all().delete()
@@ -25,47 +29,122 @@ class CacheSystemTest(TestCase):
         )
 
     def test_tax_rate_caching(self):
-        # Primeira chamada: popula o cache
+        # Primeira chamada: compila a tabela em memória
         rate = TaxCalculator.get_rate('SIMPLES_NACIONAL')
         self.assertEqual(rate, Decimal('0.1500'))
         
-        # Verifica se está no cache
-        self.assertIsNotNone(cache.get('tax_rate_SIMPLES_NACIONAL'))
+        # A tabela fica no processo, sem passar pelo cache do Django
+        self.assertIsNotNone(RateTable._current)
+        self.assertIsNone(cache.get('tax_rate_SIMPLES_NACIONAL'))
 
-        # Altera no banco sem usar o ORM save (direto via update) para não disparar o signal
-        TaxRule.objects.filter(id=self.rule.id).update(rate=Decimal('0.2000'))
-        
-        # A chamada ainda deve retornar o valor antigo do cache
-        rate_cached = TaxCalculator.get_rate('SIMPLES_NACIONAL')
+        # Chamadas seguintes não consultam o banco
+        with self.assertNumQueries(0):
+            rate_cached = TaxCalculator.get_rate('SIMPLES_NACIONAL')
         self.assertEqual(rate_cached, Decimal('0.1500'))
 
+        # Update em massa não dispara o signal, mas incrementa a geração (GenerationQuerySet)
+        TaxRule.objects.filter(id=self.rule.id).update(rate=Decimal('0.2000'))
+        self.assertIsNone(RateTable._current)
+        self.assertEqual(TaxCalculator.get_rate('SIMPLES_NACIONAL'), Decimal('0.2000'))
+
     def test_tax_rate_invalidation(self):
-        # Popula cache
+        # Popula a tabela
         TaxCalculator.get_rate('SIMPLES_NACIONAL')
         
         # Altera via ORM save (dispara signal)
         self.rule.rate = Decimal('0.2500')
         self.rule.save()
         
-        # O cache deve estar limpo
-        self.assertIsNone(cache.get('tax_rate_SIMPLES_NACIONAL'))
+        # A tabela deve ter sido descartada
+        self.assertIsNone(RateTable._current)
         
         # Nova chamada deve trazer o valor novo
         rate_new = TaxCalculator.get_rate('SIMPLES_NACIONAL')
         self.assertEqual(rate_new, Decimal('0.2500'))
 
+    def test_tax_rate_rule_type_change_invalidates_old_key(self):
+        TaxCalculator.get_rate('SIMPLES_NACIONAL')
+
+        self.rule.rule_type = 'LUCRO_PRESUMIDO'
+        self.rule.save()
+
+        self.assertEqual(TaxCalculator.get_rate('SIMPLES_NACIONAL'), TaxCalculator.FALLBACK_RATES['SIMPLES_NACIONAL'])
+        self.assertEqual(TaxCalculator.get_rate('LUCRO_PRESUMIDO'), Decimal('0.1500'))
+
+    def test_tax_rate_specificity(self):
+        TaxRule.objects.create(name="Reforma Geral", rule_type='REFORMA', rate=Decimal('0.2650'))
+        TaxRule.objects.create(name="Reforma Serviços", rule_type='REFORMA', sector='SERVICOS', rate=Decimal('0.2800'))
+        TaxRule.objects.create(name="Reforma SP", rule_type='REFORMA', state='SP', rate=Decimal('0.2700'))
+        TaxRule.objects.create(
+            name="Reforma Serviços SP", rule_type='REFORMA', sector='SERVICOS', state='SP', rate=Decimal('0.2900')
+        )
+        TaxRule.objects.create(name="Reforma Inativa", rule_type='REFORMA', sector='COMERCIO', rate=Decimal('0.5000'), is_active=False)
+
+        self.assertEqual(TaxCalculator.get_rate('REFORMA', 'SERVICOS', 'SP'), Decimal('0.2900'))
+        self.assertEqual(TaxCalculator.get_rate('REFORMA', 'SERVICOS', 'RJ'), Decimal('0.2800'))
+        self.assertEqual(TaxCalculator.get_rate('REFORMA', 'COMERCIO', 'SP'), Decimal('0.2700'))
+        self.assertEqual(TaxCalculator.get_rate('REFORMA', 'COMERCIO', 'RJ'), Decimal('0.2650'))
+        self.assertEqual(TaxCalculator.get_rate('REFORMA', 'OUTROS'), Decimal('0.2650'))
+        self.assertEqual(TaxCalculator.get_rate('REFORMA'), Decimal('0.2650'))
+
+        # Regras repetidas para a mesma chave: prevalece a de menor id (determinístico)
+        TaxRule.objects.create(name="Reforma Geral Duplicada", rule_type='REFORMA', rate=Decimal('0.3000'))
+        self.assertEqual(TaxCalculator.get_rate('REFORMA', 'COMERCIO', 'RJ'), Decimal('0.2650'))
+
+    def test_calculator_uses_sector_and_state(self):
+        TaxRule.objects.create(name="Reforma SP", rule_type='REFORMA', state='SP', rate=Decimal('0.3000'))
+        company_data = {'tax_regime': 'SIMPLES_NACIONAL', 'sector': 'SERVICOS', 'state': 'SP'}
+        financials = {'monthly_revenue': Decimal('10000.00'), 'costs': Decimal('2000.00')}
+
+        TaxCalculator.get_rate('REFORMA')
+        with self.assertNumQueries(0):
+            current_tax = TaxCalculator.calculate_current_tax(company_data, financials)
+            reform_tax = TaxCalculator.calculate_reform_tax(company_data, financials)
+
+        self.assertEqual(current_tax, Decimal('1500.000000'))
+        self.assertEqual(reform_tax, Decimal('2400.000000'))
+
     def test_suggestion_caching_and_invalidation(self):
-        # Primeira chamada: popula cache
-        suggestions = ImpactAnalyzer.get_suggestions('SERVICOS', 'POSITIVO')
+        # Primeira chamada: compila o índice (uma única consulta)
+        with self.assertNumQueries(1):
+            suggestions = ImpactAnalyzer.get_suggestions('SERVICOS', 'POSITIVO')
         self.assertIn("Sugestão Original", suggestions)
-        
+
+        # O índice fica no processo, sem passar pelo cache do Django
+        with self.assertNumQueries(0):
+            analysis = ImpactAnalyzer.analyze(Decimal('1000.00'), Decimal('900.00'), sector='SERVICOS', uf='SP')
+        self.assertEqual(analysis['suggestions'], ("Sugestão Original",))
+        self.assertIsNone(cache.get('suggestions_SERVICOS_POSITIVO'))
+
         # Altera via save (dispara signal)
         self.suggestion.suggestion_text = "Sugestão Nova"
         self.suggestion.save()
-        
-        # Cache deve estar vazio
-        self.assertIsNone(cache.get('suggestions_SERVICOS_POSITIVO'))
-        
+
+        # O índice deve ter sido descartado
+        self.assertIsNone(SuggestionIndex._current)
+
         # Nova chamada traz dado novo
         suggestions_new = ImpactAnalyzer.get_suggestions('SERVICOS', 'POSITIVO')
         self.assertIn("Sugestão Nova", suggestions_new)
+
+    def test_analysis_texts(self):
+        analysis = ImpactAnalyzer.analyze(Decimal('1000.00'), Decimal('1100.00'), sector='COMERCIO', uf='ES')
+        self.assertEqual(analysis['impact_classification'], 'NEGATIVO')
+        self.assertEqual(analysis['message'], "Sua carga tributária para o setor de Comercio deve aumentar com a reforma.")
+        self.assertEqual(
+            analysis['detalhes_setoriais'],
+            "Análise baseada nas médias nacionais para Comercio. "
+            "Consideradas particularidades da região Espírito Santo no contexto da transição federativa."
+        )
+        self.assertEqual(analysis['suggestions'], ImpactAnalyzer.get_suggestions('COMERCIO', 'NEGATIVO'))
+
+        # Setor fora dos choices: renderizado na hora, com a sugestão padrão
+        analysis = ImpactAnalyzer.analyze(Decimal('1000.00'), Decimal('1000.00'))
+        self.assertEqual(analysis['impact_classification'], 'NEUTRO')
+        self.assertEqual(analysis['detalhes_setoriais'], "Análise baseada nas médias nacionais para Outros.")
+        self.assertEqual(len(analysis['suggestions']), 1)
+
+        # A classificação usa a diferença exata, não as cargas arredondadas ao centavo
+        analysis = ImpactAnalyzer.analyze(Decimal('1000.001000'), Decimal('1000.004000'))
+        self.assertEqual(analysis['impact_classification'], 'NEGATIVO')
+        self.assertEqual(analysis['delta_value'], Decimal('0.003000'))
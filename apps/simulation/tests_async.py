@@ -0,0 +1,111 @@
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken
+from simulation.models import SimulationLog
+from simulation.services.rate_table import RateTable
+from simulation.services.result_cache import SimulationResultCache
+
+
+class AsyncViewsTest(TestCase):
+    """
+    As variantes assíncronas devem responder exatamente como as views síncronas.
+    """
+
+    def setUp(self):
+        cache.clear()
+        RateTable.invalidate()
+        SimulationResultCache.invalidate()
+        self.user = User.objects.create_user(username="asyncuser", password="password123")
+        self.other = User.objects.create_user(username="other", password="password123")
+        self.auth = {'Authorization': f"Bearer {AccessToken.for_user(self.user)}"}
+        self.payload = {
+            "monthly_revenue": 10000.00,
+            "costs": 2000.00,
+            "tax_regime": "SIMPLES_NACIONAL",
+            "sector": "SERVICOS",
+            "state": "SP"
+        }
+
+    def create_logs(self, user, count):
+        for i in range(count):
+            SimulationLog.objects.create(
+                user=user, monthly_revenue=Decimal('10000.00') + i, costs=Decimal('2000.00'),
+                tax_regime='SIMPLES_NACIONAL', sector='COMERCIO' if i % 3 else 'SERVICOS',
+                current_tax_load=Decimal('1000.00'), reform_tax_load=Decimal('2120.00'),
+                delta_value=Decimal('1120.00'), impact_classification='NEGATIVO'
+            )
+
+    async def test_simulate_matches_sync_view(self):
+        sync = await self.async_client.post(
+            reverse('simulate'), self.payload, content_type='application/json', headers=self.auth
+        )
+        SimulationResultCache.invalidate()
+        response = await self.async_client.post(
+            reverse('simulate-async'), self.payload, content_type='application/json', headers=self.auth
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual(response.json()['resultados']['carga_tributaria_reforma'], 2120.0)
+        self.assertEqual(await SimulationLog.objects.filter(user=self.user).acount(), 2)
+
+    async def test_simulate_validation_error(self):
+        response = await self.async_client.post(
+            reverse('simulate-async'), dict(self.payload, costs=20000.00),
+            content_type='application/json', headers=self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('costs', response.json())
+
+    async def test_requires_valid_token(self):
+        response = await self.async_client.post(reverse('simulate-async'), self.payload, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        sync = await self.async_client.get(reverse('simulation-dashboard'), headers={'Authorization': 'Bearer invalido'})
+        response = await self.async_client.get(
+            reverse('simulation-dashboard-async'), headers={'Authorization': 'Bearer invalido'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual(response.headers['WWW-Authenticate'], sync.headers['WWW-Authenticate'])
+
+    def test_history_matches_sync_view(self):
+        self.create_logs(self.user, 12)
+        self.create_logs(self.other, 3)
+        for query in ({}, {'page': 2}, {'page_size': 5, 'page': 2}):
+            sync = self.client.get(reverse('simulation-history'), query, headers=self.auth)
+            response = self.client.get(reverse('simulation-history-async'), query, headers=self.auth)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            expected = sync.json()
+            for link in ('next', 'previous'):
+                if expected[link]:
+                    expected[link] = expected[link].replace('/history/', '/async/history/')
+            self.assertEqual(response.json(), expected)
+
+        response = self.client.get(reverse('simulation-history-async'), {'page': 9}, headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_dashboard_matches_sync_view(self):
+        self.create_logs(self.user, 7)
+        sync = self.client.get(reverse('simulation-dashboard'), headers=self.auth)
+        response = self.client.get(reverse('simulation-dashboard-async'), headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual(response.json()['total_simulacoes'], 7)
+
+    async def test_user_throttle(self):
+        with mock.patch.object(UserRateThrottle, 'THROTTLE_RATES', {'user': '2/min'}):
+            # A cota é a mesma das views síncronas
+            for name in ('simulation-dashboard', 'simulation-dashboard-async'):
+                response = await self.async_client.get(reverse(name), headers=self.auth)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = await self.async_client.get(reverse('simulation-dashboard-async'), headers=self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Limite de requisições excedido", response.json()['detail'])
@@ -0,0 +1,215 @@
+from decimal import Decimal
+import json
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from hypothesis import given, example, settings, strategies as st
+from hypothesis.extra.django import TestCase
+import numpy as np
+from rest_framework import status
+from rest_framework.test import APITestCase
+from companies.models import Company
+from simulation.models import SimulationLog, TaxRule
+from simulation.services.analyzer import ImpactAnalyzer
+from simulation.services.batch import BatchSimulator, to_centavos, to_decimal
+from simulation.services.calculator import TaxCalculator
+from simulation.services.generations import CacheGenerations
+from simulation.services.rate_table import RateTable
+
+QUANTUM = Decimal('0.01')
+
+# Valores pequenos tornam frequentes os empates de arredondamento (meio centavo)
+revenues = st.one_of(st.integers(min_value=1, max_value=10**4), st.integers(min_value=1, max_value=10**15 - 1))
+
+scenario = revenues.flatmap(
+    lambda revenue: st.tuples(
+        st.just(revenue),
+        st.integers(min_value=0, max_value=revenue),
+        st.sampled_from(BatchSimulator.REGIMES),
+        st.sampled_from([*Company.Sector.values, 'OUTROS']),
+        st.sampled_from([None, *Company.UF.values]),
+    )
+)
+
+
+class BatchSimulatorEquivalenceTest(TestCase):
+    """
+    Garante que o motor vetorizado reproduz exatamente o caminho escalar
+    (TaxCalculator + ImpactAnalyzer + quantize).
+    """
+
+    def setUp(self):
+        cache.clear()
+        TaxRule.objects.all().delete()
+        TaxRule.objects.create(name="SN", rule_type='SIMPLES_NACIONAL', rate=Decimal('0.0733'))
+        TaxRule.objects.create(name="SN Serviços", rule_type='SIMPLES_NACIONAL', sector='SERVICOS', rate=Decimal('0.0500'))
+        TaxRule.objects.create(name="SN Indústria", rule_type='SIMPLES_NACIONAL', sector='INDUSTRIA', rate=Decimal('0.0001'))
+        TaxRule.objects.create(name="LP", rule_type='LUCRO_PRESUMIDO', rate=Decimal('0.1633'))
+        TaxRule.objects.create(name="LP SP", rule_type='LUCRO_PRESUMIDO', state='SP', rate=Decimal('0.9999'))
+        TaxRule.objects.create(name="Reforma", rule_type='REFORMA', rate=Decimal('0.2650'))
+        TaxRule.objects.create(name="Reforma Comércio RJ", rule_type='REFORMA', sector='COMERCIO', state='RJ', rate=Decimal('1.2345'))
+        RateTable.invalidate()
+
+    def scalar(self, revenue, costs, regime, sector, state):
+        company_data = {'tax_regime': regime, 'sector': sector, 'state': state}
+        financials = {'monthly_revenue': to_decimal(revenue), 'costs': to_decimal(costs)}
+        current_tax = TaxCalculator.calculate_current_tax(company_data, financials)
+        reform_tax = TaxCalculator.calculate_reform_tax(company_data, financials)
+        analysis = ImpactAnalyzer.analyze(current_tax, reform_tax, sector=sector, uf=state)
+        return {
+            'current_tax_load': current_tax.quantize(QUANTUM),
+            'reform_tax_load': reform_tax.quantize(QUANTUM),
+            'delta_value': analysis['delta_value'].quantize(QUANTUM),
+            'delta_percentage': analysis['delta_percentage'],
+            'impact_classification': analysis['impact_classification'],
+        }
+
+    @settings(max_examples=200, deadline=None)
+    @given(st.lists(scenario, min_size=1, max_size=30))
+    @example([(10, 0, 'SIMPLES_NACIONAL', 'SERVICOS', None), (30, 0, 'SIMPLES_NACIONAL', 'SERVICOS', 'BA')])
+    @example([(10**15 - 1, 0, 'LUCRO_PRESUMIDO', 'COMERCIO', 'SP')])
+    @example([(10**15 - 1, 1, 'SIMPLES_NACIONAL', 'COMERCIO', 'RJ')])
+    @example([(100, 100, 'SIMPLES_NACIONAL', 'SERVICOS', None)])
+    def test_matches_scalar_path(self, rows):
+        revenue, costs, regime, sector, state = zip(*rows)
+        result = BatchSimulator.run(
+            np.array(revenue), np.array(costs), np.array(regime),
+            np.array(sector), np.array(state, dtype=object)
+        )
+        for index, row in enumerate(rows):
+            self.assertEqual(result.row(index), self.scalar(*row), row)
+
+
+class BatchSimulatorTest(TestCase):
+    def setUp(self):
+        RateTable.invalidate()
+
+    def test_simple_batch(self):
+        result = BatchSimulator.run(
+            to_centavos([Decimal('10000.00'), Decimal('10000.00')]),
+            to_centavos([Decimal('2000.00'), Decimal('9000.00')]),
+            ['SIMPLES_NACIONAL', 'LUCRO_PRESUMIDO'],
+            ['SERVICOS', 'COMERCIO'],
+            ['SP', None],
+        )
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result.current_tax.tolist(), [100000, 163300])
+        self.assertEqual(result.reform_tax.tolist(), [212000, 26500])
+        self.assertEqual(result.delta_value.tolist(), [112000, -136800])
+        self.assertEqual(result.delta_percentage.tolist(), [11200, -8377])
+        self.assertEqual(result.impact_classification.tolist(), ['NEGATIVO', 'POSITIVO'])
+
+    def test_invalid_regime(self):
+        with self.assertRaises(ValueError):
+            BatchSimulator.run([100], [0], ['MEI'], ['SERVICOS'], ['SP'])
+
+    def test_invalid_amounts(self):
+        with self.assertRaises(ValueError):
+            BatchSimulator.run([100], [-1], ['SIMPLES_NACIONAL'], ['SERVICOS'], ['SP'])
+        with self.assertRaises(ValueError):
+            to_centavos([Decimal('1.001')])
+
+
+class SimulationBatchAPITest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        RateTable.invalidate()
+        self.user = User.objects.create_user(username="batchuser", password="password123")
+        self.other = User.objects.create_user(username="other", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('simulate-batch')
+
+    def company(self, user, cnpj):
+        return Company.objects.create(
+            user=user, name="Empresa", cnpj=cnpj, monthly_revenue=Decimal('10000.00'),
+            sector='SERVICOS', state='SP', tax_regime='SIMPLES_NACIONAL'
+        )
+
+    def test_batch_results_and_errors_in_input_order(self):
+        own = self.company(self.user, "11.222.333/0001-81")
+        foreign = self.company(self.other, "11.444.777/0001-61")
+        scenarios = [
+            {"monthly_revenue": 10000.00, "costs": 2000.00, "tax_regime": "SIMPLES_NACIONAL", "sector": "SERVICOS"},
+            {"monthly_revenue": 1000.00, "costs": 2000.00, "tax_regime": "SIMPLES_NACIONAL", "sector": "SERVICOS"},
+            {"monthly_revenue": 10000.00, "costs": 9000.00, "tax_regime": "LUCRO_PRESUMIDO", "sector": "COMERCIO",
+             "state": "RJ", "company_id": own.id},
+            {"monthly_revenue": 10000.00, "costs": 0, "tax_regime": "SIMPLES_NACIONAL", "sector": "SERVICOS",
+             "company_id": foreign.id},
+        ]
+        response = self.client.post(self.url, {"scenarios": scenarios}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['total'], response.data['sucesso'], response.data['erros']), (4, 2, 2))
+        items = response.data['itens']
+        self.assertEqual([item['indice'] for item in items], [0, 1, 2, 3])
+        self.assertEqual([item['status'] for item in items], ['ok', 'erro', 'ok', 'erro'])
+        self.assertIn('costs', items[1]['erros'])
+        self.assertIn('company_id', items[3]['erros'])
+        self.assertEqual(items[0]['resultados']['diferenca_absoluta'], Decimal('1120.00'))
+        self.assertEqual(items[2]['classificacao_impacto'], 'POSITIVO')
+
+        logs = SimulationLog.objects.filter(user=self.user)
+        self.assertEqual(logs.count(), 2)
+        log = logs.get(id=items[2]['id'])
+        self.assertEqual(log.company_id, own.id)
+        self.assertEqual(log.current_tax_load, Decimal('1633.00'))
+        self.assertEqual(log.reform_tax_load, Decimal('265.00'))
+
+    @override_settings(SIMULATION_BATCH_MAX_ITEMS=2)
+    def test_batch_limit(self):
+        scenario = {"monthly_revenue": 100, "costs": 0, "tax_regime": "SIMPLES_NACIONAL", "sector": "SERVICOS"}
+        response = self.client.post(self.url, {"scenarios": [scenario] * 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(SimulationLog.objects.count(), 0)
+
+    @override_settings(SIMULATION_BATCH_CHUNK_SIZE=10, SIMULATION_GENERATION_CHECK_INTERVAL=60)
+    def test_batch_bulk_insert(self):
+        scenario = {"monthly_revenue": 100, "costs": 0, "tax_regime": "SIMPLES_NACIONAL", "sector": "SERVICOS"}
+        CacheGenerations.check()
+        RateTable.current()
+        # Gerações lidas há menos de SIMULATION_GENERATION_CHECK_INTERVAL:
+        # 1 (savepoint) + 3 INSERTs em lotes de 10 + 1 (release)
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, {"scenarios": [scenario] * 25}, format='json')
+        self.assertEqual(response.data['sucesso'], 25)
+        self.assertEqual(SimulationLog.objects.count(), 25)
+
+
+class SimulationSweepAPITest(APITestCase):
+    def setUp(self):
+        RateTable.invalidate()
+        self.user = User.objects.create_user(username="sweepuser", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('simulate-sweep')
+        self.payload = {
+            "monthly_revenue": {"start": 10000, "stop": 30000, "step": 10000},
+            "costs": {"start": 0, "stop": 20000, "step": 5000},
+            "tax_regime": "SIMPLES_NACIONAL",
+            "sector": "SERVICOS",
+            "states": ["SP", "RJ"],
+        }
+
+    def test_sweep_streams_grid_without_logging(self):
+        response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        cells = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        # Custos acima do faturamento ficam fora da grade (15.000 e 20.000 sobre 10.000, em cada UF)
+        self.assertEqual(len(cells), 26)
+        self.assertEqual((response['X-Grid-Cells'], response['X-Grid-Dropped']), ('26', '4'))
+        self.assertTrue(all(cell['custos'] <= cell['faturamento'] for cell in cells))
+        self.assertEqual({cell['estado'] for cell in cells}, {'SP', 'RJ'})
+        first = cells[0]
+        self.assertEqual(first['faturamento'], 10000.00)
+        self.assertEqual(first['carga_tributaria_atual'], 1000.00)
+        self.assertEqual(first['carga_tributaria_reforma'], 2650.00)
+        self.assertEqual(first['classificacao_impacto'], 'NEGATIVO')
+        self.assertEqual(SimulationLog.objects.count(), 0)
+
+    @override_settings(SIMULATION_SWEEP_MAX_CELLS=29)
+    def test_sweep_cell_cap(self):
+        response = self.client.post(self.url, self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,90 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.urls import reverse
+from hypothesis import given, settings, strategies as st
+from hypothesis.extra.django import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.models import TaxRule
+from simulation.services.batch import BatchSimulator, to_centavos
+from simulation.services.break_even import BreakEvenSolver
+from simulation.services.rate_table import RateTable
+
+
+class BreakEvenSolverTest(TestCase):
+    def setUp(self):
+        RateTable.invalidate()
+
+    def test_break_even_default_rates(self):
+        # 10.000 x 0,10 = 1.000 ; (10.000 - c) x 0,265 = 1.000 -> c = 6.226,415...
+        [result] = BreakEvenSolver.solve([Decimal('10000.00')], 'SIMPLES_NACIONAL', 'SERVICOS')
+        self.assertEqual(result['custo_equilibrio'], Decimal('6226.42'))
+        self.assertEqual(result['margem_equilibrio_percentual'], Decimal('37.74'))
+        self.assertEqual(result['custo_equilibrio_percentual'], Decimal('62.26'))
+        self.assertEqual(result['faixas']['NEGATIVO'], {'de': Decimal('0.00'), 'ate': Decimal('6226.41')})
+        self.assertIsNone(result['faixas']['NEUTRO'])
+        self.assertEqual(result['faixas']['POSITIVO'], {'de': Decimal('6226.42'), 'ate': Decimal('10000.00')})
+
+    def test_exact_neutral_point(self):
+        TaxRule.objects.create(name="SN", rule_type='SIMPLES_NACIONAL', sector='COMERCIO', rate=Decimal('0.1325'))
+        [result] = BreakEvenSolver.solve([Decimal('10000.00')], 'SIMPLES_NACIONAL', 'COMERCIO')
+        self.assertEqual(result['faixas']['NEUTRO'], {'de': Decimal('5000.00'), 'ate': Decimal('5000.00')})
+        self.assertEqual(result['faixas']['NEGATIVO']['ate'], Decimal('4999.99'))
+        self.assertEqual(result['faixas']['POSITIVO']['de'], Decimal('5000.01'))
+
+    def test_always_positive_when_current_rate_exceeds_reform(self):
+        TaxRule.objects.create(name="LP", rule_type='LUCRO_PRESUMIDO', state='AM', rate=Decimal('0.3000'))
+        [result] = BreakEvenSolver.solve([Decimal('100.00')], 'LUCRO_PRESUMIDO', 'INDUSTRIA', 'AM')
+        # Sem ponto de equilíbrio entre 0 e o faturamento (seria um custo negativo)
+        self.assertIsNone(result['custo_equilibrio'])
+        self.assertIsNone(result['custo_equilibrio_percentual'])
+        self.assertIsNone(result['margem_equilibrio_percentual'])
+        self.assertIsNone(result['faixas']['NEGATIVO'])
+        self.assertIsNone(result['faixas']['NEUTRO'])
+        self.assertEqual(result['faixas']['POSITIVO'], {'de': Decimal('0.00'), 'ate': Decimal('100.00')})
+
+    @settings(max_examples=100, deadline=None)
+    @given(
+        st.integers(min_value=1, max_value=10**13),
+        st.sampled_from(BatchSimulator.REGIMES),
+        st.sampled_from(['SERVICOS', 'COMERCIO', 'INDUSTRIA']),
+    )
+    def test_boundaries_match_batch_classification(self, revenue, regime, sector):
+        [result] = BreakEvenSolver.solve([revenue / Decimal(100)], regime, sector)
+        if result['custo_equilibrio'] is not None:
+            self.assertTrue(0 <= result['custo_equilibrio'] <= result['faturamento'])
+        for label, interval in result['faixas'].items():
+            if interval is None:
+                continue
+            costs = to_centavos([interval['de'], interval['ate']])
+            batch = BatchSimulator.run([revenue, revenue], costs, [regime] * 2, [sector] * 2, [None, None])
+            self.assertEqual(batch.impact_classification.tolist(), [label, label])
+
+
+class BreakEvenAPITest(APITestCase):
+    def setUp(self):
+        RateTable.invalidate()
+        self.user = User.objects.create_user(username="beuser", password="password123")
+        self.client.force_authenticate(user=self.user)
+
+    def test_break_even_vector(self):
+        response = self.client.post(reverse('break-even'), {
+            "monthly_revenues": [10000.00, 20000.00, 50000.00],
+            "tax_regime": "LUCRO_PRESUMIDO",
+            "sector": "SERVICOS",
+            "state": "SP"
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['aliquota_atual'], Decimal('0.1633'))
+        self.assertEqual(len(response.data['resultados']), 3)
+        self.assertEqual(
+            [item['faturamento'] for item in response.data['resultados']],
+            [Decimal('10000.00'), Decimal('20000.00'), Decimal('50000.00')]
+        )
+
+    def test_break_even_requires_revenue(self):
+        response = self.client.post(reverse('break-even'), {
+            "tax_regime": "LUCRO_PRESUMIDO", "sector": "SERVICOS"
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
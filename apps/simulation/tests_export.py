@@ -0,0 +1,282 @@
+import csv
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from io import BytesIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+import pyarrow as pa
+import pyarrow.parquet as pq
+from rest_framework import status
+from rest_framework.test import APITestCase
+from companies.models import Company
+from simulation.models import SimulationLog
+from simulation.services.export_cache import ExportCache
+from simulation.services.export_cursor import ExportCursor
+from simulation.services.exporter import DataExporter
+from simulation.services.generations import CacheGenerations
+
+
+@override_settings(SIMULATION_EXPORT_CHUNK_SIZE=10)
+class HistoryExportTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = override_settings(SIMULATION_EXPORT_CACHE_DIR=self.tmp.name, SIMULATION_EXPORT_CACHE_MAX_BYTES=512 * 1024 * 1024)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+        self.user = User.objects.create_user(username="exporter", password="password123")
+        self.client.force_authenticate(user=self.user)
+        companies = [
+            Company.objects.create(
+                user=self.user, name=f"Empresa {index}", cnpj=cnpj, monthly_revenue=Decimal('10000.00'),
+                sector=Company.Sector.SERVICES, state=Company.UF.SP, tax_regime=Company.TaxRegime.SIMPLES_NACIONAL
+            )
+            for index, cnpj in enumerate(["11.222.333/0001-81", "11.444.777/0001-61"])
+        ]
+        SimulationLog.objects.bulk_create([
+            SimulationLog(
+                user=self.user, company=companies[index % 3] if index % 3 < 2 else None,
+                monthly_revenue=Decimal('10000.00'), costs=Decimal('2000.50'), tax_regime='SIMPLES_NACIONAL',
+                sector='SERVICOS', state='SP' if index % 2 else None, current_tax_load=Decimal('1000.00'),
+                reform_tax_load=Decimal('2120.00'), delta_value=Decimal('1120.00'), impact_classification='NEGATIVO'
+            )
+            for index in range(25)
+        ])
+        self.url = reverse('simulation-history-export')
+
+
+class CSVExportTest(HistoryExportTestCase):
+    def test_streams_with_constant_queries(self):
+        CacheGenerations.check()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('historico_simulacoes_', response['Content-Disposition'])
+
+        # Um único SELECT (com JOIN da empresa) para os 25 registros
+        with self.assertNumQueries(1):
+            chunks = list(response.streaming_content)
+        # Cabeçalho + 3 blocos de até 10 linhas
+        self.assertEqual(len(chunks), 4)
+
+    def test_format_preserves_bom_and_delimiter(self):
+        content = b''.join(self.client.get(self.url).streaming_content).decode('utf-8')
+
+        self.assertTrue(content.startswith('\ufeff'))
+        rows = list(csv.reader(content[1:].splitlines(), delimiter=';'))
+        self.assertEqual(rows[0], DataExporter.HEADERS)
+        self.assertEqual(len(rows), 26)
+        names = {row[2] for row in rows[1:]}
+        self.assertEqual(names, {"Empresa 0", "Empresa 1", "Não Identificada"})
+        self.assertEqual({row[5] for row in rows[1:]}, {"SP", "N/A"})
+        self.assertEqual(rows[1][6:8], ["10000.0", "2000.5"])
+
+    def test_header_is_sent_before_querying(self):
+        chunks = DataExporter.iter_csv(SimulationLog.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(next(chunks), '\ufeff' + ';'.join(DataExporter.HEADERS) + '\r\n')
+        self.assertEqual(DataExporter.export_to_csv(SimulationLog.objects.all()).getvalue().count(b'\r\n'), 26)
+
+
+class ExcelExportTest(HistoryExportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('simulation-history-export-excel')
+
+    def test_workbook_rows_and_column_widths(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ws = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+
+        rows = list(ws.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), DataExporter.HEADERS)
+        self.assertEqual(len(rows), 26)
+        self.assertIsInstance(rows[1][1], datetime)
+        self.assertEqual(ws['B2'].number_format, 'DD/MM/YYYY HH:MM')
+        # Largura calculada antes das linhas: cabeçalho ou maior valor, + 2
+        self.assertEqual(ws.column_dimensions['C'].width, len("Não Identificada") + 2)
+        self.assertEqual(ws.column_dimensions['G'].width, len("Faturamento Mensal (R$)") + 2)
+        self.assertEqual(ws.column_dimensions['K'].width, len("Diferença (Delta R$)") + 2)
+
+    def test_spills_to_disk_above_threshold(self):
+        in_memory = DataExporter.export_to_excel(SimulationLog.objects.all())
+        self.addCleanup(in_memory.close)
+        self.assertFalse(in_memory._rolled)
+
+        with override_settings(SIMULATION_EXPORT_SPOOL_MAX_SIZE=1024):
+            on_disk = DataExporter.export_to_excel(SimulationLog.objects.all())
+        self.addCleanup(on_disk.close)
+        self.assertTrue(on_disk._rolled)
+        self.assertEqual(load_workbook(on_disk).active.max_row, 26)
+
+
+class ColumnarExportTest(HistoryExportTestCase):
+    def download(self, export_format):
+        response = self.client.get(self.url, {'format': export_format})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn(f'.{export_format}"', response['Content-Disposition'])
+        return BytesIO(b''.join(response.streaming_content))
+
+    def test_parquet_types_and_values(self):
+        table = pq.read_table(self.download('parquet'))
+
+        self.assertEqual(table.num_rows, 25)
+        self.assertEqual(table.schema.field('costs_centavos').type, pa.int64())
+        self.assertTrue(pa.types.is_dictionary(table.schema.field('sector').type))
+        self.assertTrue(pa.types.is_timestamp(table.schema.field('created_at').type))
+        self.assertEqual(set(table['costs_centavos'].to_pylist()), {200050})
+        self.assertEqual(set(table['company'].to_pylist()), {"Empresa 0", "Empresa 1", None})
+        self.assertEqual(set(table['state'].to_pylist()), {'SP', None})
+        self.assertEqual(table['tax_regime'].chunk(0).dictionary.to_pylist(), ['SIMPLES_NACIONAL'])
+
+    def test_arrow_written_in_record_batches(self):
+        # Código fora dos choices também entra no dicionário
+        SimulationLog.objects.filter(pk=SimulationLog.objects.order_by('id').first().pk).update(sector='OUTRO')
+        reader = pa.ipc.open_file(self.download('arrow'))
+
+        self.assertEqual(reader.num_record_batches, 3)
+        table = reader.read_all()
+        self.assertEqual(table.num_rows, 25)
+        self.assertEqual(table['sector'].chunk(0).dictionary.to_pylist(), ['SERVICOS', 'OUTRO'])
+        self.assertEqual(table['sector'].to_pylist().count('OUTRO'), 1)
+
+    def test_format_query_param_selects_excel(self):
+        response = self.client.get(self.url, {'format': 'excel'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('.xlsx', response['Content-Disposition'])
+
+
+class IncrementalExportTest(HistoryExportTestCase):
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        ids = [int(row[0]) for row in csv.reader(content[1:].splitlines()[1:], delimiter=';')]
+        return ids, response
+
+    def test_filters_are_applied_in_sql(self):
+        self.assertEqual(len(self.export(state='SP')[0]), 12)
+        self.assertEqual(len(self.export(state=['SP', 'RJ'], sector='SERVICOS')[0]), 12)
+        company = Company.objects.get(name="Empresa 1")
+        self.assertEqual(len(self.export(company=company.pk)[0]), 8)
+        self.assertEqual(self.export(created_before='2000-01-01')[0], [])
+
+        response = self.client.get(self.url, {'sector': 'INEXISTENTE'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pages_in_keyset_order(self):
+        # Empates em created_at são desempatados pelo id
+        ids = list(SimulationLog.objects.order_by('id').values_list('id', flat=True))
+        SimulationLog.objects.filter(id__in=ids[5:15]).update(created_at=timezone.now())
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {'page_size': 10, **({'since': cursor} if cursor else {})}
+            page, response = self.export(**params)
+            seen += page
+            pages += 1
+            cursor = response['X-Next-Cursor']
+            if response['X-Has-More'] == 'false':
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), ids)
+        self.assertEqual(len(seen), len(set(seen)))
+
+        # Nada novo: página vazia e o mesmo cursor
+        page, response = self.export(since=cursor)
+        self.assertEqual((page, response['X-Next-Cursor']), ([], cursor))
+
+        late = SimulationLog.objects.create(
+            user=self.user, monthly_revenue=Decimal('1.00'), costs=Decimal('0.00'), tax_regime='SIMPLES_NACIONAL',
+            sector='SERVICOS', current_tax_load=Decimal('0.00'), reform_tax_load=Decimal('0.00'),
+            delta_value=Decimal('0.00'), impact_classification='NEUTRO'
+        )
+        self.assertEqual(self.export(since=cursor)[0], [late.pk])
+
+    def test_full_export_returns_cursor_for_next_sync(self):
+        ids, response = self.export()
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(response['X-Has-More'], 'false')
+        self.assertEqual(self.export(since=response['X-Next-Cursor'])[0], [])
+
+    def test_invalid_cursor_and_page_size(self):
+        _, response = self.export(page_size=1)
+        tampered = response['X-Next-Cursor'][:-2] + 'xx'
+        for params in ({'since': tampered}, {'since': 'abc'}, {'page_size': 0}, {'page_size': 'dez'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class ExportCacheTest(HistoryExportTestCase):
+    def download(self, url=None, **headers):
+        response = self.client.get(url or self.url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content), response
+
+    def test_repeat_is_served_from_cache(self):
+        content, first = self.download()
+        self.assertNotIn('Content-Length', first)
+        self.assertEqual(os.listdir(self.tmp.name), [first['ETag'].strip('"')])
+
+        # Repetições não consomem a cota de exportações (10/min)
+        for _ in range(11):
+            cached, response = self.download()
+        self.assertEqual(cached, content)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertEqual((response['ETag'], response['X-Has-More']), (first['ETag'], first['X-Has-More']))
+        self.assertEqual(ExportCursor.decode(response['X-Next-Cursor']), ExportCursor.decode(first['X-Next-Cursor']))
+
+        # Outro formato ou outros filtros geram outro arquivo
+        self.assertNotEqual(self.download(self.url + '?format=parquet')[1]['ETag'], first['ETag'])
+        self.assertNotEqual(self.download(self.url + '?state=SP')[1]['ETag'], first['ETag'])
+        self.assertEqual(len(os.listdir(self.tmp.name)), 3)
+
+        excel_url = reverse('simulation-history-export-excel')
+        workbook, response = self.download(excel_url)
+        self.assertEqual(self.download(excel_url, if_none_match='"outro"')[0], workbook)
+        self.assertEqual(load_workbook(BytesIO(workbook)).active.max_row, 26)
+
+    def test_not_modified_until_data_changes(self):
+        _, first = self.download()
+        for _ in range(11):
+            response = self.client.get(self.url, headers={'if-none-match': first['ETag']})
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], first['ETag'])
+
+        log = SimulationLog.objects.first()
+        log.delta_value = Decimal('0.00')
+        log.save()
+        content, response = self.download(if_none_match=first['ETag'])
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertIn(b';0.0;', content)
+
+        # Renomear a empresa também muda a versão (o nome vai no arquivo)
+        Company.objects.filter(name="Empresa 0").first().save()
+        self.assertNotEqual(self.download()[1]['ETag'], response['ETag'])
+
+    def test_interrupted_download_is_not_cached(self):
+        response = self.client.get(self.url)
+        next(iter(response.streaming_content))
+        response.close()
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_evicts_least_recently_used(self):
+        for age, key in enumerate(['c', 'b', 'a']):
+            with open(os.path.join(self.tmp.name, key), 'wb') as output:
+                output.write(b'x' * 100)
+            os.utime(os.path.join(self.tmp.name, key), (1000 - age, 1000 - age))
+        # Usar 'a' (o mais antigo) o torna o mais recente
+        ExportCache.get('a').close()
+
+        with override_settings(SIMULATION_EXPORT_CACHE_MAX_BYTES=250):
+            self.assertEqual(ExportCache.evict(), 1)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['a', 'c'])
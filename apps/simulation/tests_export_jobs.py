@@ -0,0 +1,178 @@
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.models import ExportJob, SimulationLog
+from simulation.services import export_jobs
+from simulation.services.export_jobs import ExportJobRunner
+from simulation.services.process_pool import ExportPool, ProcessPool
+
+
+class ExportJobTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = override_settings(
+            SIMULATION_EXPORT_JOBS_MODE='worker', SIMULATION_EXPORT_DIR=self.tmp.name, SIMULATION_EXPORT_CHUNK_SIZE=10
+        )
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+        self.user = User.objects.create_user(username="exporter", password="password123")
+        self.client.force_authenticate(user=self.user)
+        SimulationLog.objects.bulk_create([
+            SimulationLog(
+                user=self.user, monthly_revenue=Decimal('10000.00'), costs=Decimal('2000.00'),
+                tax_regime='SIMPLES_NACIONAL', sector='SERVICOS', state='SP', current_tax_load=Decimal('1000.00'),
+                reform_tax_load=Decimal('2120.00'), delta_value=Decimal('1120.00'), impact_classification='NEGATIVO'
+            )
+            for _ in range(25)
+        ])
+
+    def create(self, export_format='CSV'):
+        response = self.client.post(reverse('export-jobs-list'), {"export_format": export_format}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], ExportJob.Status.PENDING)
+        self.assertIsNone(response.data['download_url'])
+        return ExportJob.objects.get(pk=response.data['id'])
+
+    def poll(self, job):
+        response = self.client.get(reverse('export-jobs-detail', args=[job.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_worker_runs_job_and_download(self):
+        job = self.create()
+        # Logs criados depois do pedido não entram na exportação
+        late = SimulationLog.objects.create(
+            user=self.user, monthly_revenue=Decimal('1.00'), costs=Decimal('0.00'), tax_regime='SIMPLES_NACIONAL',
+            sector='SERVICOS', current_tax_load=Decimal('0.00'), reform_tax_load=Decimal('0.00'),
+            delta_value=Decimal('0.00'), impact_classification='NEUTRO'
+        )
+        SimulationLog.objects.filter(pk=late.pk).update(created_at=job.created_at + timedelta(seconds=1))
+
+        download = self.client.get(reverse('export-jobs-download', args=[job.pk]))
+        self.assertEqual(download.status_code, status.HTTP_409_CONFLICT)
+
+        call_command('export_worker', '--once', stdout=StringIO())
+
+        data = self.poll(job)
+        self.assertEqual(data['status'], ExportJob.Status.DONE)
+        self.assertEqual((data['rows_done'], data['total_rows'], data['progresso']), (25, 25, 100.0))
+        self.assertTrue(data['download_url'].endswith(reverse('export-jobs-download', args=[job.pk])))
+
+        response = self.client.get(data['download_url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('historico_simulacoes_', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        self.assertEqual(content.count('\r\n'), 26)
+
+        # Job de outro usuário não é visível
+        other = User.objects.create_user(username="other", password="password123")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(data['download_url']).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_excel_job_reports_progress_per_chunk(self):
+        job = self.create('EXCEL')
+        with CaptureQueriesContext(connection) as queries:
+            ExportJobRunner.run(job)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE') and '"rows_done"' in query['sql']]
+        # Progresso a cada bloco de 10 linhas (10, 20, 25) e o save final
+        self.assertEqual(len(updates), 4)
+        self.assertEqual(job.rows_done, 25)
+        # Job já executado não é reservado de novo
+        self.assertFalse(ExportJobRunner.claim(job))
+
+        response = self.client.get(self.poll(job)['download_url'])
+        ws = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(ws.max_row, 26)
+
+    def test_pool_mode_submits_after_commit(self):
+        with override_settings(SIMULATION_EXPORT_JOBS_MODE='pool'), \
+                mock.patch('simulation.services.export_jobs.ExportPool.map') as pool_map:
+            with self.captureOnCommitCallbacks(execute=True):
+                job = self.create()
+                pool_map.assert_not_called()
+        pool_map.assert_called_once_with(export_jobs._run_export, [(job.pk,)])
+
+        # O que o processo do pool executa
+        export_jobs._run_export(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.DONE)
+
+    @override_settings(SIMULATION_POOL_WORKERS=8, SIMULATION_EXPORT_POOL_WORKERS=1)
+    def test_export_pool_is_separate(self):
+        # Exportações não disputam os processos do Monte Carlo
+        self.assertEqual((ProcessPool.max_workers(), ExportPool.max_workers()), (8, 1))
+        self.assertIsNot(ExportPool._lock, ProcessPool._lock)
+
+    def test_run_export_logs_errors(self):
+        with self.assertLogs('simulation.services.export_jobs', 'ERROR') as logs:
+            export_jobs._run_export(0)
+        self.assertIn("Falha ao executar a exportação 0", logs.output[0])
+
+    def test_cleanup_resubmits_lost_pending_jobs(self):
+        # Job enviado a um pool encerrado antes de executá-lo (ex.: reinício do servidor)
+        job = self.create()
+        recent = self.create()
+        ExportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        # No modo 'worker' o export_worker executa os pendentes: nada é reenviado
+        self.assertEqual(ExportJobRunner.cleanup(), (0, 0, 0))
+
+        with override_settings(SIMULATION_EXPORT_JOBS_MODE='pool'), \
+                mock.patch('simulation.services.export_jobs.ExportPool.map') as pool_map:
+            with self.assertLogs('simulation.services.export_jobs', 'WARNING'):
+                self.poll(job)
+            pool_map.assert_called_once_with(export_jobs._run_export, [(job.pk,)])
+            # Reenviado no máximo uma vez por período
+            self.assertEqual(ExportJobRunner.cleanup(), (0, 0, 0))
+
+        export_jobs._run_export(job.pk)
+        self.assertEqual(self.poll(job)['status'], ExportJob.Status.DONE)
+        self.assertEqual(self.poll(recent)['status'], ExportJob.Status.PENDING)
+
+    def test_failure_removes_partial_file(self):
+        job = self.create()
+        with mock.patch('simulation.services.export_jobs.DataExporter.iter_csv', side_effect=RuntimeError("disco cheio")):
+            with self.assertLogs('simulation.services.export_jobs', 'ERROR'), self.assertRaises(RuntimeError):
+                ExportJobRunner.run(job)
+
+        data = self.poll(job)
+        self.assertEqual((data['status'], data['error']), (ExportJob.Status.FAILED, "disco cheio"))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_cleanup_expires_files_and_stale_jobs(self):
+        done = ExportJobRunner.run(self.create())
+        path = ExportJobRunner.path(done)
+        self.assertTrue(os.path.exists(path))
+
+        stale = self.create()
+        ExportJob.objects.filter(pk=stale.pk).update(
+            status=ExportJob.Status.RUNNING, updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(ExportJobRunner.cleanup(), (0, 1, 0))
+
+        ExportJob.objects.filter(pk=done.pk).update(expires_at=timezone.now())
+        self.assertEqual(ExportJobRunner.cleanup(), (1, 0, 0))
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.poll(done)['status'], ExportJob.Status.EXPIRED)
+        self.assertEqual(
+            self.client.get(reverse('export-jobs-download', args=[done.pk])).status_code, status.HTTP_410_GONE
+        )
+        self.assertEqual(self.poll(stale)['status'], ExportJob.Status.FAILED)
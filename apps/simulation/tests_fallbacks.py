@@ -0,0 +1,88 @@
+import time
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.models import SuggestionMatrix, TaxRule
+from simulation.services.analyzer import ImpactAnalyzer
+from simulation.services.fallbacks import FallbackCounter
+from simulation.services.rate_table import FALLBACK_RATES, RateTable
+from simulation.services.suggestion_index import DEFAULT_SUGGESTIONS, SuggestionIndex
+
+
+@override_settings(SIMULATION_FALLBACK_TTL=60)
+class FallbackTest(APITestCase):
+    def setUp(self):
+        TaxRule.objects.all().delete()
+        SuggestionMatrix.objects.all().delete()
+        TaxRule.objects.create(name="Reforma", rule_type='REFORMA', rate=Decimal('0.2650'))
+        RateTable.invalidate()
+        SuggestionIndex.invalidate()
+        FallbackCounter.reset()
+
+    def test_missing_rule_type_is_counted(self):
+        table = RateTable.current()
+        self.assertEqual(table.rate('SIMPLES_NACIONAL', 'SERVICOS', 'SP'), FALLBACK_RATES['SIMPLES_NACIONAL'])
+        table.rate('SIMPLES_NACIONAL', 'SERVICOS', 'SP')
+        table.rate('SIMPLES_NACIONAL', 'OUTROS')
+        table.rate('REFORMA', 'SERVICOS', 'SP')
+
+        stats = FallbackCounter.stats()
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(stats['por_chave'][0], {'tipo': 'aliquota', 'chave': 'SIMPLES_NACIONAL|SERVICOS|SP', 'ocorrencias': 2})
+
+    def test_table_with_fallbacks_expires(self):
+        table = RateTable.current()
+        self.assertIs(RateTable.current(), table)
+
+        # Regra criada sem signal nem geração (ex.: SQL direto): só aparece após o TTL
+        TaxRule._base_manager.bulk_create([TaxRule(name="SN", rule_type='SIMPLES_NACIONAL', rate=Decimal('0.0800'))])
+        with self.assertNumQueries(0):
+            self.assertIs(RateTable.current(), table)
+
+        with mock.patch('simulation.services.compiled.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(RateTable.current().get('SIMPLES_NACIONAL'), Decimal('0.0800'))
+
+    def test_complete_table_has_no_ttl(self):
+        TaxRule.objects.create(name="SN", rule_type='SIMPLES_NACIONAL', rate=Decimal('0.0800'))
+        TaxRule.objects.create(name="LP", rule_type='LUCRO_PRESUMIDO', rate=Decimal('0.1633'))
+        table = RateTable.current()
+
+        self.assertIsNone(table._expires_at)
+        with mock.patch('simulation.services.compiled.time.monotonic', return_value=time.monotonic() + 3600):
+            self.assertIs(RateTable.current(), table)
+
+    def test_missing_suggestions_are_counted_and_expire(self):
+        SuggestionMatrix.objects.create(sector='SERVICOS', impact='NEGATIVO', suggestion_text="Revise contratos.")
+        analysis = ImpactAnalyzer.analyze(Decimal('1000.00'), Decimal('900.00'), sector='SERVICOS')
+        ImpactAnalyzer.analyze(Decimal('1000.00'), Decimal('1100.00'), sector='SERVICOS')
+
+        self.assertEqual(analysis['suggestions'], DEFAULT_SUGGESTIONS)
+        self.assertEqual(FallbackCounter.stats()['por_chave'], [
+            {'tipo': 'sugestao', 'chave': 'SERVICOS|POSITIVO', 'ocorrencias': 1}
+        ])
+        self.assertIsNotNone(SuggestionIndex.current()._expires_at)
+
+    def test_signal_invalidates_negative_entries(self):
+        ImpactAnalyzer.get_suggestions('COMERCIO', 'NEUTRO')
+        SuggestionMatrix.objects.create(sector='COMERCIO', impact='NEUTRO', suggestion_text="Mantenha a precificação.")
+        self.assertEqual(ImpactAnalyzer.get_suggestions('COMERCIO', 'NEUTRO'), ("Mantenha a precificação.",))
+
+    def test_stats_endpoint(self):
+        RateTable.current().rate('LUCRO_PRESUMIDO')
+        url = reverse('fallback-stats')
+        user = User.objects.create_user(username="common", password="password123")
+        self.client.force_authenticate(user=user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 1)
+
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(FallbackCounter.stats()['total'], 0)
@@ -0,0 +1,188 @@
+import multiprocessing
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from unittest import mock
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from simulation.middleware import CacheGenerationMiddleware
+from simulation.models import CacheGeneration, SuggestionMatrix, TaxRule, TransitionSchedule
+from simulation.services.generations import CacheGenerations
+from simulation.services.process_pool import _init_worker
+from simulation.services.projection import TransitionTable
+from simulation.services.rate_table import RateTable
+from simulation.services.result_cache import SimulationResultCache
+from simulation.services.suggestion_index import SuggestionIndex
+
+
+def _snapshot():
+    return {
+        'rate': str(RateTable.current().get('SIMPLES_NACIONAL', 'SERVICOS')),
+        'suggestions': list(SuggestionIndex.current().suggestions('SERVICOS', 'NEGATIVO')),
+    }
+
+
+# Tarefas executadas nos processos do teste multiprocesso (precisam ser importáveis)
+
+def _migrate():
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def _request():
+    """
+    Lê as tabelas dentro de uma "requisição" que passa pelo middleware.
+    """
+    middleware = CacheGenerationMiddleware(lambda request: _snapshot())
+    return middleware(RequestFactory().get('/'))
+
+
+def _bulk_update_rate(rate):
+    TaxRule.objects.filter(rule_type='SIMPLES_NACIONAL').update(rate=Decimal(rate))
+
+
+def _change_rule_type(rate):
+    rule = TaxRule.objects.get(rule_type='LUCRO_PRESUMIDO')
+    rule.rule_type, rule.sector, rule.rate = 'SIMPLES_NACIONAL', 'SERVICOS', Decimal(rate)
+    rule.save()
+
+
+def _bulk_update_suggestions(text):
+    SuggestionMatrix.objects.filter(sector='SERVICOS', impact='NEGATIVO').update(suggestion_text=text)
+
+
+class CacheGenerationTest(TestCase):
+    def setUp(self):
+        RateTable.invalidate()
+        SuggestionIndex.invalidate()
+        TransitionTable.invalidate()
+        SimulationResultCache.invalidate()
+        CacheGenerations.reset()
+        self.middleware = CacheGenerationMiddleware(lambda request: _snapshot())
+
+    def generation(self, scope):
+        return CacheGeneration.objects.filter(scope=scope).values_list('value', flat=True).first() or 0
+
+    @override_settings(SIMULATION_GENERATION_CHECK_INTERVAL=0)
+    def test_check_is_one_query_per_request(self):
+        self.middleware(RequestFactory().get('/'))
+        with self.assertNumQueries(1):
+            self.middleware(RequestFactory().get('/'))
+        self.assertEqual(CacheGenerations.check(), [])
+
+    @override_settings(SIMULATION_GENERATION_CHECK_INTERVAL=60)
+    def test_interval_skips_checks(self):
+        CacheGenerations.check()
+        with self.assertNumQueries(0):
+            self.assertEqual(CacheGenerations.check(), [])
+
+    def test_bulk_operations_bump_generation(self):
+        before = self.generation(CacheGeneration.Scope.TAX_RULES)
+        # Update sem linhas afetadas não incrementa
+        TaxRule.objects.filter(rule_type='INEXISTENTE').update(rate=Decimal('0.5000'))
+        self.assertEqual(self.generation(CacheGeneration.Scope.TAX_RULES), before)
+
+        TaxRule.objects.bulk_create([TaxRule(name="SN SP", rule_type='SIMPLES_NACIONAL', state='SP', rate=Decimal('0.0900'))])
+        self.assertEqual(self.generation(CacheGeneration.Scope.TAX_RULES), before + 1)
+
+        TransitionSchedule.objects.filter(year=2027).update(description="Alterado")
+        self.assertEqual(self.generation(CacheGeneration.Scope.TRANSITION), 1)
+
+    def test_one_bump_per_transaction(self):
+        # O teste já roda em uma transação: cada escopo é incrementado uma única vez
+        # Regras criadas sem signal nem geração (ex.: SQL direto)
+        TaxRule._base_manager.bulk_create([
+            TaxRule(name=f"Reforma {state}", rule_type='REFORMA', state=state, rate=Decimal('0.2700'))
+            for state in ('SP', 'RJ', 'MG')
+        ])
+        before = self.generation(CacheGeneration.Scope.TAX_RULES)
+        RateTable.current()
+        # SELECT + DELETE; post_delete por regra, mas um só UPDATE da geração (em um savepoint)
+        with self.assertNumQueries(5):
+            deleted, _ = TaxRule.objects.filter(rule_type='REFORMA').delete()
+        self.assertEqual(deleted, 4)
+        TaxRule.objects.filter(rule_type='SIMPLES_NACIONAL').update(rate=Decimal('0.0900'))
+        self.assertEqual(self.generation(CacheGeneration.Scope.TAX_RULES), before + 1)
+        # As estruturas do processo continuam sendo descartadas a cada alteração
+        self.assertIsNone(RateTable._current)
+
+    @override_settings(SIMULATION_GENERATION_CHECK_INTERVAL=0)
+    def test_change_by_other_process_invalidates_only_its_scope(self):
+        CacheGenerations.check()
+        rates, index, transition = RateTable.current(), SuggestionIndex.current(), TransitionTable.current()
+
+        # Outro worker confirmou uma alteração: só a geração no banco mudou
+        row, _ = CacheGeneration.objects.get_or_create(scope=CacheGeneration.Scope.SUGGESTIONS)
+        CacheGeneration.objects.filter(pk=row.pk).update(value=F('value') + 1, token=uuid.uuid4())
+        version = SimulationResultCache.version
+
+        self.assertEqual(CacheGenerations.check(), [CacheGeneration.Scope.SUGGESTIONS])
+        self.assertIsNot(SuggestionIndex.current(), index)
+        self.assertGreater(SimulationResultCache.version, version)
+        self.assertIs(RateTable.current(), rates)
+        self.assertIs(TransitionTable.current(), transition)
+
+    async def test_async_middleware(self):
+        async def view(request):
+            return (await RateTable.acurrent()).get('REFORMA')
+
+        middleware = CacheGenerationMiddleware(view)
+        self.assertEqual(await middleware(RequestFactory().get('/')), Decimal('0.2650'))
+        self.assertIn(CacheGeneration.Scope.TAX_RULES, CacheGenerations._seen)
+
+
+class CacheCoherenceMultiProcessTest(SimpleTestCase):
+    """
+    Um processo escritor e dois leitores (como workers do gunicorn) sobre o mesmo banco
+    SQLite em arquivo: após cada alteração confirmada, nenhuma leitura obsoleta sobrevive
+    à verificação do middleware nos leitores.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        env = mock.patch.dict(os.environ, {
+            'DATABASE_URL': f"sqlite:///{os.path.join(self.tmp.name, 'db.sqlite3')}",
+            'SIMULATION_GENERATION_CHECK_INTERVAL': '0',
+        })
+        env.start()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(env.stop)
+
+        context = multiprocessing.get_context('spawn')
+        settings_module = os.environ['DJANGO_SETTINGS_MODULE']
+        self.writer, self.reader_a, self.reader_b = (
+            ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker, initargs=(settings_module,))
+            for _ in range(3)
+        )
+        for executor in (self.writer, self.reader_a, self.reader_b):
+            self.addCleanup(executor.shutdown)
+
+    def run_in(self, executor, fn, *args):
+        return executor.submit(fn, *args).result(timeout=120)
+
+    def assertReaders(self, **expected):
+        for reader in (self.reader_a, self.reader_b):
+            snapshot = self.run_in(reader, _request)
+            for key, value in expected.items():
+                self.assertEqual(snapshot[key], value)
+
+    def test_no_stale_reads_after_update(self):
+        self.run_in(self.writer, _migrate)
+        self.assertReaders(rate='0.1000')
+        original = self.run_in(self.reader_a, _snapshot)['suggestions']
+
+        # Update em massa (sem signals) em outro processo
+        self.run_in(self.writer, _bulk_update_rate, '0.0900')
+        # Sem a verificação, a tabela em memória do leitor continua com o valor antigo
+        self.assertEqual(self.run_in(self.reader_a, _snapshot)['rate'], '0.1000')
+        self.assertReaders(rate='0.0900')
+
+        # Mudança de rule_type via save(): a nova chave aparece nos dois leitores
+        self.run_in(self.writer, _change_rule_type, '0.1200')
+        self.assertReaders(rate='0.1200')
+
+        self.run_in(self.writer, _bulk_update_suggestions, "Nova sugestão")
+        self.assertReaders(suggestions=["Nova sugestão"] * len(original))
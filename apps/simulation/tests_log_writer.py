@@ -0,0 +1,148 @@
+import json
+import socket
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.models import SimulationLog
+from simulation.services.log_writer import SimulationLogWriter, _process_started
+from simulation.services.result_cache import SimulationResultCache
+
+
+class SimulationLogWriterTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        SimulationResultCache.invalidate()
+        self.spool = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            SIMULATION_LOG_WRITE_BEHIND=True,
+            SIMULATION_LOG_SPOOL_DIR=self.spool.name,
+            SIMULATION_LOG_FLUSH_SIZE=3,
+            SIMULATION_LOG_FLUSH_INTERVAL=3600,
+        )
+        self.settings_override.enable()
+        # Sem a thread de gravação: a fila só é gravada por flush() explícito, no banco do teste
+        self.thread_patch = mock.patch.object(SimulationLogWriter, '_run', lambda: None)
+        self.thread_patch.start()
+        self.user = User.objects.create_user(username="writer", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            "monthly_revenue": 10000.00,
+            "costs": 2000.00,
+            "tax_regime": "SIMPLES_NACIONAL",
+            "sector": "SERVICOS",
+            "state": "SP"
+        }
+
+    def tearDown(self):
+        SimulationLogWriter.shutdown()
+        self.thread_patch.stop()
+        self.settings_override.disable()
+        self.spool.cleanup()
+
+    def spool_lines(self):
+        return [line for path in Path(self.spool.name).glob('*.jsonl') for line in path.read_text().splitlines()]
+
+    def test_response_returns_before_insert(self):
+        response = self.client.post(reverse('simulate'), self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(SimulationLog.objects.count(), 0)
+        self.assertEqual(len(self.spool_lines()), 1)
+
+        self.assertEqual(SimulationLogWriter.flush(), 1)
+        log = SimulationLog.objects.get()
+        self.assertEqual((log.user, log.state, log.reform_tax_load), (self.user, 'SP', response.data['resultados']['carga_tributaria_reforma']))
+        self.assertEqual(self.spool_lines(), [])
+
+    def test_size_threshold_wakes_writer(self):
+        for _ in range(2):
+            self.client.post(reverse('simulate'), self.payload, format='json')
+        self.assertFalse(SimulationLogWriter._wakeup.is_set())
+        self.client.post(reverse('simulate'), self.payload, format='json')
+        self.assertTrue(SimulationLogWriter._wakeup.is_set())
+        self.assertEqual(SimulationLogWriter.pending(), 3)
+
+    def test_failed_flush_keeps_segment_for_retry(self):
+        self.client.post(reverse('simulate'), self.payload, format='json')
+        with mock.patch.object(SimulationLog.objects, 'bulk_create', side_effect=RuntimeError("banco fora")):
+            with self.assertRaises(RuntimeError):
+                SimulationLogWriter.flush()
+        self.assertEqual(len(self.spool_lines()), 1)
+
+        self.client.post(reverse('simulate'), self.payload, format='json')
+        self.assertEqual(SimulationLogWriter.flush(), 2)
+        self.assertEqual(SimulationLog.objects.count(), 2)
+        self.assertEqual(self.spool_lines(), [])
+
+    def test_shutdown_flushes_queue(self):
+        self.client.post(reverse('simulate'), self.payload, format='json')
+        SimulationLogWriter.shutdown()
+        self.assertEqual(SimulationLog.objects.count(), 1)
+        self.assertEqual(list(Path(self.spool.name).iterdir()), [])
+
+    def test_recover_spool_of_dead_process(self):
+        requested_at = timezone.now() - timedelta(days=1)
+        row = SimulationLogWriter.encode({
+            'user': self.user, 'monthly_revenue': '10000.00', 'costs': '2000.00',
+            'tax_regime': 'SIMPLES_NACIONAL', 'sector': 'SERVICOS', 'state': 'RJ',
+            'current_tax_load': '1000.00', 'reform_tax_load': '2120.00', 'delta_value': '1120.00',
+            'impact_classification': 'NEGATIVO',
+        })
+        # Spool de uma versão anterior, com a data da requisição
+        row['created_at'] = requested_at.isoformat()
+        host = socket.gethostname()
+        spool = Path(self.spool.name)
+        # PID fora do intervalo usado pelo kernel: processo certamente encerrado
+        dead = spool / f"{host}-99999999-1-1.jsonl"
+        dead.write_text(json.dumps(row) + "\n")
+        # Spool de uma versão anterior, sem host no nome
+        legacy = spool / "99999999-2.jsonl"
+        legacy.write_text(json.dumps(row) + "\n")
+        alive = spool / f"{host}-1-{_process_started(1)}-1.jsonl"
+        alive.write_text(json.dumps(row) + "\n")
+        # PID vivo, mas reutilizado por outro processo (início diferente)
+        reused = spool / f"{host}-1-{_process_started(1) + 1}-1.jsonl"
+        reused.write_text(json.dumps(row) + "\n")
+        # Segmento de outro host: não é recuperado aqui
+        other_host = spool / "outro-host-99999999-1-1.jsonl"
+        other_host.write_text(json.dumps(row) + "\n")
+
+        # Cliente já sincronizado até aqui antes da recuperação
+        with override_settings(SIMULATION_LOG_WRITE_BEHIND=False):
+            self.client.post(reverse('simulate'), self.payload, format='json')
+        response = self.client.get(reverse('simulation-history-export'), {'page_size': 10})
+        b''.join(response.streaming_content)
+        cursor = response['X-Next-Cursor']
+
+        out = StringIO()
+        call_command('flush_simulation_logs', stdout=out)
+
+        self.assertIn("3 logs recuperados", out.getvalue())
+        recovered = SimulationLog.objects.filter(state='RJ')
+        self.assertEqual(recovered.count(), 3)
+        # Gravados com a data da recuperação: a próxima sincronização os encontra
+        self.assertFalse(recovered.filter(created_at__lt=timezone.now() - timedelta(hours=1)).exists())
+        response = self.client.get(reverse('simulation-history-export'), {'since': cursor})
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(len(content.splitlines()), 4)
+        self.assertFalse(dead.exists())
+        self.assertFalse(legacy.exists())
+        self.assertFalse(reused.exists())
+        self.assertTrue(alive.exists())
+        self.assertTrue(other_host.exists())
+
+    @override_settings(SIMULATION_LOG_WRITE_BEHIND=False)
+    def test_disabled_writes_immediately(self):
+        self.client.post(reverse('simulate'), self.payload, format='json')
+        self.assertEqual(SimulationLog.objects.count(), 1)
+        self.assertEqual(self.spool_lines(), [])
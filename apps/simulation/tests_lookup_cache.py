@@ -0,0 +1,68 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.models import TaxRule
+from simulation.services.compiled import CompiledTable
+from simulation.services.generations import CacheGenerations
+from simulation.services.rate_table import RateTable
+from simulation.services.suggestion_index import SuggestionIndex
+
+
+class LookupCacheTest(APITestCase):
+    def setUp(self):
+        RateTable.invalidate()
+        SuggestionIndex.invalidate()
+        CacheGenerations.reset()
+        CompiledTable.source_cache().clear()
+        CompiledTable.source_cache().reset_stats()
+
+    def restart_worker(self):
+        """
+        Simula outro worker: sem tabelas nem linhas em memória, mesmo cache compartilhado.
+        """
+        CompiledTable.source_cache().clear_local()
+        RateTable.invalidate()
+        SuggestionIndex.invalidate()
+
+    def test_other_worker_compiles_from_shared_tier(self):
+        CacheGenerations.check()
+        table = RateTable.current()
+        SuggestionIndex.current()
+
+        self.restart_worker()
+        with self.assertNumQueries(0):
+            self.assertEqual(RateTable.current().get('REFORMA'), table.get('REFORMA'))
+            SuggestionIndex.current()
+        stats = CompiledTable.source_cache().stats()
+        self.assertEqual((stats['compartilhado']['acertos'], stats['falhas']), (2, 2))
+
+    def test_change_never_reuses_cached_rows(self):
+        CacheGenerations.check()
+        RateTable.current()
+
+        rule = TaxRule.objects.get(rule_type='REFORMA')
+        rule.rate = Decimal('0.2800')
+        rule.save()
+        # Geração ainda não confirmada/vista: lê do banco, sem gravar no cache
+        self.assertIsNone(CacheGenerations.token('ALIQUOTAS'))
+        self.assertEqual(RateTable.current().get('REFORMA'), Decimal('0.2800'))
+
+        CacheGenerations.check()
+        self.restart_worker()
+        self.assertEqual(RateTable.current().get('REFORMA'), Decimal('0.2800'))
+
+    def test_endpoint(self):
+        CacheGenerations.check()
+        RateTable.current()
+        url = reverse('lookup-cache')
+        self.client.force_authenticate(user=User.objects.create_superuser(username="admin", password="password123"))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['local']['tamanho'], 1)
+
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(RateTable._current)
+        self.assertEqual(CompiledTable.source_cache().stats()['local']['tamanho'], 0)
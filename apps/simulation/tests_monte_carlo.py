@@ -0,0 +1,120 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.services.batch import BatchSimulator, to_centavos, to_decimal
+from simulation.services.monte_carlo import MonteCarloSimulator
+from simulation.services.process_pool import ProcessPool
+from simulation.services.rate_table import RateTable
+
+RATE = {'distribution': 'triangular', 'min': Decimal('0.2500'), 'mode': Decimal('0.2650'), 'max': Decimal('0.2800')}
+COSTS = {'distribution': 'uniform', 'min': Decimal('1000.00'), 'max': Decimal('6000.00')}
+
+
+class MonteCarloSimulatorTest(TestCase):
+    def setUp(self):
+        RateTable.invalidate()
+
+    def run_simulation(self, **kwargs):
+        params = dict(draws=120_000, seed=42, rate_distribution=RATE, costs_distribution=COSTS)
+        params.update(kwargs)
+        return MonteCarloSimulator.run(Decimal('10000.00'), Decimal('2000.00'), 'SIMPLES_NACIONAL', 'SERVICOS', **params)
+
+    @override_settings(SIMULATION_POOL_WORKERS=1)
+    def test_fixed_distributions_match_batch(self):
+        result = MonteCarloSimulator.run(
+            Decimal('10000.00'), Decimal('2000.00'), 'LUCRO_PRESUMIDO', 'SERVICOS', 'SP', draws=10, seed=1
+        )
+        batch = BatchSimulator.run(to_centavos(['10000.00']), to_centavos(['2000.00']),
+                                   ['LUCRO_PRESUMIDO'], ['SERVICOS'], ['SP'])
+        expected = to_decimal(batch.delta_value[0])
+        self.assertEqual(result['diferenca']['percentis'], {f"p{p}": expected for p in (5, 25, 50, 75, 95)})
+        self.assertEqual(result['probabilidades']['NEGATIVO'], Decimal('1.0000'))
+        self.assertFalse(result['orcamento_esgotado'])
+
+    @override_settings(SIMULATION_POOL_WORKERS=1)
+    def test_same_seed_is_reproducible(self):
+        first = self.run_simulation()
+        self.assertEqual(first, dict(self.run_simulation(), tempo_cpu=first['tempo_cpu']))
+        self.assertNotEqual(first['diferenca'], self.run_simulation(seed=43)['diferenca'])
+        self.assertEqual(sum(first['probabilidades'].values()), Decimal('1.0000'))
+        percentis = list(first['diferenca']['percentis'].values())
+        self.assertEqual(percentis, sorted(percentis))
+
+    @override_settings(SIMULATION_POOL_WORKERS=2)
+    def test_process_pool_matches_inline(self):
+        try:
+            pooled = self.run_simulation()
+        finally:
+            ProcessPool.shutdown()
+        with self.settings(SIMULATION_POOL_WORKERS=1):
+            inline = self.run_simulation()
+        self.assertEqual(pooled['diferenca'], inline['diferenca'])
+        self.assertEqual(pooled['probabilidades'], inline['probabilidades'])
+
+    @override_settings(SIMULATION_POOL_WORKERS=1)
+    def test_cpu_budget_stops_pending_chunks(self):
+        result = self.run_simulation(cpu_budget=0)
+        self.assertTrue(result['orcamento_esgotado'])
+        self.assertEqual(result['sorteios_realizados'], MonteCarloSimulator.CHUNK_SIZE)
+
+
+@override_settings(SIMULATION_POOL_WORKERS=1)
+class MonteCarloAPITest(APITestCase):
+    def setUp(self):
+        RateTable.invalidate()
+        self.user = User.objects.create_user(username="mcuser", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            "monthly_revenue": 10000.00,
+            "costs": 2000.00,
+            "tax_regime": "SIMPLES_NACIONAL",
+            "sector": "SERVICOS",
+            "draws": 1000,
+            "seed": 7,
+            "reform_rate_distribution": {"distribution": "normal", "mean": 0.265, "std": 0.01}
+        }
+
+    def test_monte_carlo(self):
+        response = self.client.post(reverse('simulate-monte-carlo'), self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['semente'], 7)
+        self.assertEqual(response.data['sorteios_realizados'], 1000)
+        self.assertEqual(set(response.data['diferenca']['percentis']), {'p5', 'p25', 'p50', 'p75', 'p95'})
+        self.assertEqual(set(response.data['probabilidades']), {'POSITIVO', 'NEUTRO', 'NEGATIVO'})
+
+    @override_settings(SIMULATION_POOL_WORKERS=2)
+    def test_pool_process_death_returns_503(self):
+        def broken(fn, tasks):
+            futures = [Future() for _ in tasks]
+            for future in futures:
+                future.set_exception(BrokenProcessPool("processo morto"))
+            return futures
+
+        self.payload['draws'] = 3 * MonteCarloSimulator.CHUNK_SIZE
+        with mock.patch.object(ProcessPool, 'map', side_effect=broken), \
+                mock.patch.object(ProcessPool, 'shutdown') as shutdown, \
+                self.assertLogs('simulation.services.monte_carlo', 'WARNING'):
+            response = self.client.post(reverse('simulate-monte-carlo'), self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        shutdown.assert_called_once_with(wait=False)
+
+    @override_settings(SIMULATION_MONTE_CARLO_MAX_DRAWS=100)
+    def test_draws_limit(self):
+        response = self.client.post(reverse('simulate-monte-carlo'), self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('draws', response.data)
+
+    def test_invalid_distribution(self):
+        self.payload['costs_distribution'] = {"distribution": "triangular", "min": 3000, "mode": 1000, "max": 5000}
+        self.payload['reform_rate_distribution'] = {"distribution": "uniform", "min": 0.2}
+        response = self.client.post(reverse('simulate-monte-carlo'), self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('costs_distribution', response.data)
+        self.assertIn('max', response.data['reform_rate_distribution'])
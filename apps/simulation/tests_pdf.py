@@ -0,0 +1,49 @@
+import re
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.test import TestCase
+from companies.models import Company
+from simulation.models import SimulationLog, TransitionSchedule
+from simulation.services.pdf_generator import PDFGenerator, brl
+from simulation.services.projection import TransitionTable
+
+
+class PDFReportTest(TestCase):
+    def setUp(self):
+        TransitionTable.invalidate()
+        self.user = User.objects.create_user(username="pdfuser", password="password123")
+        self.log = SimulationLog.objects.create(
+            user=self.user, monthly_revenue=Decimal('1250000.00'), costs=Decimal('480000.00'),
+            tax_regime='LUCRO_PRESUMIDO', sector='SERVICOS', state='SP', current_tax_load=Decimal('141875.00'),
+            reform_tax_load=Decimal('204050.00'), delta_value=Decimal('62175.00'), impact_classification='NEGATIVO'
+        )
+
+    def pages(self):
+        content = PDFGenerator.generate_simulation_report(self.log).getvalue()
+        self.assertTrue(content.startswith(b'%PDF'))
+        return len(re.findall(rb'/Type /Page\b', content))
+
+    def test_brl(self):
+        self.assertEqual(brl(Decimal('1234567.8')), "R$ 1.234.567,80")
+        self.assertEqual(brl(Decimal('-21761.25')), "R$ -21.761,25")
+        self.assertEqual(brl(0), "R$ 0,00")
+
+    def test_pages_follow_content(self):
+        # Com a transição padrão (8 anos) as observações vão para a segunda página
+        self.assertEqual(self.pages(), 2)
+
+        TransitionSchedule.objects.all().delete()
+        self.assertEqual(self.pages(), 1)
+
+        TransitionSchedule.objects.bulk_create([
+            TransitionSchedule(year=year, current_factor=Decimal('0.5000'), reform_factor=Decimal('0.5000'))
+            for year in range(2026, 2076)
+        ])
+        self.assertEqual(self.pages(), 3)
+
+    def test_long_company_name(self):
+        self.log.company = Company.objects.create(
+            user=self.user, name="Empresa " * 31, cnpj="11.222.333/0001-81", monthly_revenue=Decimal('1250000.00'),
+            sector=Company.Sector.SERVICES, state=Company.UF.SP, tax_regime=Company.TaxRegime.LUCRO_PRESUMIDO
+        )
+        self.assertEqual(self.pages(), 2)
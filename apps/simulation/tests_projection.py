@@ -0,0 +1,79 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.models import SimulationLog, TransitionSchedule
+from simulation.services.pdf_generator import PDFGenerator
+from simulation.services.projection import TransitionProjector, TransitionTable
+from simulation.services.rate_table import RateTable
+
+
+class TransitionProjectorTest(TestCase):
+    def setUp(self):
+        TransitionTable.invalidate()
+
+    def test_schedule_compiled_from_database(self):
+        table = TransitionTable.current()
+        self.assertEqual(table.years, tuple(range(2026, 2034)))
+        self.assertEqual(table.current_factors[0], 10000)
+        self.assertEqual(table.reform_factors[-1], 10000)
+
+    def test_project_vectorized(self):
+        loads = TransitionProjector.project([100000, 163300], [212000, 26500])
+        self.assertEqual(loads.shape, (2, 8))
+        # 2026 mantém a carga atual e 2033 aplica só a reforma
+        self.assertEqual(loads[:, 0].tolist(), [100000, 163300])
+        self.assertEqual(loads[:, -1].tolist(), [212000, 26500])
+        # 2027: 1.000,00 x 0,65 + 2.120,00 x 0,35 = 1.392,00
+        self.assertEqual(loads[0, 1], 139200)
+
+    def test_rounding_half_even(self):
+        TransitionSchedule.objects.all().delete()
+        TransitionSchedule.objects.create(year=2030, current_factor=Decimal('0.5000'), reform_factor=Decimal('0'))
+        self.assertEqual(TransitionProjector.project([1, 3], [0, 0]).tolist(), [[0], [2]])
+
+    def test_schedule_change_invalidates_table(self):
+        TransitionTable.current()
+        TransitionSchedule.objects.filter(year=2033).delete()
+        TransitionSchedule.objects.create(year=2034, current_factor=Decimal('0'), reform_factor=Decimal('1'))
+        self.assertEqual(TransitionTable.current().years[-1], 2034)
+
+
+class ProjectionAPITest(APITestCase):
+    def setUp(self):
+        RateTable.invalidate()
+        TransitionTable.invalidate()
+        self.user = User.objects.create_user(username="projuser", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.scenario = {"monthly_revenue": 10000.00, "costs": 2000.00, "tax_regime": "SIMPLES_NACIONAL", "sector": "SERVICOS"}
+
+    def test_projection_by_year(self):
+        response = self.client.post(reverse('projection'), {"scenarios": [self.scenario] * 2}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['periodos'], list(range(2026, 2034)))
+        self.assertEqual(len(response.data['cenarios']), 2)
+        projecao = response.data['cenarios'][0]['projecao']
+        self.assertEqual(projecao[1], {
+            'periodo': 2027,
+            'carga_mensal': Decimal('1392.00'),
+            'diferenca_mensal': Decimal('392.00'),
+            'carga_anual': Decimal('16704.00'),
+        })
+        self.assertEqual(SimulationLog.objects.count(), 0)
+
+    def test_projection_invalid_scenario(self):
+        invalid = dict(self.scenario, costs=20000.00)
+        response = self.client.post(reverse('projection'), {"scenarios": [self.scenario, invalid]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pdf_report_with_projection(self):
+        log = SimulationLog.objects.create(
+            user=self.user, monthly_revenue=Decimal('10000.00'), costs=Decimal('2000.00'),
+            tax_regime='SIMPLES_NACIONAL', sector='SERVICOS', current_tax_load=Decimal('1000.00'),
+            reform_tax_load=Decimal('2120.00'), delta_value=Decimal('1120.00'), impact_classification='NEGATIVO'
+        )
+        buffer = PDFGenerator.generate_simulation_report(log)
+        self.assertTrue(buffer.read().startswith(b'%PDF'))
@@ -0,0 +1,148 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.models import RecomputeJob, SimulationLog, TaxRule
+from simulation.services import recompute
+from simulation.services.rate_table import RateTable
+from simulation.services.recompute import RecomputeRunner
+
+
+@override_settings(SIMULATION_POOL_WORKERS=1, SIMULATION_RECOMPUTE_CHUNK_SIZE=2)
+class RecomputeTest(APITestCase):
+    def setUp(self):
+        RateTable.invalidate()
+        self.admin = User.objects.create_superuser(username="admin", password="password123")
+        self.client.force_authenticate(user=self.admin)
+        # Logs gravados com a alíquota de reforma padrão (0,2650)
+        for state in ('SP', 'SP', 'SP', 'RJ', 'SP'):
+            SimulationLog.objects.create(
+                user=self.admin, monthly_revenue=Decimal('10000.00'), costs=Decimal('2000.00'),
+                tax_regime='SIMPLES_NACIONAL', sector='SERVICOS', state=state,
+                current_tax_load=Decimal('1000.00'), reform_tax_load=Decimal('2120.00'),
+                delta_value=Decimal('1120.00'), impact_classification='NEGATIVO'
+            )
+
+    def create_rule(self):
+        response = self.client.post(reverse('tax-rules-list'), {
+            "name": "Reforma SP", "rule_type": "REFORMA", "state": "SP", "rate": "0.1000"
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return RecomputeJob.objects.get(status=RecomputeJob.Status.PENDING)
+
+    def test_rule_change_enqueues_and_recomputes_affected_logs(self):
+        job = self.create_rule()
+        self.assertEqual((job.rule_type, job.sector, job.state), ('REFORMA', None, 'SP'))
+
+        RecomputeRunner.run(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, RecomputeJob.Status.DONE)
+        self.assertEqual((job.processed, job.updated), (4, 4))
+        sp = SimulationLog.objects.filter(state='SP').first()
+        self.assertEqual((sp.reform_tax_load, sp.delta_value, sp.impact_classification),
+                         (Decimal('800.00'), Decimal('-200.00'), 'POSITIVO'))
+        self.assertEqual(SimulationLog.objects.get(state='RJ').reform_tax_load, Decimal('2120.00'))
+
+    def test_unchanged_logs_are_not_written(self):
+        job = RecomputeRunner.enqueue('SIMPLES_NACIONAL')
+        RecomputeRunner.run(job)
+        self.assertEqual((job.processed, job.updated), (5, 0))
+
+    def test_restart_resumes_from_checkpoint(self):
+        job = self.create_rule()
+        calls = []
+        original = recompute._recompute_range
+
+        def flaky(job_id, first_id, last_id, rules):
+            calls.append(first_id)
+            if len(calls) == 2:
+                raise RuntimeError("worker morreu")
+            return original(job_id, first_id, last_id, rules)
+
+        with mock.patch.object(recompute, '_recompute_range', flaky):
+            with self.assertRaises(RuntimeError):
+                RecomputeRunner.run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, RecomputeJob.Status.FAILED)
+        self.assertEqual(job.processed, 2)
+        checkpoint = job.last_id
+
+        with mock.patch.object(recompute, '_recompute_range', flaky):
+            RecomputeRunner.run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, RecomputeJob.Status.DONE)
+        self.assertEqual((job.processed, job.updated), (4, 4))
+        # A primeira faixa concluída não é refeita
+        self.assertTrue(all(first_id > checkpoint for first_id in calls[2:]))
+
+    def test_update_enqueues_previous_scope(self):
+        job = self.create_rule()
+        job.delete()
+        rule = TaxRule.objects.get(name="Reforma SP")
+        response = self.client.patch(reverse('tax-rules-detail', args=[rule.pk]), {"state": "RJ"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(RecomputeJob.objects.values_list('state', flat=True)), {'SP', 'RJ'}
+        )
+
+    def test_management_command_processes_pending_jobs(self):
+        self.create_rule()
+        out = StringIO()
+        call_command('recompute_simulations', stdout=out)
+        self.assertIn("4 logs processados, 4 alterados", out.getvalue())
+        self.assertFalse(RecomputeJob.objects.exclude(status=RecomputeJob.Status.DONE).exists())
+
+    def test_running_job_is_not_run_twice(self):
+        job = self.create_rule()
+        RecomputeJob.objects.filter(pk=job.pk).update(status=RecomputeJob.Status.RUNNING)
+
+        with mock.patch.object(recompute, '_recompute_range') as recompute_range:
+            RecomputeRunner.run(job)
+            call_command('recompute_simulations', stdout=StringIO())
+        recompute_range.assert_not_called()
+
+        # Interrompido sem chegar a FALHOU: retomado explicitamente com --job
+        out = StringIO()
+        call_command('recompute_simulations', job=job.pk, stdout=out)
+        self.assertIn("4 logs processados, 4 alterados", out.getvalue())
+
+    def test_admin_action_skips_running_jobs(self):
+        pending = self.create_rule()
+        running = RecomputeRunner.enqueue('SIMPLES_NACIONAL')
+        RecomputeJob.objects.filter(pk=running.pk).update(status=RecomputeJob.Status.RUNNING)
+
+        self.client.force_login(self.admin)
+        with mock.patch.object(RecomputeRunner, 'start') as start:
+            response = self.client.post(reverse('admin:simulation_recomputejob_changelist'), {
+                'action': 'run_jobs', '_selected_action': [pending.pk, running.pk]
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(start.call_args.args[0], [pending])
+
+    def test_admin_changes_enqueue_recompute(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin:simulation_taxrule_add'), {
+            'name': "Reforma RJ", 'rule_type': 'REFORMA', 'state': 'RJ', 'rate': '0.1000', 'is_active': 'on'
+        })
+        self.assertEqual(response.status_code, 302)
+        rule = TaxRule.objects.get(name="Reforma RJ")
+        job = RecomputeJob.objects.get(status=RecomputeJob.Status.PENDING)
+        self.assertEqual((job.rule_type, job.state), ('REFORMA', 'RJ'))
+
+        job.delete()
+        response = self.client.post(reverse('admin:simulation_taxrule_change', args=[rule.pk]), {
+            'name': "Reforma RJ", 'rule_type': 'REFORMA', 'state': 'SP', 'rate': '0.1000', 'is_active': 'on'
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(set(RecomputeJob.objects.values_list('state', flat=True)), {'RJ', 'SP'})
+
+        RecomputeJob.objects.all().delete()
+        response = self.client.post(reverse('admin:simulation_taxrule_delete', args=[rule.pk]), {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(RecomputeJob.objects.values_list('state', flat=True)), ['SP'])
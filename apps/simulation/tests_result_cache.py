@@ -0,0 +1,85 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from simulation.models import SimulationLog, SuggestionMatrix, TaxRule
+from simulation.services.rate_table import RateTable
+from simulation.services.result_cache import SimulationResultCache
+
+
+class SimulationResultCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        RateTable.invalidate()
+        SimulationResultCache.invalidate()
+        SimulationResultCache.reset_stats()
+        self.user = User.objects.create_user(username="cacheuser", password="password123")
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            "monthly_revenue": 10000.00,
+            "costs": 2000.00,
+            "tax_regime": "SIMPLES_NACIONAL",
+            "sector": "SERVICOS",
+            "state": "SP"
+        }
+
+    def simulate(self, **overrides):
+        response = self.client.post(reverse('simulate'), dict(self.payload, **overrides), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    @override_settings(SIMULATION_GENERATION_CHECK_INTERVAL=60)
+    def test_hit_skips_computation_but_still_logs(self):
+        first = self.simulate()
+        # Mesma entrada com representação diferente (normalizada para centavos)
+        # Consultas: só o INSERT do log (gerações lidas na requisição anterior)
+        with self.assertNumQueries(1):
+            second = self.simulate(monthly_revenue="10000.0")
+
+        self.assertEqual(first, second)
+        self.assertEqual(SimulationLog.objects.count(), 2)
+        stats = SimulationResultCache.stats()
+        self.assertEqual((stats['acertos'], stats['falhas'], stats['tamanho']), (1, 1, 1))
+
+    def test_tax_rule_change_bumps_version(self):
+        self.simulate()
+        version = SimulationResultCache.version
+        TaxRule.objects.create(name="Reforma SP", rule_type='REFORMA', state='SP', rate=Decimal('0.3000'))
+
+        self.assertGreater(SimulationResultCache.version, version)
+        self.assertEqual(self.simulate()['resultados']['carga_tributaria_reforma'], Decimal('2400.00'))
+        self.assertEqual(SimulationResultCache.stats()['acertos'], 0)
+
+    def test_suggestion_change_invalidates(self):
+        self.simulate()
+        SuggestionMatrix.objects.create(sector='SERVICOS', impact='NEGATIVO', suggestion_text="Revise os contratos.")
+        self.assertIn("Revise os contratos.", self.simulate()['analise']['sugestoes'])
+
+    @override_settings(SIMULATION_RESULT_CACHE_SIZE=2)
+    def test_lru_eviction(self):
+        self.simulate(costs=1000.00)
+        self.simulate(costs=2000.00)
+        self.simulate(costs=1000.00)  # torna 1000.00 o mais recente
+        self.simulate(costs=3000.00)  # remove 2000.00
+        self.simulate(costs=1000.00)
+
+        stats = SimulationResultCache.stats()
+        self.assertEqual((stats['acertos'], stats['falhas'], stats['remocoes'], stats['tamanho']), (2, 3, 1, 2))
+
+    def test_stats_endpoint_requires_admin(self):
+        response = self.client.get(reverse('result-cache'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.simulate()
+        response = self.client.get(reverse('result-cache'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['falhas'], 1)
+
+        response = self.client.delete(reverse('result-cache'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(SimulationResultCache.stats()['tamanho'], 0)
@@ -0,0 +1,123 @@
+import threading
+import time
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from simulation.services.rate_table import RateTable
+
+
+@override_settings(SIMULATION_CACHE_WAIT_TIMEOUT=5, SIMULATION_CACHE_RETRY_INTERVAL=60)
+class CompiledTableStampedeTest(SimpleTestCase):
+    """
+    Comportamento da CompiledTable sob concorrência, com `build()` substituído (sem banco).
+    """
+
+    def setUp(self):
+        RateTable.invalidate()
+        RateTable._last_good = None
+        self.release = threading.Event()
+        self.release.set()
+        self.builds = 0
+        self.error = None
+        patcher = mock.patch.object(RateTable, 'build', classmethod(lambda cls: self.build()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(RateTable.invalidate)
+        self.addCleanup(setattr, RateTable, '_last_good', None)
+        self.addCleanup(self.release.set)
+
+    def build(self):
+        self.builds += 1
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return RateTable()
+
+    def start_build(self):
+        """
+        Inicia uma compilação lenta em outra thread e espera ela estar em andamento.
+        """
+        self.release.clear()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(RateTable.current()))
+        thread.start()
+        while not RateTable._flight.busy(RateTable):
+            time.sleep(0.001)
+        return thread, results
+
+    def test_concurrent_misses_build_once(self):
+        thread, results = self.start_build()
+        waiters = [threading.Thread(target=lambda: results.append(RateTable.current())) for _ in range(5)]
+        for waiter in waiters:
+            waiter.start()
+        time.sleep(0.05)
+        self.release.set()
+        for waiter in (thread, *waiters):
+            waiter.join()
+
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(len({id(table) for table in results}), 1)
+        self.assertIs(RateTable.current(), results[0])
+
+    def test_failed_rebuild_serves_last_good(self):
+        table = RateTable.current()
+        RateTable.invalidate()
+        self.error = RuntimeError("banco fora")
+
+        with self.assertLogs('simulation.services.compiled', 'ERROR'):
+            self.assertIs(RateTable.current(), table)
+        # Dentro do intervalo de nova tentativa, não volta ao banco
+        self.assertIs(RateTable.current(), table)
+        self.assertEqual(self.builds, 2)
+
+        # Uma invalidação (nova alteração) tenta de novo imediatamente
+        self.error = None
+        RateTable.invalidate()
+        self.assertIsNot(RateTable.current(), table)
+        self.assertEqual(self.builds, 3)
+
+    def test_cold_start_failure_uses_empty_table(self):
+        self.error = RuntimeError("banco fora")
+        with self.assertLogs('simulation.services.compiled', 'ERROR'):
+            self.assertIsInstance(RateTable.current(), RateTable)
+        # Sem versão anterior: nada é publicado e a próxima chamada tenta de novo
+        self.assertIsNone(RateTable._current)
+        with self.assertLogs('simulation.services.compiled', 'ERROR'):
+            RateTable.current()
+        self.assertEqual(self.builds, 2)
+
+    @override_settings(SIMULATION_CACHE_WAIT_TIMEOUT=0.01)
+    def test_slow_rebuild_serves_last_good(self):
+        table = RateTable.current()
+        RateTable.invalidate()
+        thread, results = self.start_build()
+
+        with self.assertLogs('simulation.services.compiled', 'WARNING'):
+            self.assertIs(RateTable.current(), table)
+        self.release.set()
+        thread.join()
+        self.assertIs(RateTable.current(), results[0])
+
+    def test_expired_table_served_while_revalidating(self):
+        table = RateTable.current()
+        table._expires_at = time.monotonic() - 1
+        thread, results = self.start_build()
+
+        self.assertIs(RateTable.current(), table)
+        self.release.set()
+        thread.join()
+        self.assertEqual(self.builds, 2)
+        self.assertIsNot(results[0], table)
+        self.assertIs(RateTable.current(), results[0])
+
+    def test_early_refresh_before_expiry(self):
+        table = RateTable.current()
+        table._expires_at, table._delta = time.monotonic() + 10, 1.0
+
+        with mock.patch('core.caching.random.random', return_value=0.5):
+            self.assertIs(RateTable.current(), table)
+        # Sorteio extremo: -log(1e-6) x delta ~ 13.8s alcança o prazo
+        with mock.patch('core.caching.random.random', return_value=1 - 1e-6):
+            with override_settings(SIMULATION_CACHE_EARLY_REFRESH_BETA=0):
+                self.assertIs(RateTable.current(), table)
+            self.assertIsNot(RateTable.current(), table)
+        self.assertEqual(self.builds, 2)
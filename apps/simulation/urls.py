@@ -2,18 +2,33 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     SimulationView,
+    AsyncSimulationView,
+    SimulationBatchView,
+    SimulationSweepView,
+    BreakEvenView,
+    ProjectionView,
+    MonteCarloView,
     SimulationHistoryView,
+    AsyncSimulationHistoryView,
     SimulationDashboardView,
+    AsyncSimulationDashboardView,
     SimulationExportPDFView,
     SimulationHistoryExportView,
+    ExportJobViewSet,
     TaxRuleViewSet,
-    SuggestionMatrixViewSet
+    SuggestionMatrixViewSet,
+    TransitionScheduleViewSet,
+    SimulationResultCacheView,
+    FallbackStatsView,
+    LookupCacheView
 )
 
 # Criar roteador para ViewSets de gestão
 router = DefaultRouter()
 router.register(r'management/tax-rules', TaxRuleViewSet, basename='tax-rules')
 router.register(r'management/suggestions', SuggestionMatrixViewSet, basename='suggestions')
+router.register(r'management/transition-schedule', TransitionScheduleViewSet, basename='transition-schedule')
+router.register(r'export-jobs', ExportJobViewSet, basename='export-jobs')
 
 urlpatterns = [
     # Rota de Debug (pode remover depois)
@@ -27,12 +42,25 @@ urlpatterns = [
     
     # Simulações
     path('simulate/', SimulationView.as_view(), name='simulate'),
+    path('simulate/batch/', SimulationBatchView.as_view(), name='simulate-batch'),
+    path('simulate/sweep/', SimulationSweepView.as_view(), name='simulate-sweep'),
+    path('break-even/', BreakEvenView.as_view(), name='break-even'),
+    path('projection/', ProjectionView.as_view(), name='projection'),
+    path('simulate/monte-carlo/', MonteCarloView.as_view(), name='simulate-monte-carlo'),
     path('history/', SimulationHistoryView.as_view(), name='simulation-history'),
     path('dashboard/', SimulationDashboardView.as_view(), name='simulation-dashboard'),
+
+    # Variantes assíncronas (ASGI)
+    path('async/simulate/', AsyncSimulationView.as_view(), name='simulate-async'),
+    path('async/history/', AsyncSimulationHistoryView.as_view(), name='simulation-history-async'),
+    path('async/dashboard/', AsyncSimulationDashboardView.as_view(), name='simulation-dashboard-async'),
     
     # Exportação Individual
     path('export-pdf/<int:pk>/', SimulationExportPDFView.as_view(), name='simulation-export-pdf'),
     
     # Gestão
+    path('management/result-cache/', SimulationResultCacheView.as_view(), name='result-cache'),
+    path('management/fallbacks/', FallbackStatsView.as_view(), name='fallback-stats'),
+    path('management/lookup-cache/', LookupCacheView.as_view(), name='lookup-cache'),
     path('', include(router.urls)),
 ]
@@ -1,27 +1,63 @@
+from decimal import Decimal
 from rest_framework.views import APIView
-from rest_framework import viewsets
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView, get_object_or_404
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Avg, Count
-from django.http import FileResponse
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.exceptions import ValidationError
+from companies.models import Company
+from core.async_views import AsyncAPIView
 from .serializers import (
     SimulationInputSerializer, 
+    SimulationBatchInputSerializer,
+    SimulationSweepInputSerializer,
+    BreakEvenInputSerializer,
+    ProjectionInputSerializer,
+    MonteCarloInputSerializer,
     SimulationLogListSerializer,
     TaxRuleSerializer,
-    SuggestionMatrixSerializer
+    SuggestionMatrixSerializer,
+    TransitionScheduleSerializer,
+    ExportJobSerializer
 )
 from .services.calculator import TaxCalculator
 from .services.analyzer import ImpactAnalyzer
 from .services.pdf_generator import PDFGenerator
 from .services.exporter import DataExporter
-from .models import SimulationLog, TaxRule, SuggestionMatrix
+from .services.columnar import ColumnarExporter
+from .services.batch import BatchSimulator
+from .services.rate_table import RateTable
+from .services.sweep import SweepGrid
+from .services.break_even import BreakEvenSolver
+from .services.batch import to_decimal
+from .services.projection import TransitionProjector, TransitionTable
+from .services.monte_carlo import MonteCarloSimulator
+from .services.result_cache import SimulationResultCache
+from .services.log_writer import SimulationLogWriter
+from .services.fallbacks import FallbackCounter
+from .services.compiled import CompiledTable
+from .services.suggestion_index import SuggestionIndex
+from .services.recompute import RecomputeRunner
+from .services.export_cursor import ExportCursor
+from .services.export_cache import ExportCache
+from .filters import SimulationExportFilter
+from .services.export_jobs import ExportJobRunner
+from .models import ExportJob, SimulationLog, TaxRule, SuggestionMatrix, TransitionSchedule
+
+# Valores exibidos e gravados com duas casas (ROUND_HALF_EVEN)
+QUANTUM = Decimal('0.01')
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
@@ -36,59 +72,343 @@ class SimulationView(APIView):
         serializer = SimulationInputSerializer(data=request.data)
         if serializer.is_valid():
             data = serializer.validated_data
-            company_data = {
-                'tax_regime': data['tax_regime'],
-                'sector': data['sector'],
-                'state': data.get('state')
-            }
-            financials = {
-                'monthly_revenue': data['monthly_revenue'],
-                'costs': data['costs']
-            }
-            current_tax = TaxCalculator.calculate_current_tax(company_data, financials)
-            reform_tax = TaxCalculator.calculate_reform_tax(company_data, financials)
-            analysis = ImpactAnalyzer.analyze(
-                current_tax, 
-                reform_tax, 
-                sector=data['sector'],
-                uf=data.get('state')
+            company_data, financials = self.inputs(data)
+            current_tax, reform_tax, analysis = SimulationResultCache.get_or_compute(
+                company_data, financials, lambda: self.compute(company_data, financials)
             )
-            SimulationLog.objects.create(
-                user=request.user,
-                company_id=data.get('company_id'),
-                monthly_revenue=data['monthly_revenue'],
-                costs=data['costs'],
-                tax_regime=data['tax_regime'],
-                sector=data['sector'],
-                state=data.get('state'),
-                current_tax_load=current_tax,
-                reform_tax_load=reform_tax,
-                delta_value=analysis['delta_value'],
-                impact_classification=analysis['impact_classification']
+            # O log é gravado mesmo quando o resultado vem do cache (na hora ou pela fila write-behind)
+            SimulationLogWriter.save(**self.log_fields(request.user, data, current_tax, reform_tax, analysis))
+            return Response(self.response_data(data, current_tax, reform_tax, analysis), status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @staticmethod
+    def inputs(data):
+        company_data = {
+            'tax_regime': data['tax_regime'],
+            'sector': data['sector'],
+            'state': data.get('state')
+        }
+        financials = {
+            'monthly_revenue': data['monthly_revenue'],
+            'costs': data['costs']
+        }
+        return company_data, financials
+
+    @staticmethod
+    def compute(company_data, financials):
+        current_tax = TaxCalculator.calculate_current_tax(company_data, financials)
+        reform_tax = TaxCalculator.calculate_reform_tax(company_data, financials)
+        analysis = ImpactAnalyzer.analyze(
+            current_tax,
+            reform_tax,
+            sector=company_data['sector'],
+            uf=company_data['state']
+        )
+        return current_tax, reform_tax, analysis
+
+    @staticmethod
+    async def acompute(company_data, financials):
+        table = await RateTable.acurrent()
+        current_tax = TaxCalculator.calculate_current_tax(company_data, financials, table)
+        reform_tax = TaxCalculator.calculate_reform_tax(company_data, financials, table)
+        analysis = await ImpactAnalyzer.aanalyze(
+            current_tax,
+            reform_tax,
+            sector=company_data['sector'],
+            uf=company_data['state']
+        )
+        return current_tax, reform_tax, analysis
+
+    @staticmethod
+    def log_fields(user, data, current_tax, reform_tax, analysis):
+        return {
+            'user': user,
+            'company_id': data.get('company_id'),
+            'monthly_revenue': data['monthly_revenue'],
+            'costs': data['costs'],
+            'tax_regime': data['tax_regime'],
+            'sector': data['sector'],
+            'state': data.get('state'),
+            'current_tax_load': current_tax.quantize(QUANTUM),
+            'reform_tax_load': reform_tax.quantize(QUANTUM),
+            'delta_value': analysis['delta_value'].quantize(QUANTUM),
+            'impact_classification': analysis['impact_classification']
+        }
+
+    @staticmethod
+    def response_data(data, current_tax, reform_tax, analysis):
+        return {
+            'resumo_entrada': {
+                'faturamento': data['monthly_revenue'],
+                'custos': data['costs'],
+                'regime_atual': data['tax_regime'],
+                'setor': data['sector'],
+                'estado': data.get('state', 'Não informado')
+            },
+            'resultados': {
+                'carga_tributaria_atual': current_tax.quantize(QUANTUM),
+                'carga_tributaria_reforma': reform_tax.quantize(QUANTUM),
+                'diferenca_absoluta': analysis['delta_value'].quantize(QUANTUM),
+                'diferenca_percentual': analysis['delta_percentage']
+            },
+            'analise': {
+                'classificacao_impacto': analysis['impact_classification'],
+                'mensagem': analysis['message'],
+                'detalhes_setoriais': analysis['detalhes_setoriais'],
+                'sugestoes': analysis['suggestions']
+            }
+        }
+
+class AsyncSimulationView(AsyncAPIView):
+    """
+    Variante nativamente assíncrona de SimulationView (mesma entrada, resposta e log).
+    Alíquotas, sugestões e o log usam cache e ORM assíncronos; além da autenticação e
+    do throttling (AsyncAPIView), não há troca de thread quando a tabela de alíquotas
+    e as sugestões já estão em memória.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        serializer = SimulationInputSerializer(data=self.parse(request))
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        company_data, financials = SimulationView.inputs(data)
+        current_tax, reform_tax, analysis = await SimulationResultCache.aget_or_compute(
+            company_data, financials, lambda: SimulationView.acompute(company_data, financials)
+        )
+        await SimulationLogWriter.asave(
+            **SimulationView.log_fields(request.user, data, current_tax, reform_tax, analysis)
+        )
+        return self.respond(SimulationView.response_data(data, current_tax, reform_tax, analysis))
+
+class SimulationBatchView(APIView):
+    """
+    Simula vários cenários em uma única requisição: valida todos em uma passada,
+    calcula em lote (BatchSimulator) e persiste os logs com bulk_create em uma transação.
+    Resultados e erros são devolvidos na mesma ordem da entrada.
+    """
+    serializer_class = SimulationBatchInputSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = SimulationBatchInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        scenarios = serializer.validated_data['scenarios']
+        items = [None] * len(scenarios)
+        valid = []
+        child = SimulationInputSerializer()
+        for index, scenario in enumerate(scenarios):
+            try:
+                valid.append((index, child.run_validation(scenario)))
+            except ValidationError as exc:
+                items[index] = {'indice': index, 'status': 'erro', 'erros': exc.detail}
+
+        # Empresas informadas precisam pertencer ao usuário (uma única consulta)
+        company_ids = {data['company_id'] for _, data in valid if data.get('company_id') is not None}
+        if company_ids:
+            owned = set(
+                Company.objects.filter(user=request.user, id__in=company_ids).values_list('id', flat=True)
             )
-            response_data = {
-                'resumo_entrada': {
-                    'faturamento': data['monthly_revenue'],
-                    'custos': data['costs'],
-                    'regime_atual': data['tax_regime'],
-                    'setor': data['sector'],
-                    'estado': data.get('state', 'Não informado')
-                },
-                'resultados': {
-                    'carga_tributaria_atual': current_tax.quantize(TaxCalculator.SN_AVERAGE_RATE),
-                    'carga_tributaria_reforma': reform_tax.quantize(TaxCalculator.REFORM_RATE),
-                    'diferenca_absoluta': analysis['delta_value'].quantize(TaxCalculator.SN_AVERAGE_RATE),
-                    'diferenca_percentual': analysis['delta_percentage']
-                },
-                'analise': {
-                    'classificacao_impacto': analysis['impact_classification'],
-                    'mensagem': analysis['message'],
-                    'detalhes_setoriais': analysis['detalhes_setoriais'],
-                    'sugestoes': analysis['suggestions']
+            accepted = []
+            for index, data in valid:
+                company_id = data.get('company_id')
+                if company_id is not None and company_id not in owned:
+                    items[index] = {
+                        'indice': index,
+                        'status': 'erro',
+                        'erros': {'company_id': ["Empresa não encontrada."]}
+                    }
+                else:
+                    accepted.append((index, data))
+            valid = accepted
+
+        if valid:
+            result = BatchSimulator.run_records([data for _, data in valid])
+            logs = []
+            for position, (index, data) in enumerate(valid):
+                row = result.row(position)
+                logs.append(SimulationLog(
+                    user=request.user,
+                    company_id=data.get('company_id'),
+                    monthly_revenue=data['monthly_revenue'],
+                    costs=data['costs'],
+                    tax_regime=data['tax_regime'],
+                    sector=data['sector'],
+                    state=data.get('state'),
+                    current_tax_load=row['current_tax_load'],
+                    reform_tax_load=row['reform_tax_load'],
+                    delta_value=row['delta_value'],
+                    impact_classification=row['impact_classification']
+                ))
+                items[index] = {
+                    'indice': index,
+                    'status': 'ok',
+                    'resultados': {
+                        'carga_tributaria_atual': row['current_tax_load'],
+                        'carga_tributaria_reforma': row['reform_tax_load'],
+                        'diferenca_absoluta': row['delta_value'],
+                        'diferenca_percentual': row['delta_percentage']
+                    },
+                    'classificacao_impacto': row['impact_classification']
                 }
-            }
-            return Response(response_data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                SimulationLog.objects.bulk_create(logs, batch_size=settings.SIMULATION_BATCH_CHUNK_SIZE)
+
+            for (index, _), log in zip(valid, logs):
+                items[index]['id'] = log.pk
+
+        return Response({
+            'total': len(items),
+            'sucesso': len(valid),
+            'erros': len(items) - len(valid),
+            'itens': items
+        }, status=status.HTTP_200_OK)
+
+class SimulationSweepView(APIView):
+    """
+    Grade de sensibilidade (carga atual x reforma) calculada em memória e
+    transmitida em NDJSON à medida que cada bloco é calculado. Não grava logs.
+    `X-Grid-Cells` traz o número de linhas transmitidas e `X-Grid-Dropped` o de
+    células descartadas (custos maiores que o faturamento).
+    """
+    serializer_class = SimulationSweepInputSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = SimulationSweepInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        grid = SweepGrid(
+            SweepGrid.axis(**data['monthly_revenue']),
+            SweepGrid.axis(**data['costs']),
+            data['tax_regimes'],
+            data['sectors'],
+            data['states'],
+        )
+        response = StreamingHttpResponse(
+            grid.iter_ndjson(settings.SIMULATION_SWEEP_CHUNK_SIZE, RateTable.current()),
+            content_type='application/x-ndjson'
+        )
+        emitted = grid.emitted()
+        response['X-Grid-Cells'] = emitted
+        response['X-Grid-Dropped'] = data['cells'] - emitted
+        return response
+
+class BreakEvenView(APIView):
+    """
+    Ponto de equilíbrio em forma fechada: custo a partir do qual a reforma deixa
+    de ser NEGATIVA para o regime, setor e UF informados.
+    """
+    serializer_class = BreakEvenInputSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BreakEvenInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        current_rate, reform_rate = BreakEvenSolver.rates(data['tax_regime'], data['sector'], data.get('state'))
+        results = BreakEvenSolver.solve(data['revenues'], data['tax_regime'], data['sector'], data.get('state'))
+        return Response({
+            'regime_atual': data['tax_regime'],
+            'setor': data['sector'],
+            'estado': data.get('state', 'Não informado'),
+            'aliquota_atual': current_rate,
+            'aliquota_reforma': reform_rate,
+            'resultados': results
+        }, status=status.HTTP_200_OK)
+
+class ProjectionView(APIView):
+    """
+    Projeção da carga mensal ano a ano durante a transição da reforma, calculada de
+    forma vetorizada para todos os cenários informados. Os fatores do cronograma valem
+    para o ano inteiro, por isso não há projeção mês a mês.
+    """
+    serializer_class = ProjectionInputSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ProjectionInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        scenarios = serializer.validated_data['scenarios']
+        table = TransitionTable.current()
+
+        result = BatchSimulator.run_records(scenarios)
+        loads = TransitionProjector.project(result.current_tax, result.reform_tax, table)
+        periods = list(table.years)
+
+        cenarios = []
+        for index, (current_tax, reform_tax, row) in enumerate(
+            zip(result.current_tax.tolist(), result.reform_tax.tolist(), loads.tolist())
+        ):
+            projecao = [
+                {
+                    'periodo': period,
+                    'carga_mensal': to_decimal(load),
+                    'diferenca_mensal': to_decimal(load - current_tax),
+                    'carga_anual': to_decimal(load * 12)
+                }
+                for period, load in zip(periods, row)
+            ]
+            cenarios.append({
+                'indice': index,
+                'carga_tributaria_atual': to_decimal(current_tax),
+                'carga_tributaria_reforma': to_decimal(reform_tax),
+                'projecao': projecao
+            })
+
+        return Response({
+            'periodos': periods,
+            'cenarios': cenarios
+        }, status=status.HTTP_200_OK)
+
+class MonteCarloView(APIView):
+    """
+    Simulação de Monte Carlo sobre a incerteza da alíquota da reforma, do faturamento
+    e dos custos, executada no pool de processos sob um orçamento de CPU.
+    """
+    serializer_class = MonteCarloInputSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = MonteCarloInputSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        result = MonteCarloSimulator.run(
+            data['monthly_revenue'],
+            data['costs'],
+            data['tax_regime'],
+            data['sector'],
+            data.get('state'),
+            draws=data['draws'],
+            seed=data.get('seed'),
+            revenue_distribution=data.get('revenue_distribution'),
+            costs_distribution=data.get('costs_distribution'),
+            rate_distribution=data.get('reform_rate_distribution'),
+        )
+        if not result['sorteios_realizados']:
+            return Response(
+                {"detail": "Nenhum sorteio concluído (orçamento de CPU esgotado ou processo interrompido). "
+                           "Tente novamente."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        return Response({
+            'regime_atual': data['tax_regime'],
+            'setor': data['sector'],
+            'estado': data.get('state', 'Não informado'),
+            **result
+        }, status=status.HTTP_200_OK)
 
 class SimulationHistoryView(ListAPIView):
     serializer_class = SimulationLogListSerializer
@@ -100,19 +420,49 @@ class SimulationHistoryView(ListAPIView):
     def get_queryset(self):
         return SimulationLog.objects.filter(user=self.request.user)
 
+class AsyncSimulationHistoryView(AsyncAPIView):
+    """
+    Variante assíncrona de SimulationHistoryView (mesma paginação e filtro por empresa).
+    """
+
+    async def get(self, request, *args, **kwargs):
+        queryset = SimulationLog.objects.filter(user=request.user)
+        company = request.GET.get('company')
+        if company:
+            if not company.isdigit():
+                return self.respond({'company': ["Informe um número inteiro válido."]}, status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(company_id=int(company))
+        page = await self.paginate(request, queryset, SimulationLogListSerializer, StandardResultsSetPagination)
+        return self.respond(page)
+
 class SimulationDashboardView(APIView):
     permission_classes = [IsAuthenticated]
+    # Compartilhados com AsyncSimulationDashboardView
+    AGGREGATES = {
+        'total': Count('id'),
+        'faturamento_medio': Avg('monthly_revenue'),
+        'carga_atual_media': Avg('current_tax_load'),
+        'carga_reforma_media': Avg('reform_tax_load'),
+    }
+
     def get(self, request, *args, **kwargs):
         user_logs = SimulationLog.objects.filter(user=request.user)
-        aggregates = user_logs.aggregate(
-            total=Count('id'),
-            faturamento_medio=Avg('monthly_revenue'),
-            carga_atual_media=Avg('current_tax_load'),
-            carga_reforma_media=Avg('reform_tax_load')
-        )
-        impact_dist = user_logs.values('impact_classification').annotate(total=Count('id')).order_by('-total')
-        top_setores = user_logs.values('sector').annotate(total=Count('id')).order_by('-total')[:3]
-        data = {
+        aggregates = user_logs.aggregate(**self.AGGREGATES)
+        impact_dist = self.impact_distribution(user_logs)
+        top_setores = self.top_sectors(user_logs)
+        return Response(self.summarize(aggregates, impact_dist, top_setores), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def impact_distribution(user_logs):
+        return user_logs.values('impact_classification').annotate(total=Count('id')).order_by('-total')
+
+    @staticmethod
+    def top_sectors(user_logs):
+        return user_logs.values('sector').annotate(total=Count('id')).order_by('-total')[:3]
+
+    @staticmethod
+    def summarize(aggregates, impact_dist, top_setores):
+        return {
             "total_simulacoes": aggregates['total'] or 0,
             "faturamento_medio": round(aggregates['faturamento_medio'] or 0, 2),
             "comparativo_carga_media": {
@@ -129,7 +479,18 @@ class SimulationDashboardView(APIView):
                 } for item in top_setores
             ]
         }
-        return Response(data, status=status.HTTP_200_OK)
+
+class AsyncSimulationDashboardView(AsyncAPIView):
+    """
+    Variante assíncrona de SimulationDashboardView (aaggregate e iteração assíncrona).
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user_logs = SimulationLog.objects.filter(user=request.user)
+        aggregates = await user_logs.aaggregate(**SimulationDashboardView.AGGREGATES)
+        impact_dist = [item async for item in SimulationDashboardView.impact_distribution(user_logs)]
+        top_setores = [item async for item in SimulationDashboardView.top_sectors(user_logs)]
+        return self.respond(SimulationDashboardView.summarize(aggregates, impact_dist, top_setores))
 
 class SimulationExportPDFView(APIView):
     permission_classes = [IsAuthenticated]
@@ -141,40 +502,257 @@ class SimulationExportPDFView(APIView):
         return FileResponse(pdf_buffer, as_attachment=True, filename=f"relatorio_simulacao_{log.id}.pdf", content_type='application/pdf')
 
 class SimulationHistoryExportView(APIView):
+    """
+    Exportação do histórico do usuário: `?format=` csv (padrão), excel, parquet ou arrow,
+    com os filtros de SimulationExportFilter.
+
+    Exportação incremental: com `since` (cursor) e/ou `page_size`, retorna uma página
+    de até `page_size` logs (padrão SIMULATION_EXPORT_PAGE_SIZE) em ordem crescente de
+    (created_at, id), após o cursor. Toda resposta traz `X-Next-Cursor`, a posição do
+    último log incluído (a exportação completa também é delimitada por ela), e
+    `X-Has-More`; a próxima sincronização usa `since=<X-Next-Cursor>`.
+
+    Arquivos gerados ficam em cache em disco (ExportCache), identificados pela versão
+    dos dados do usuário; a chave vai no `ETag` (forte). Repetir a exportação sem
+    mudanças nos dados entrega o arquivo em cache, ou `304` com `If-None-Match`, sem
+    consumir a cota de exportações.
+    """
     permission_classes = [IsAuthenticated]
     throttle_classes = [ScopedRateThrottle]
     throttle_scope = 'export'
-    def get(self, request, *args, **kwargs):
-        queryset = SimulationLog.objects.filter(user=request.user).order_by('-created_at')
+
+    def perform_content_negotiation(self, request, force=False):
+        # `format` escolhe o arquivo exportado, não um renderer do DRF (que responderia 404)
+        return super().perform_content_negotiation(request, force=True)
+
+    def check_throttles(self, request):
+        # Chamado após a autenticação: a chave já pode ser calculada, e uma exportação
+        # servida do cache (ou 304) não consome a cota
+        self.export_format = self.resolve_format(request)
+        self.cache_key = ExportCache.key(request.user, self.export_format, request.query_params)
+        if self.not_modified(request) or ExportCache.exists(self.cache_key):
+            return
+        super().check_throttles(request)
+
+    @staticmethod
+    def resolve_format(request):
         export_format = request.query_params.get('format', 'csv').lower()
 
         # Verificar se a URL indica exportação em Excel (para compatibilidade com testes)
         if request.path.endswith('/excel/') or export_format == 'excel':
             export_format = 'excel'
+        elif export_format not in ColumnarExporter.FORMATS:
+            export_format = 'csv'
+        return export_format
+
+    def not_modified(self, request):
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        return '*' in etags or f'"{self.cache_key}"' in etags
 
+    @staticmethod
+    def page_size(request):
+        value = request.query_params.get('page_size', '')
+        if not value:
+            return settings.SIMULATION_EXPORT_PAGE_SIZE
+        if not value.isdigit() or not 1 <= int(value) <= settings.SIMULATION_EXPORT_MAX_PAGE_SIZE:
+            raise ValidationError({'page_size': [
+                f"Informe um inteiro entre 1 e {settings.SIMULATION_EXPORT_MAX_PAGE_SIZE}."
+            ]})
+        return int(value)
+
+    def get(self, request, *args, **kwargs):
+        filterset = SimulationExportFilter(request.query_params, queryset=SimulationLog.objects.filter(user=request.user))
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        incremental = 'since' in request.query_params or 'page_size' in request.query_params
+        size = self.page_size(request) if incremental else None
+        if self.not_modified(request):
+            response = HttpResponseNotModified()
+        else:
+            queryset, last, has_more = ExportCursor.page(filterset.qs, size=size)
+            if not incremental:
+                queryset = queryset.order_by('-created_at')
+            cursor = ExportCursor.encode(*last) if last else request.query_params.get('since')
+            response = self.export(queryset)
+            if cursor:
+                response['X-Next-Cursor'] = cursor
+            response['X-Has-More'] = 'true' if has_more else 'false'
+        response['ETag'] = f'"{self.cache_key}"'
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def export(self, queryset):
+        export_format, key = self.export_format, self.cache_key
         timestamp = timezone.now().strftime('%Y%m%d')
+        cached = ExportCache.get(key)
 
         if export_format == 'excel':
-            buffer = DataExporter.export_to_excel(queryset)
-            filename = f"historico_simulacoes_{timestamp}.xlsx"
-            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            if cached is None:
+                cached = (
+                    ExportCache.store_file(key, lambda path: DataExporter.write_excel(queryset, path))
+                    if ExportCache.enabled() else DataExporter.export_to_excel(queryset)
+                )
+            return FileResponse(
+                cached,
+                as_attachment=True,
+                filename=f"historico_simulacoes_{timestamp}.xlsx",
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+
+        if export_format in ColumnarExporter.FORMATS:
+            extension, content_type = ColumnarExporter.FORMATS[export_format]
+            chunks = ColumnarExporter.iter_file(queryset, export_format)
         else:
-            buffer = DataExporter.export_to_csv(queryset)
-            filename = f"historico_simulacoes_{timestamp}.csv"
-            content_type = 'text/csv'
-
-        return FileResponse(
-            buffer,
-            as_attachment=True,
-            filename=filename,
-            content_type=content_type
+            # CSV transmitido em blocos, sem montar o arquivo em memória
+            extension, content_type = 'csv', 'text/csv'
+            chunks = DataExporter.iter_csv(queryset)
+
+        if cached is not None:
+            response = FileResponse(cached, content_type=content_type)
+        elif ExportCache.enabled():
+            # Transmitido enquanto é gravado no cache
+            response = StreamingHttpResponse(ExportCache.store(key, chunks), content_type=content_type)
+        else:
+            response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="historico_simulacoes_{timestamp}.{extension}"'
+        return response
+
+class ExportJobViewSet(mixins.CreateModelMixin,
+                       mixins.ListModelMixin,
+                       mixins.RetrieveModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Exportação do histórico em segundo plano: POST cria o job (formato CSV ou EXCEL) e
+    retorna 202; GET acompanha o progresso (linhas exportadas / total) e, quando
+    concluído, informa `download_url`, que entrega o arquivo até expirar.
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'export'
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user)
+
+    def get_throttles(self):
+        # Só a criação consome a cota de exportações; acompanhamento e download não
+        if self.action == 'create':
+            return [ScopedRateThrottle()]
+        return super().get_throttles()
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = ExportJobRunner.enqueue(request.user, serializer.validated_data['export_format'])
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    def retrieve(self, request, *args, **kwargs):
+        # Quem acompanha um job pendente também recupera os perdidos (pool reiniciado)
+        job = self.get_object()
+        if job.status == ExportJob.Status.PENDING:
+            ExportJobRunner.cleanup()
+            job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=True)
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status == ExportJob.Status.EXPIRED:
+            return Response({"detail": "O arquivo desta exportação expirou."}, status=status.HTTP_410_GONE)
+        if job.status != ExportJob.Status.DONE:
+            return Response(
+                {"detail": f"Exportação ainda não concluída ({job.get_status_display()})."},
+                status=status.HTTP_409_CONFLICT
+            )
+        try:
+            file = open(ExportJobRunner.path(job), 'rb')
+        except FileNotFoundError:
+            return Response({"detail": "O arquivo desta exportação expirou."}, status=status.HTTP_410_GONE)
+
+        content_type = (
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            if job.export_format == ExportJob.Format.EXCEL else 'text/csv'
         )
+        return FileResponse(file, as_attachment=True, filename=job.download_name, content_type=content_type)
 
 class TaxRuleViewSet(viewsets.ModelViewSet):
+    """
+    Gestão de regras tributárias. Cada alteração enfileira um RecomputeJob pendente para
+    os logs afetados (escopo anterior e novo), processado por `recompute_simulations`
+    ou pelo admin.
+    """
     queryset = TaxRule.objects.all()
     serializer_class = TaxRuleSerializer
     permission_classes = [IsAdminUser]
 
+    @staticmethod
+    def enqueue_recompute(rule):
+        RecomputeRunner.enqueue(rule.rule_type, rule.sector, rule.state)
+
+    def perform_create(self, serializer):
+        self.enqueue_recompute(serializer.save())
+
+    def perform_update(self, serializer):
+        previous = (serializer.instance.rule_type, serializer.instance.sector, serializer.instance.state)
+        rule = serializer.save()
+        if previous != (rule.rule_type, rule.sector, rule.state):
+            RecomputeRunner.enqueue(*previous)
+        self.enqueue_recompute(rule)
+
+    def perform_destroy(self, instance):
+        self.enqueue_recompute(instance)
+        instance.delete()
+
+class TransitionScheduleViewSet(viewsets.ModelViewSet):
+    queryset = TransitionSchedule.objects.all()
+    serializer_class = TransitionScheduleSerializer
+    permission_classes = [IsAdminUser]
+
+class SimulationResultCacheView(APIView):
+    """
+    Estatísticas do cache de resultados de simulação deste processo (GET) e
+    limpeza manual (DELETE).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(SimulationResultCache.stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        SimulationResultCache.invalidate()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class FallbackStatsView(APIView):
+    """
+    Consultas deste processo resolvidas por valores de fallback (alíquotas sem regra
+    ativa e combinações sem sugestões), por chave (GET), e zeragem do contador (DELETE).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(FallbackCounter.stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        FallbackCounter.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class LookupCacheView(APIView):
+    """
+    Estatísticas do cache em dois níveis das tabelas compiladas (alíquotas, sugestões,
+    cronograma) deste processo (GET) e limpeza dos dois níveis (DELETE), que também
+    descarta as tabelas deste processo.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(CompiledTable.source_cache().stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        CompiledTable.source_cache().clear()
+        for table in (RateTable, SuggestionIndex, TransitionTable):
+            table.invalidate()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class SuggestionMatrixViewSet(viewsets.ModelViewSet):
     queryset = SuggestionMatrix.objects.all()
     serializer_class = SuggestionMatrixSerializer
@@ -9,8 +9,29 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import sync_to_async
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from simulation.services.log_writer import SimulationLogWriter  # noqa: E402 (após o setup do Django)
+
+
+async def application(scope, receive, send):
+    """
+    Aplicação Django com suporte ao protocolo lifespan: no encerramento do worker,
+    grava a fila write-behind de logs antes de o servidor finalizar o processo.
+    """
+    if scope['type'] != 'lifespan':
+        return await django_application(scope, receive, send)
+
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await sync_to_async(SimulationLogWriter.shutdown)()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -62,6 +62,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'simulation.middleware.CacheGenerationMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -133,13 +134,109 @@ CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # Compartilhado entre processos (2º nível do TieredCache). FileBasedCache ou
+    # DatabaseCache (LOCATION = tabela criada com `createcachetable`) dispensam serviço externo
+    'shared': {
+        'BACKEND': config('SHARED_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('SHARED_CACHE_LOCATION', default=str(BASE_DIR / 'spool' / 'cache')),
+    },
 }
 
 # Cache TTL em segundos (Default: 24 horas)
 CACHE_TTL = config('CACHE_TTL', default=60 * 60 * 24, cast=int)
 
 
+# Simulação em lote
+SIMULATION_BATCH_MAX_ITEMS = config('SIMULATION_BATCH_MAX_ITEMS', default=5000, cast=int)
+SIMULATION_BATCH_CHUNK_SIZE = config('SIMULATION_BATCH_CHUNK_SIZE', default=500, cast=int)
+# Simulação de todas as empresas do usuário: máximo de empresas por requisição
+SIMULATION_PORTFOLIO_MAX_COMPANIES = config('SIMULATION_PORTFOLIO_MAX_COMPANIES', default=5000, cast=int)
+
+# Grade de sensibilidade (sweep)
+SIMULATION_SWEEP_MAX_CELLS = config('SIMULATION_SWEEP_MAX_CELLS', default=100_000, cast=int)
+SIMULATION_SWEEP_CHUNK_SIZE = config('SIMULATION_SWEEP_CHUNK_SIZE', default=5000, cast=int)
+
+# Exportação do histórico: registros lidos do banco (e enviados no CSV) por bloco
+SIMULATION_EXPORT_CHUNK_SIZE = config('SIMULATION_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+# Tamanho (bytes) até o qual o .xlsx exportado fica em memória antes de ir para disco
+SIMULATION_EXPORT_SPOOL_MAX_SIZE = config('SIMULATION_EXPORT_SPOOL_MAX_SIZE', default=8 * 1024 * 1024, cast=int)
+# Exportação incremental (com cursor `since`): logs por página, padrão e máximo
+SIMULATION_EXPORT_PAGE_SIZE = config('SIMULATION_EXPORT_PAGE_SIZE', default=50_000, cast=int)
+SIMULATION_EXPORT_MAX_PAGE_SIZE = config('SIMULATION_EXPORT_MAX_PAGE_SIZE', default=1_000_000, cast=int)
+# Linhas por row group nas exportações Parquet (os blocos lidos são agrupados até esse total)
+SIMULATION_EXPORT_PARQUET_ROW_GROUP_SIZE = config('SIMULATION_EXPORT_PARQUET_ROW_GROUP_SIZE', default=64 * 1024, cast=int)
+# Cache em disco dos arquivos exportados (por versão dos dados do usuário): diretório e
+# tamanho máximo em bytes, acima do qual os usados há mais tempo são removidos (0 desativa).
+# Desativado por padrão em `manage.py test`: os testes que usam o cache o ligam com um
+# diretório temporário próprio, sem gravar na árvore do projeto
+SIMULATION_EXPORT_CACHE_DIR = config('SIMULATION_EXPORT_CACHE_DIR', default=str(BASE_DIR / 'spool' / 'export_cache'))
+SIMULATION_EXPORT_CACHE_MAX_BYTES = config(
+    'SIMULATION_EXPORT_CACHE_MAX_BYTES', default=0 if sys.argv[1:2] == ['test'] else 512 * 1024 * 1024, cast=int
+)
+
+# Exportações em segundo plano (ExportJob): executadas em um pool de processos próprio
+# do servidor ('pool', com SIMULATION_EXPORT_POOL_WORKERS processos, separado do pool
+# do Monte Carlo) ou só pelo comando export_worker ('worker'); diretório dos arquivos,
+# validade (s) do arquivo após a conclusão e tempo (s) sem progresso para considerar um
+# job em execução como interrompido, ou um pendente como perdido (reenviado ao pool)
+SIMULATION_EXPORT_JOBS_MODE = config('SIMULATION_EXPORT_JOBS_MODE', default='pool')
+SIMULATION_EXPORT_POOL_WORKERS = config('SIMULATION_EXPORT_POOL_WORKERS', default=1, cast=int)
+SIMULATION_EXPORT_DIR = config('SIMULATION_EXPORT_DIR', default=str(BASE_DIR / 'spool' / 'exports'))
+SIMULATION_EXPORT_TTL = config('SIMULATION_EXPORT_TTL', default=60 * 60 * 24, cast=int)
+SIMULATION_EXPORT_STALE_AFTER = config('SIMULATION_EXPORT_STALE_AFTER', default=600, cast=int)
+
+# Cache LRU (por processo) de resultados de /simulate/
+SIMULATION_RESULT_CACHE_SIZE = config('SIMULATION_RESULT_CACHE_SIZE', default=10_000, cast=int)
+
+# Prazo (s) para recompilar tabelas de alíquotas/sugestões que usam valores de fallback
+# (cache negativo); tabelas completas só são recompiladas por invalidação. 0 desativa
+SIMULATION_FALLBACK_TTL = config('SIMULATION_FALLBACK_TTL', default=300, cast=int)
+
+# Intervalo mínimo (s) entre leituras das gerações de cache no banco, que mantêm as
+# tabelas em memória coerentes entre workers: alterações feitas em outro worker valem
+# neste em até esse tempo. 0 verifica a cada requisição
+SIMULATION_GENERATION_CHECK_INTERVAL = config('SIMULATION_GENERATION_CHECK_INTERVAL', default=1.0, cast=float)
+
+# Proteção contra stampede nas tabelas compiladas (alíquotas, sugestões, cronograma):
+# antecipação probabilística do recálculo antes do TTL (0 desativa), espera máxima (s)
+# por uma compilação em andamento antes de servir a versão anterior e intervalo (s)
+# entre novas tentativas quando a compilação falha
+SIMULATION_CACHE_EARLY_REFRESH_BETA = config('SIMULATION_CACHE_EARLY_REFRESH_BETA', default=1.0, cast=float)
+SIMULATION_CACHE_WAIT_TIMEOUT = config('SIMULATION_CACHE_WAIT_TIMEOUT', default=5.0, cast=float)
+SIMULATION_CACHE_RETRY_INTERVAL = config('SIMULATION_CACHE_RETRY_INTERVAL', default=5.0, cast=float)
+
+# Cache em dois níveis das linhas de origem das tabelas compiladas: LRU local (entradas;
+# TTL em s, 0 = sem expiração) e o cache compartilhado `alias` (TTL padrão: CACHE_TTL)
+SIMULATION_LOOKUP_CACHE_ALIAS = config('SIMULATION_LOOKUP_CACHE_ALIAS', default='shared')
+SIMULATION_LOOKUP_CACHE_LOCAL_SIZE = config('SIMULATION_LOOKUP_CACHE_LOCAL_SIZE', default=32, cast=int)
+SIMULATION_LOOKUP_CACHE_LOCAL_TTL = config('SIMULATION_LOOKUP_CACHE_LOCAL_TTL', default=0, cast=int)
+SIMULATION_LOOKUP_CACHE_SHARED_TTL = config('SIMULATION_LOOKUP_CACHE_SHARED_TTL', default=CACHE_TTL, cast=int)
+
+# Pool de processos para tarefas de CPU (Monte Carlo, recálculo). Cada worker web cria o
+# seu pool, então o total de processos é workers web x SIMULATION_POOL_WORKERS: use
+# cerca de núcleos / workers web (ex.: 8 núcleos e 4 workers do gunicorn -> 2). Com 1
+# (padrão) não há pool e o cálculo roda no próprio processo da requisição
+SIMULATION_POOL_WORKERS = config('SIMULATION_POOL_WORKERS', default=1, cast=int)
+
+# Recálculo de logs após mudança de regras: logs por bloco enviado ao pool
+SIMULATION_RECOMPUTE_CHUNK_SIZE = config('SIMULATION_RECOMPUTE_CHUNK_SIZE', default=5000, cast=int)
+
+# Monte Carlo: limite de sorteios e orçamento de CPU (segundos) por requisição
+SIMULATION_MONTE_CARLO_MAX_DRAWS = config('SIMULATION_MONTE_CARLO_MAX_DRAWS', default=1_000_000, cast=int)
+SIMULATION_MONTE_CARLO_CPU_BUDGET = config('SIMULATION_MONTE_CARLO_CPU_BUDGET', default=10.0, cast=float)
+
+# Gravação adiada (write-behind) dos logs de /simulate/: fila em memória + spool local,
+# gravada com bulk_create ao atingir FLUSH_SIZE logs ou a cada FLUSH_INTERVAL segundos
+SIMULATION_LOG_WRITE_BEHIND = config('SIMULATION_LOG_WRITE_BEHIND', default=False, cast=bool)
+SIMULATION_LOG_FLUSH_SIZE = config('SIMULATION_LOG_FLUSH_SIZE', default=500, cast=int)
+SIMULATION_LOG_FLUSH_INTERVAL = config('SIMULATION_LOG_FLUSH_INTERVAL', default=1.0, cast=float)
+# Spool: segmentos identificados por host, PID e início do processo; cada host só
+# recupera os próprios (um diretório compartilhado exige hostnames distintos)
+SIMULATION_LOG_SPOOL_DIR = config('SIMULATION_LOG_SPOOL_DIR', default=str(BASE_DIR / 'spool' / 'simulation_logs'))
+SIMULATION_LOG_SPOOL_FSYNC = config('SIMULATION_LOG_SPOOL_FSYNC', default=False, cast=bool)
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
@@ -160,8 +257,8 @@ REST_FRAMEWORK = {
         'rest_framework.throttling.UserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/day',
-        'user': '1000/day',
+        'anon': config('THROTTLE_ANON_RATE', default='100/day'),
+        'user': config('THROTTLE_USER_RATE', default='1000/day'),
         'export': '10/min',
     },
     'EXCEPTION_HANDLER': 'apps.core.exceptions.custom_exception_handler',